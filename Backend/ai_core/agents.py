@@ -1,8 +1,32 @@
-from ai_core.gemini_client import GeminiAgent
-from ai_core.prompts import SYSTEM_PROMPT_SLIDE_PREVIEW , SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE
+from ai_core.gemini_client import GeminiAgent, ImageGenAgent
+from ai_core.prompts import (
+    SYSTEM_PROMPT_SLIDE_PREVIEW , SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE,
+    SYSTEM_PROMPT_SLIDE_OUTLINE, SYSTEM_PROMPT_SLIDE_EXPAND,
+)
+from ai_core.response_cache import ResponseCache
+from ai_core.json_stream import JsonArrayStream
+from ai_core.schemas import validate_slide
+from ai_core.metrics import log, FAILURES
+from pydantic import ValidationError
+import asyncio
+import os
+import re
 
 
+# Agents are cheap to create: they share the pooled genai client (see ai_core.clients)
 gemini_agent = GeminiAgent()
+image_agent = ImageGenAgent()
+preview_cache = ResponseCache()
+
+# Structured previews in one call ("single"), or as an outline followed by one
+# call per slide run concurrently ("outline"); "auto" picks outline mode when the
+# prompt asks for at least OUTLINE_MIN_SLIDES slides.
+STRUCTURED_MODE = os.getenv("STRUCTURED_MODE", "auto")
+OUTLINE_MIN_SLIDES = int(os.getenv("OUTLINE_MIN_SLIDES", "15"))
+EXPAND_ATTEMPTS = int(os.getenv("EXPAND_ATTEMPTS", "3"))  # calls per slide before its outline stands in
+EXPAND_TIMEOUT = float(os.getenv("EXPAND_TIMEOUT", "60"))  # seconds for all slides; late ones get their outline
+MODES = ("single", "outline", "auto")
+_SLIDE_COUNT = re.compile(r"\b(\d{1,3})\s*-?\s*slides?\b", re.IGNORECASE)
 
 
 async def chat_response(prompt, history, system_prompt=SYSTEM_PROMPT_SLIDE_PREVIEW):
@@ -20,11 +44,146 @@ async def content_generation(prompt, history):
     return response
 
 
-async def structured_content_generation(prompt, history,system_prompt=SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE):
+def generation_mode(prompt, mode=None) -> str:
+    """"single" or "outline" for `prompt`, resolving "auto" (and None: STRUCTURED_MODE)."""
+    mode = mode or STRUCTURED_MODE
+    if mode != "auto":
+        return mode
+    match = _SLIDE_COUNT.search(prompt or "")
+    return "outline" if match and int(match.group(1)) >= OUTLINE_MIN_SLIDES else "single"
+
+
+async def structured_content_generation(prompt, history,system_prompt=SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE, fresh=False, mode=None):
+    """
+    Structured slide preview, memoized on (system prompt, prompt, history, resolved mode).
+    Pass fresh=True to bypass the cache and sample a new response, and `mode`
+    ("single" / "outline" / "auto") to override STRUCTURED_MODE.
+    """
+    mode = generation_mode(prompt, mode)
+    if system_prompt != SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE:
+        mode = "single"  # outlines only exist for the structured slide preview
+    # Keyed by mode too: an outlined deck must not answer a single-call request, nor the reverse
+    key = preview_cache.make_key(system_prompt, prompt, history, mode)
+    if mode == "outline":
+        generate = lambda: outlined_structured_output(prompt, history)
+    else:
+        if system_prompt:
+            history = [{'role': 'system', 'content': system_prompt}] + history
+        generate = lambda: gemini_agent.generate_structured_output(prompt, history)
+
+    structured = await preview_cache.get_or_create(
+        key,
+        generate,
+        fresh=fresh,
+        cacheable=lambda result: not (isinstance(result, dict) and "error" in result),
+    )
+    return structured
+
+
+async def outlined_structured_output(prompt, history):
+    """
+    Outline-then-expand generation: a short outline call fixes each slide's category
+    and title, then every slide is written by its own call against its category's
+    schema, all concurrently (as far as the scheduler's quota allows). A slide is
+    retried on its own (timeouts excepted), and one that keeps failing or is not
+    written within EXPAND_TIMEOUT is filled in from its outline entry, so a bad
+    response costs a slide rather than the deck. Falls back to a single call when
+    the outline itself is unusable.
+    """
+    try:
+        outline = await gemini_agent.generate_outline(
+            prompt, [{'role': 'system', 'content': SYSTEM_PROMPT_SLIDE_OUTLINE}] + history
+        )
+    except ValueError as exc:
+        FAILURES.inc(stage="structured_outline")
+        log("structured_outline_failed", error=repr(exc)[:200])
+        outline = None
+    if not outline:
+        history = [{'role': 'system', 'content': SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE}] + history
+        return await gemini_agent.generate_structured_output(prompt, history)
+
+    expand_history = [{'role': 'system', 'content': SYSTEM_PROMPT_SLIDE_EXPAND}] + history
+
+    async def expand(idx):
+        for attempt in range(1, EXPAND_ATTEMPTS + 1):
+            try:
+                return await gemini_agent.expand_slide(prompt, expand_history, outline, idx)
+            except asyncio.TimeoutError:  # a stuck call: another one would only run into the deadline
+                FAILURES.inc(stage="structured_expand")
+                log("structured_expand_timeout", slide=idx + 1, attempt=attempt)
+                break
+            except Exception as exc:  # invalid JSON / schema or API error: this slide only
+                FAILURES.inc(stage="structured_expand")
+                log("structured_expand_failed", slide=idx + 1, attempt=attempt, error=repr(exc)[:200])
+        return _content_from_outline(outline[idx])
+
+    tasks = [asyncio.ensure_future(expand(idx)) for idx in range(len(outline))]
+    try:
+        # One deadline for the whole expansion, so a stuck slide cannot hold the deck
+        done, late = await asyncio.wait(tasks, timeout=EXPAND_TIMEOUT)
+    finally:
+        for task in tasks:
+            task.cancel()  # no-op for finished ones; stops the late ones (and all on cancellation)
+    if late:
+        FAILURES.inc(len(late), stage="structured_expand")
+        log("structured_expand_deadline", slides=len(late), timeout=EXPAND_TIMEOUT)
+    contents = [
+        task.result() if task in done else _content_from_outline(entry) for task, entry in zip(tasks, outline)
+    ]
+    return [
+        {"slide_no": idx + 1, "slide_category": entry["slide_category"], "slide_content": content}
+        for idx, (entry, content) in enumerate(zip(outline, contents))
+    ]
+
+
+def _content_from_outline(entry: dict) -> dict:
+    """Valid `slide_content` for an outline entry whose slide could not be written."""
+    title, summary = entry["title"], entry["summary"]
+    category = entry["slide_category"]
+    if category == "Title Slide":
+        return {"title": title, "subtitle": "", "content": summary, "image_description": title}
+    if category == "Bullet Slide":
+        return {"title": title, "bullets": [summary], "image_description": title}
+    if category == "Two Column Slide":
+        return {"title": title, "left_column": [summary], "right_column": [], "image_description": title}
+    return {"title": title, "content": summary, "image_description": title}
+
+
+async def stream_structured_content(prompt, history, system_prompt=SYSTEM_PROMPT_SLIDE_PREVIEW_WITH_STRUCTURE, fresh=False):
+    """
+    Streaming counterpart of `structured_content_generation`. Yields (event, data) pairs:
+      - ("slide", dict) for each SlidePreview, as soon as its object is complete and valid
+      - ("invalid_slide", dict) for an element that failed validation
+    A fully received response whose slides all validated is stored in the preview
+    cache, and a cached one is replayed.
+    """
+    key = preview_cache.make_key(system_prompt, prompt, history)
     if system_prompt:
         history = [{'role': 'system', 'content': system_prompt}] + history
-        
-    structured = await gemini_agent.generate_structured_output(prompt, history)
-    return structured
-        
-        
\ No newline at end of file
+
+    cached = None if fresh else preview_cache.get(key)
+    if isinstance(cached, list):
+        preview_cache.hits += 1
+        for element in cached:
+            yield _validated_slide(element)
+        return
+
+    preview_cache.misses += 1
+    parser = JsonArrayStream()
+    elements = []
+    valid = True
+    async for chunk in gemini_agent.stream_structured_output(prompt, history):
+        for element in parser.feed(chunk):
+            elements.append(element)
+            event = _validated_slide(element)
+            valid = valid and event[0] == "slide"
+            yield event
+    if parser.closed and valid:  # a response with invalid slides gets a clean retry next time
+        preview_cache.put(key, elements)
+
+
+def _validated_slide(element):
+    try:
+        return "slide", validate_slide(element)
+    except ValidationError as exc:
+        return "invalid_slide", {"error": exc.errors(include_url=False, include_context=False), "raw": element}
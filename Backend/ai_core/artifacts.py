@@ -0,0 +1,215 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from ai_core.metrics import log, FAILURES
+
+# Content-addressed files on local disk. Writes go through one background thread,
+# so request handlers never wait on the filesystem to store what they generated.
+
+ARTIFACT_MAX_PENDING = int(os.getenv("ARTIFACT_MAX_PENDING", "256"))          # queued writes before new ones are dropped
+ARTIFACT_SWEEP_INTERVAL = float(os.getenv("ARTIFACT_SWEEP_INTERVAL", "300"))  # seconds between retention sweeps
+
+
+class ArtifactStore:
+    """
+    Files named `<key><ext>` in `directory`, bounded by total size (least recently
+    used first, with mtime as the access time) and by age. `write` only queues the
+    bytes: a writer thread stores them atomically and enforces the quota, and until
+    then `read` serves them from the queue.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        max_age: float,
+        extensions: tuple,
+        max_pending: int = ARTIFACT_MAX_PENDING,
+        sweep_interval: float = ARTIFACT_SWEEP_INTERVAL,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.extensions = extensions
+        self.max_pending = max_pending
+        self.sweep_interval = sweep_interval
+
+        self._pending = {}  # key -> (ext, data) queued but not on disk yet
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer = None
+        self._disk_bytes = None  # total on disk, known after the first sweep
+        self._last_sweep = 0.0
+
+        self.writes = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.evicted = 0
+
+    # --- Lookup ---
+
+    def name_for(self, key: str):
+        """File name of `key`, queued or on disk, or None if it is not stored."""
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return key + pending[0]
+        path = self.path_for(key)
+        return os.path.basename(path) if path else None
+
+    def path_for(self, key: str):
+        """Path of the on-disk file of `key`, or None if it is not on disk (yet)."""
+        for ext in self.extensions:
+            path = os.path.join(self.directory, key + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def pending(self, key: str):
+        """Bytes of `key` while its write is queued, else None."""
+        with self._lock:
+            pending = self._pending.get(key)
+        return pending[1] if pending is not None else None
+
+    def read(self, key: str):
+        """Bytes of `key` or None; expired files are removed, read ones count as used."""
+        data = self.pending(key)
+        if data is not None:
+            return data
+        path = self.path_for(key)
+        if path is None:
+            return None
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    # --- Writes ---
+
+    def write(self, key: str, data: bytes, ext: str) -> bool:
+        """Queues `data` to be stored as `<key><ext>`; False if the queue is full and it was dropped."""
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending[key] = (ext, data)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+        self._queue.put(key)
+        return True
+
+    def flush(self):
+        """Waits until every queued write is on disk."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                self._store(key)
+            except Exception as exc:  # keep the writer alive
+                FAILURES.inc(stage="artifact_writer")
+                log("artifact_writer_error", key=key, error=repr(exc))
+            finally:
+                self._queue.task_done()
+
+    def _store(self, key: str):
+        with self._lock:
+            entry = self._pending.get(key)
+        if entry is None:  # queued twice; stored by the first pass
+            return
+        ext, data = entry
+        path = os.path.join(self.directory, key + ext)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.writes += 1
+        except OSError as exc:
+            self.write_errors += 1
+            FAILURES.inc(stage="artifact_write")
+            log("artifact_write_failed", key=key, error=repr(exc))
+            try:
+                os.remove(tmp_path)  # a half-written file would never be swept
+            except OSError:
+                pass
+            return  # nothing new on disk
+        finally:
+            with self._lock:
+                if self._pending.get(key) is entry:
+                    del self._pending[key]
+
+        if self._disk_bytes is not None:
+            self._disk_bytes += len(data)
+        if (
+            self._disk_bytes is None
+            or self._disk_bytes > self.max_bytes
+            or time.monotonic() - self._last_sweep > self.sweep_interval
+        ):
+            self.sweep()
+
+    def sweep(self):
+        """Drops expired files, then least recently used ones until under `max_bytes`."""
+        now = time.time()
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.extensions):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if now - st.st_mtime > self.max_age:
+                        self._remove(entry.path)
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            return
+
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+        self._disk_bytes = total
+        self._last_sweep = time.monotonic()
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            self.evicted += 1
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending_writes": pending,
+            "writes": self.writes,
+            "dropped_writes": self.dropped,
+            "write_errors": self.write_errors,
+            "evicted": self.evicted,
+            "disk_bytes": self._disk_bytes,
+            "max_disk_bytes": self.max_bytes,
+        }
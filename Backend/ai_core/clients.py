@@ -0,0 +1,149 @@
+import asyncio
+import os
+import threading
+import time
+
+from ai_core.metrics import log, FAILURES
+from ai_core.render_pool import warm_up_render_pool
+from settings import GENAI_API_KEY
+
+# Gemini API version used by the agents
+GENAI_API_VERSION = os.getenv("GENAI_API_VERSION", "v1alpha")
+# HTTP connection pool of each shared client
+GENAI_MAX_CONNECTIONS = int(os.getenv("GENAI_MAX_CONNECTIONS", "32"))
+# Seconds an idle keep-alive connection is kept open (httpx closes them after 5s by default)
+GENAI_KEEPALIVE_EXPIRY = float(os.getenv("GENAI_KEEPALIVE_EXPIRY", "120"))
+# Background warm-up at startup; set to 0 to skip it
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") != "0"
+# Also send one cheap Gemini request during warm-up, so DNS/TLS are done before the first user
+WARMUP_REMOTE_CALL = os.getenv("WARMUP_REMOTE_CALL", "0") == "1"
+WARMUP_MODEL = os.getenv("WARMUP_MODEL", "gemini-2.5-flash")
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+
+
+class ClientPool:
+    """
+    genai clients shared by every agent in the worker, one per API version.
+    A client is built on first use (google.genai and httpx are only imported
+    then) and keeps its keep-alive connections across requests.
+    """
+
+    def __init__(
+        self,
+        api_key: str = None,
+        max_connections: int = GENAI_MAX_CONNECTIONS,
+        keepalive_expiry: float = GENAI_KEEPALIVE_EXPIRY,
+    ):
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._clients = {}
+        self._lock = threading.Lock()  # warm-up builds clients from a worker thread
+        self.created = 0
+        self.reused = 0
+        self.build_seconds = 0.0
+
+    def get(self, api_version: str = GENAI_API_VERSION):
+        client = self._clients.get(api_version)
+        if client is not None:
+            self.reused += 1
+            return client
+        with self._lock:
+            client = self._clients.get(api_version)
+            if client is None:
+                client = self._clients[api_version] = self._build(api_version)
+            return client
+
+    def _build(self, api_version: str):
+        started = time.perf_counter()
+        import httpx
+        from google import genai
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        client = genai.Client(
+            api_key=self.api_key or GENAI_API_KEY,
+            http_options={
+                "api_version": api_version,
+                "client_args": {"limits": limits},
+                "async_client_args": {"limits": limits},
+            },
+        )
+        self.created += 1
+        self.build_seconds += time.perf_counter() - started
+        return client
+
+    async def aclose(self):
+        """Closes every client and its connections; the next `get()` builds a new one."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for api_version, client in clients.items():
+            try:
+                await client.aio.aclose()
+                client.close()
+            except Exception as exc:
+                FAILURES.inc(stage="client_close")
+                log("client_close_failed", api_version=api_version, error=repr(exc))
+
+    def stats(self) -> dict:
+        return {
+            "clients": sorted(self._clients),
+            "created": self.created,
+            "reused": self.reused,
+            "build_ms": round(self.build_seconds * 1000, 1),
+            "max_connections": self.max_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+        }
+
+
+class Warmup:
+    """
+    Startup warm-up, run in the background so the worker accepts connections
+    right away. Each step is timed; a failed step is recorded, not fatal.
+    The worker reports ready once the warm-up has finished (or was skipped).
+    """
+
+    def __init__(self):
+        self.status = "pending"
+        self.steps = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("done", "skipped")
+
+    def skip(self):
+        self.status = "skipped"
+
+    async def run(self, pool: ClientPool, remote_call: bool = WARMUP_REMOTE_CALL):
+        self.status = "running"
+        await self._step("clients", asyncio.to_thread(pool.get))
+        await self._step("render_pool", asyncio.to_thread(warm_up_render_pool))
+        if remote_call:
+            await self._step(
+                "gemini",
+                asyncio.wait_for(pool.get().aio.models.get(model=WARMUP_MODEL), timeout=WARMUP_TIMEOUT),
+            )
+        self.status = "done"
+
+    async def _step(self, name: str, coro):
+        started = time.perf_counter()
+        try:
+            await coro
+        except Exception as exc:
+            FAILURES.inc(stage="warmup")
+            log("warmup_step_failed", step=name, error=repr(exc))
+            self.steps[name] = {"ok": False, "error": repr(exc)}
+        else:
+            self.steps[name] = {"ok": True}
+        self.steps[name]["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def stats(self) -> dict:
+        return {"status": self.status, "steps": self.steps}
+
+
+# Process-wide pool used by GeminiAgent and ImageGenAgent
+client_pool = ClientPool()
+warmup = Warmup()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+
+# Defaults, overridable through the environment
+DECK_STORE_DIR = os.getenv("DECK_STORE_DIR", os.path.join(tempfile.gettempdir(), "auto_ppt_decks"))
+DECK_STORE_MAX = int(os.getenv("DECK_STORE_MAX", "64"))     # rendered decks kept as bases for edits
+DECK_STORE_TTL = float(os.getenv("DECK_STORE_TTL", "3600"))  # seconds a deck is kept after its last use
+
+
+def slide_fingerprint(slide: dict) -> str:
+    """Hash of what a slide renders from: its category and content (not its number)."""
+    payload = {
+        "category": str(slide.get("slide_category", "")).strip().lower(),
+        "content": slide.get("slide_content", {}),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def plan_reuse(old_slides: list, new_slides: list, missing_images=()) -> list:
+    """
+    For each slide of `new_slides`, the index of an identical slide in `old_slides`
+    whose rendered slide can be kept, or None if it has to be built. A slide at the
+    same position is preferred, so reordered and duplicated slides still match.
+    Old slides listed in `missing_images` were rendered without their image and
+    never match, so they are rebuilt and their images requested again.
+    """
+    old_prints = [None if idx in missing_images else slide_fingerprint(s) for idx, s in enumerate(old_slides)]
+    new_prints = [slide_fingerprint(s) for s in new_slides]
+    reuse = [None] * len(new_slides)
+    used = set()
+    for idx, fp in enumerate(new_prints):
+        if idx < len(old_prints) and old_prints[idx] == fp:
+            reuse[idx] = idx
+            used.add(idx)
+    for idx, fp in enumerate(new_prints):
+        if reuse[idx] is not None:
+            continue
+        for old_idx, old_fp in enumerate(old_prints):
+            if old_idx not in used and old_fp == fp:
+                reuse[idx] = old_idx
+                used.add(old_idx)
+                break
+    return reuse
+
+
+class DeckVersion:
+    def __init__(self, slides: list, theme: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.slides = slides
+        self.theme = theme
+        self.path = path
+        self.missing_images = set()  # indices of slides rendered with a placeholder instead of their image
+        self.last_used = time.monotonic()
+
+
+class DeckStore:
+    """
+    Recently rendered decks with the slides they were built from, so an edited
+    version can be rendered from the previous one instead of from scratch.
+    Bounded by count and idle time; files live in `directory`.
+    """
+
+    def __init__(self, directory: str = DECK_STORE_DIR, max_decks: int = DECK_STORE_MAX, ttl: float = DECK_STORE_TTL):
+        self.directory = directory
+        self.max_decks = max_decks
+        self.ttl = ttl
+        self._decks = OrderedDict()  # id -> DeckVersion, least recently used first
+
+    def reserve(self, slides: list, theme: str = None) -> DeckVersion:
+        """New version whose file is to be rendered at `version.path`; register it with `add()`."""
+        os.makedirs(self.directory, exist_ok=True)
+        version = DeckVersion(slides, theme, None)
+        version.path = os.path.join(self.directory, f"{version.id}.pptx")
+        return version
+
+    def add(self, version: DeckVersion):
+        self._decks[version.id] = version
+        self.cleanup()
+
+    def get(self, deck_id: str):
+        self.cleanup()
+        version = self._decks.get(deck_id)
+        if version is not None:
+            version.last_used = time.monotonic()
+            self._decks.move_to_end(deck_id)
+        return version
+
+    def cleanup(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._decks:
+            version = next(iter(self._decks.values()))
+            if len(self._decks) <= self.max_decks and version.last_used > cutoff:
+                break
+            self._decks.popitem(last=False)
+            try:
+                os.remove(version.path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {"decks": len(self._decks), "max_decks": self.max_decks}
+
+
+# Process-wide store of rendered decks
+deck_store = DeckStore()
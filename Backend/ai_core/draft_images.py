@@ -0,0 +1,130 @@
+import hashlib
+import colorsys
+import re
+import textwrap
+
+from PIL import Image as PILImage, ImageDraw, ImageFont, ImageOps
+
+from ai_core.image_prep import IMAGE_DPI, EMU_PER_INCH
+from ai_core import themes
+
+# Draft pictures are drawn locally from the image description in a few
+# milliseconds, so a deck can be returned before Gemini has produced anything.
+
+# Keyword -> icon drawn in the middle of the card
+_ICONS = (
+    (r"chart|graph|growth|data|statistic|metric|revenue|sales|bar|trend|kpi", "bars"),
+    (r"team|people|person|collaborat|audience|customer|staff|group|meeting", "people"),
+    (r"molecule|science|lab|drug|chemi|dna|cell|biolog|compound|research", "molecule"),
+    (r"time|timeline|roadmap|milestone|phase|schedule|plan|journey|step", "timeline"),
+)
+
+
+def _palette(description: str):
+    """Two related colors derived from the description, so each slide gets its own card."""
+    digest = hashlib.sha1(description.encode("utf-8")).digest()
+    hue = digest[0] / 255
+    top = colorsys.hls_to_rgb(hue, 0.55, 0.45)
+    bottom = colorsys.hls_to_rgb((hue + 0.08) % 1, 0.35, 0.5)
+    return tuple(int(c * 255) for c in top), tuple(int(c * 255) for c in bottom)
+
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        return ImageFont.load_default()
+
+
+def _icon_kind(description: str) -> str:
+    text = description.lower()
+    for pattern, kind in _ICONS:
+        if re.search(pattern, text):
+            return kind
+    return "shapes"
+
+
+def _draw_icon(draw: ImageDraw.ImageDraw, kind: str, cx: int, cy: int, r: int):
+    white, faint = (255, 255, 255, 230), (255, 255, 255, 110)
+    w = max(2, r // 12)
+    if kind == "bars":
+        bar_w = r // 3
+        for i, height in enumerate((0.6, 1.0, 1.4, 1.9)):
+            left = cx - 2 * bar_w + i * bar_w + 4
+            draw.rectangle([left, cy + r - int(r * height), left + bar_w - 8, cy + r], fill=white)
+    elif kind == "people":
+        for dx, scale, fill in ((-r // 2, 0.75, faint), (r // 2, 0.75, faint), (0, 1.0, white)):
+            head = int(r * 0.3 * scale)
+            x = cx + dx
+            draw.ellipse([x - head, cy - r // 2 - head, x + head, cy - r // 2 + head], fill=fill)
+            draw.pieslice([x - 2 * head, cy, x + 2 * head, cy + 4 * head], 180, 360, fill=fill)
+    elif kind == "molecule":
+        nodes = [(cx, cy), (cx - r, cy - r // 2), (cx + r, cy - r // 2), (cx, cy + r), (cx + r // 2, cy - r)]
+        for x, y in nodes[1:]:
+            draw.line([nodes[0], (x, y)], fill=faint, width=w)
+        for i, (x, y) in enumerate(nodes):
+            size = r // 4 if i else r // 3
+            draw.ellipse([x - size, y - size, x + size, y + size], fill=white)
+    elif kind == "timeline":
+        draw.line([(cx - 1.4 * r, cy), (cx + 1.4 * r, cy)], fill=faint, width=w)
+        for i in range(4):
+            x = int(cx - 1.2 * r + i * 0.8 * r)
+            size = r // 5
+            draw.ellipse([x - size, cy - size, x + size, cy + size], fill=white if i < 3 else faint)
+    else:
+        draw.ellipse([cx - r, cy - r, cx + r // 3, cy + r // 3], fill=faint)
+        draw.rectangle([cx - r // 4, cy - r // 4, cx + r, cy + r], fill=white)
+
+
+def draft_image(description: str, size) -> PILImage.Image:
+    """
+    Placeholder picture for `description`: gradient card with an icon picked from
+    keywords, the description as caption and a "DRAFT" tag. `size` is in pixels.
+    """
+    width, height = max(64, int(size[0])), max(48, int(size[1]))
+    top, bottom = _palette(description)
+    gradient = PILImage.linear_gradient("L").resize((width, height))
+    img = ImageOps.colorize(gradient, top, bottom).convert("RGBA")
+
+    overlay = PILImage.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    caption_h = int(height * 0.3)
+    radius = max(8, min(width, height - caption_h) // 5)
+    _draw_icon(draw, _icon_kind(description), width // 2, (height - caption_h) // 2 + radius // 4, radius)
+
+    # Caption band with the (wrapped, clipped) description
+    draw.rectangle([0, height - caption_h, width, height], fill=(0, 0, 0, 90))
+    font_size = max(10, caption_h // 5)
+    font = _font(font_size)
+    chars_per_line = max(12, int(width / (font_size * 0.55)))
+    lines = textwrap.wrap(description, chars_per_line)[:3]
+    if len(textwrap.wrap(description, chars_per_line)) > 3:
+        lines[-1] = lines[-1][: max(0, chars_per_line - 3)] + "..."
+    y = height - caption_h + max(4, (caption_h - len(lines) * int(font_size * 1.25)) // 2)
+    for line in lines:
+        draw.text((max(6, width // 30), y), line, font=font, fill=(255, 255, 255, 235))
+        y += int(font_size * 1.25)
+
+    tag_font = _font(max(10, height // 16))
+    draw.text((max(6, width // 30), max(4, height // 30)), "DRAFT", font=tag_font, fill=(255, 255, 255, 200))
+
+    return PILImage.alpha_composite(img, overlay).convert("RGB")
+
+
+def draft_images_for(slides: list, theme: str = None, fill: float = 0.9) -> list:
+    """
+    Draft pictures aligned with `slides`, each sized to the image area of its
+    slide's layout at IMAGE_DPI; None for slides without an image description.
+    """
+    layouts = {name.lower(): name for name in themes.LAYOUT_NAMES}
+    images = []
+    for slide in slides:
+        description = (slide.get("slide_content") or {}).get("image_description")
+        layout = layouts.get(str(slide.get("slide_category", "")).lower())
+        if not description or layout is None:
+            images.append(None)
+            continue
+        area_w, area_h = themes.image_area_size(theme or themes.DEFAULT_THEME, layout)
+        size = (area_w / EMU_PER_INCH * IMAGE_DPI * fill, area_h / EMU_PER_INCH * IMAGE_DPI * fill)
+        images.append(draft_image(description, size))
+    return images
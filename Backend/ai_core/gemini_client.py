@@ -1,20 +1,48 @@
-
-from google import genai
 import json
-from ai_core.schemas import SlidePreview
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from google.genai import types
-from google.genai.errors import ServerError
-from PIL import Image
-from io import BytesIO
+from ai_core.schemas import SlidePreview, SlideOutline, CONTENT_MODELS, OUTLINE
 import os
-from settings import GENAI_API_KEY
+import asyncio
+import time
+from ai_core.clients import ClientPool, client_pool
+from ai_core.image_cache import ImageCache, image_cache
+from ai_core.scheduler import GeminiScheduler, scheduler as default_scheduler, INTERACTIVE, BULK
+from ai_core.metrics import (
+    log, GEMINI_REQUEST_SECONDS, GEMINI_TOKENS, IMAGE_GENERATION_SECONDS, IMAGE_BYTES, FAILURES,
+)
+
+# google.genai and PIL are imported lazily (see ClientPool) to keep worker startup fast.
+
+
+def record_usage(model: str, response):
+    """Adds the token counts of a Gemini response (or final stream chunk) to the metrics."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, count in (
+        ("prompt", usage.prompt_token_count),
+        ("output", usage.candidates_token_count),
+        ("thoughts", getattr(usage, "thoughts_token_count", None)),
+    ):
+        if count:
+            GEMINI_TOKENS.inc(count, model=model, kind=kind)
+
+# Max number of image generations in flight per deck
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "4"))
+# Upper bound (seconds) for a single structured preview call
+STRUCTURED_OUTPUT_TIMEOUT = float(os.getenv("STRUCTURED_OUTPUT_TIMEOUT", "120"))
+
 class GeminiAgent:
-    def __init__(self):
-        self.api_key = GENAI_API_KEY
-        self.client = genai.Client(api_key=self.api_key, http_options={'api_version': 'v1alpha'})
+    def __init__(self, scheduler: GeminiScheduler = default_scheduler, clients: ClientPool = client_pool):
+        self.clients = clients
         self.model = "gemini-2.0-flash-exp"
+        self.structured_model = "gemini-2.5-flash"
         self.config = {"response_modalities": ["TEXT"]}
+        self.scheduler = scheduler
+
+    @property
+    def client(self):
+        """Shared, pooled genai client (built on first use)."""
+        return self.clients.get()
 
     async def execute_agent(self, question, history):
         # Format history as context
@@ -23,7 +51,8 @@ class GeminiAgent:
         # Prepare full input with context
         full_input = f"{context}\nUser: {question}"
 
-        async with self.client.aio.live.connect(model=self.model, config=self.config) as session:
+        async with self.scheduler.slot(self.model, INTERACTIVE), \
+                self.client.aio.live.connect(model=self.model, config=self.config) as session:
             await session.send(input=full_input, end_of_turn=True)
 
             async for response in session.receive():  # Stream responses
@@ -41,71 +70,205 @@ class GeminiAgent:
         # Combine system + context + user question
         full_input = f"{context}\nUser: {question}"
 
-        response = self.client.models.generate_content(
-    model="gemini-2.5-flash",
-    contents=full_input,
-    config={
-        "response_mime_type": "application/json",
-        "response_schema": list[SlidePreview],
-    },
-)
-        # Extract text output
-        print("Response object:", response)
-        raw_text = response.text
-        print("Raw response:", raw_text)
+        raw_text = await self._generate_json(full_input, list[SlidePreview])
+        log("structured_output", model=self.structured_model, chars=len(raw_text or ""))
 
         # Try parsing JSON
         try:
             structured = json.loads(raw_text)
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, TypeError):
+            FAILURES.inc(stage="structured_output_json")
             structured = {"error": "Invalid JSON returned", "raw": raw_text}
 
         return structured
+
+    async def generate_outline(self, question, history) -> list:
+        """
+        Outline of the deck (list of SlideOutline dicts) for outline-then-expand
+        generation. Raises ValueError (pydantic.ValidationError included) when the
+        response is not a valid outline.
+        """
+        context = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
+        raw_text = await self._generate_json(f"{context}\nUser: {question}", list[SlideOutline])
+        log("structured_outline", model=self.structured_model, chars=len(raw_text or ""))
+        return OUTLINE.dump_python(OUTLINE.validate_json(raw_text or ""))
+
+    async def expand_slide(self, question, history, outline: list, idx: int) -> dict:
+        """
+        `slide_content` of slide `idx` of `outline`, generated against the content
+        model of its category only. Raises ValueError when the response does not validate.
+        """
+        context = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
+        entry = outline[idx]
+        plan = "\n".join(
+            f"{n + 1}. [{slide['slide_category']}] {slide['title']}: {slide['summary']}" for n, slide in enumerate(outline)
+        )
+        full_input = (
+            f"{context}\nUser: {question}\n\nDeck outline:\n{plan}\n\n"
+            f"Write slide {idx + 1} ({entry['slide_category']}): {entry['title']}. {entry['summary']}"
+        )
+        model = CONTENT_MODELS[entry["slide_category"]]
+        raw_text = await self._generate_json(full_input, model)
+        return model.model_validate_json(raw_text or "").model_dump()
+
+    async def _generate_json(self, full_input: str, schema) -> str:
+        """Text of one JSON-mode call of the structured model constrained to `schema`."""
+        # Async client so the event loop keeps serving other requests; previews are
+        # interactive, so the scheduler lets them ahead of queued image generation.
+        # Raises asyncio.TimeoutError once STRUCTURED_OUTPUT_TIMEOUT elapses (queueing included)
+        response = await asyncio.wait_for(
+            self.scheduler.call(
+                self.structured_model,
+                lambda: self.client.aio.models.generate_content(
+                    model=self.structured_model,
+                    contents=full_input,
+                    config={
+                        "response_mime_type": "application/json",
+                        "response_schema": schema,
+                    },
+                ),
+                priority=INTERACTIVE,
+            ),
+            timeout=STRUCTURED_OUTPUT_TIMEOUT,
+        )
+        record_usage(self.structured_model, response)
+        return response.text
+
+    async def stream_structured_output(self, question, history):
+        """
+        Streaming variant of `generate_structured_output`: yields the text of the
+        JSON slide list chunk by chunk as Gemini produces it.
+        Raises asyncio.TimeoutError once STRUCTURED_OUTPUT_TIMEOUT elapses.
+        """
+        context = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history])
+        full_input = f"{context}\nUser: {question}"
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STRUCTURED_OUTPUT_TIMEOUT
+        # A stream cannot be replayed once chunks went out, so it holds a slot
+        # for its whole duration instead of going through scheduler.call()
+        async with self.scheduler.slot(self.structured_model, INTERACTIVE):
+            with GEMINI_REQUEST_SECONDS.time(model=self.structured_model, outcome="stream"):
+                stream = await asyncio.wait_for(
+                    self.client.aio.models.generate_content_stream(
+                        model=self.structured_model,
+                        contents=full_input,
+                        config={
+                            "response_mime_type": "application/json",
+                            "response_schema": list[SlidePreview],
+                        },
+                    ),
+                    timeout=deadline - loop.time(),
+                )
+                usage = None
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=deadline - loop.time())
+                    except StopAsyncIteration:
+                        break
+                    if chunk.usage_metadata is not None:
+                        usage = chunk  # cumulative; the last chunk carries the totals
+                    if chunk.text:
+                        yield chunk.text
+                record_usage(self.structured_model, usage)
     
     
     
 class ImageGenAgent:
-    def __init__(self):
-        self.api_key = GENAI_API_KEY
-        self.client = genai.Client(api_key=GENAI_API_KEY ,http_options={'api_version': 'v1alpha'})
+    system_prompt = (
+        "You are a large language model built by Junaid. "
+        "For questions about your identity, training, or model details, respond only with this: "
+        "'I'm a language model built by Junaid. Please contact him for more info.' "
+        "Do not provide any additional information or explanations about your training, origin, or technical details. "
+        "For all other prompts, respond appropriately to complete the task."
+    )
+
+    def __init__(
+        self,
+        cache: ImageCache = image_cache,
+        scheduler: GeminiScheduler = default_scheduler,
+        clients: ClientPool = client_pool,
+    ):
+        self.clients = clients
         self.model = 'gemini-2.0-flash-exp'
-        self.config = types.GenerateContentConfig(response_modalities=["TEXT", "IMAGE"])
+        self.config = {"response_modalities": ["TEXT", "IMAGE"]}
+        self.cache = cache
+        self.scheduler = scheduler
 
-    @retry(
-        stop=stop_after_attempt(10),              # Up to 5 attempts
-        wait=wait_exponential(multiplier=1, min=2, max=40),  # Wait: 2s, 4s, 8s, 16s
-        retry=retry_if_exception_type(ServerError)            # Only retry on ServerError (like 503)
-    )
-    
-    
-    def generate_image_response(self, prompt: str):
+    @property
+    def client(self):
+        """Shared, pooled genai client (built on first use)."""
+        return self.clients.get()
+
+    def cache_key(self, prompt: str) -> str:
+        return self.cache.make_key(self.model, self.system_prompt, prompt)
+
+    async def agenerate_image_bytes(self, prompt: str, priority=BULK):
         """
-        Generates content (text + image) based on a given prompt.
-        Returns:
-            - response_text: Generated description
-            - image: PIL.Image object if image was generated
+        Async, cached image generation built on the `aio` client.
+        Identical prompts in flight at the same time share one Gemini call.
+        `priority` is the scheduler class (or Ticket) of a call that has to be made.
+        Returns the encoded image bytes, or None if no image came back.
         """
-        system_prompt = (
-    "You are a large language model built by Junaid. "
-    "For questions about your identity, training, or model details, respond only with this: "
-    "'I'm a language model built by Junaid. Please contact him for more info.' "
-    "Do not provide any additional information or explanations about your training, origin, or technical details. "
-    "For all other prompts, respond appropriately to complete the task."
-)
+        async def _generate():
+            _, data = await self._agenerate_image(prompt, priority)
+            return data
+
+        return await self.cache.get_or_create(self.cache_key(prompt), _generate)
+
+    async def generate_images(self, prompts, max_concurrency: int = IMAGE_CONCURRENCY, on_result=None):
+        """
+        Generates one image per prompt concurrently, at most `max_concurrency` at a time.
+        Returns a list of encoded image bytes aligned with `prompts`; entries are None
+        for empty prompts and for prompts whose generation failed, so callers fall
+        back to a placeholder. `on_result(idx, data)` is called as each one finishes.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _generate(idx, prompt):
+            data = None
+            if prompt:
+                started = time.perf_counter()
+                async with semaphore:
+                    try:
+                        data = await self.agenerate_image_bytes(prompt)
+                    except Exception as exc:
+                        FAILURES.inc(stage="image_generation")
+                        log("image_generation_failed", slide=idx + 1, error=repr(exc))
+                IMAGE_GENERATION_SECONDS.observe(time.perf_counter() - started, outcome="ok" if data else "failed")
+            if on_result is not None:
+                on_result(idx, data)
+            return data
+
+        return await asyncio.gather(*(_generate(idx, prompt) for idx, prompt in enumerate(prompts)))
 
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=[system_prompt, prompt],  # Flat list of strings
-            config=self.config
+    async def _agenerate_image(self, prompt: str, priority=BULK):
+        # Rate limiting and retries on ServerError / 429 are handled by the shared scheduler
+        response = await self.scheduler.call(
+            self.model,
+            lambda: self.client.aio.models.generate_content(
+                model=self.model,
+                contents=[self.system_prompt, prompt],
+                config=self.config
+            ),
+            priority=priority,
         )
+        record_usage(self.model, response)
+        response_text, data = self._parse_image_response(response)
+        if data:
+            IMAGE_BYTES.inc(len(data))
+        return response_text, data
 
+    @staticmethod
+    def _parse_image_response(response):
+        """Returns (response_text, image_bytes) from a Gemini image response."""
         response_text = None
-        image = None
+        image_data = None
 
         for part in response.candidates[0].content.parts:
             if part.text is not None:
                 response_text = part.text
             elif part.inline_data is not None:
-                image = Image.open(BytesIO(part.inline_data.data))
+                image_data = part.inline_data.data
 
-        return response_text, image
+        return response_text, image_data
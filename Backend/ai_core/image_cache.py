@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from ai_core.artifacts import ArtifactStore
+
+# Defaults, overridable through the environment
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "images")
+)
+IMAGE_CACHE_MEMORY_BYTES = int(os.getenv("IMAGE_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+IMAGE_CACHE_DISK_BYTES = int(os.getenv("IMAGE_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+IMAGE_CACHE_MAX_AGE = float(os.getenv("IMAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+
+_EXTENSIONS = (".png", ".jpg", ".webp")
+
+
+def _extension_for(data: bytes) -> str:
+    if data.startswith(b"\xff\xd8"):
+        return ".jpg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    return ".png"
+
+
+class ImageCache:
+    """
+    Two-tier, content-addressed cache for generated image bytes.
+      - Memory: LRU bounded by total bytes
+      - Disk: one file per key in `cache_dir` (an ArtifactStore: written in the
+        background, evicted by total size and age)
+    Concurrent `get_or_create` calls for the same key share a single generation.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = IMAGE_CACHE_DIR,
+        max_memory_bytes: int = IMAGE_CACHE_MEMORY_BYTES,
+        max_disk_bytes: int = IMAGE_CACHE_DISK_BYTES,
+        max_age: float = IMAGE_CACHE_MAX_AGE,
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self.disk = ArtifactStore(cache_dir, max_disk_bytes, max_age, _EXTENSIONS)
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._waiters = {}       # key -> callers awaiting its in-flight generation
+        self._abandoned = set()  # keys whose generation stops once nobody awaits it
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, description: str) -> str:
+        """Content address of an image: hash of everything that determines it."""
+        digest = hashlib.sha256()
+        for field in (model, system_prompt, description):
+            digest.update(field.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    # --- Lookup / store ---
+
+    def get(self, key: str):
+        """Returns cached bytes for `key` or None. Disk hits are promoted to memory."""
+        data = self._from_memory(key)
+        if data is None:
+            data = self._from_disk(key)
+        return data
+
+    def peek(self, key: str):
+        """
+        Cached bytes for `key` or None, for readers other than the agents (thumbnails):
+        not counted as a hit and not promoted to memory. Reads the disk on a memory
+        miss, so call it off the event loop.
+        """
+        with self._lock:
+            data = self._memory.get(key)
+        return data if data is not None else self.disk.read(key)
+
+    def put(self, key: str, data: bytes):
+        """Caches `data`; the disk copy is written in the background."""
+        with self._lock:
+            self._remember(key, data)
+        self.disk.write(key, data, _extension_for(data))
+
+    async def get_or_create(self, key: str, factory):
+        """
+        Returns cached bytes for `key`, otherwise awaits `factory()` once and caches
+        its result. Callers arriving while a generation is in flight wait on it.
+        """
+        data = self._from_memory(key)
+        if data is None:
+            data = await asyncio.to_thread(self._from_disk, key)
+        if data is not None:
+            return data
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._create(key, factory))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        self._abandoned.discard(key)  # someone wants it after all
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # Shield so one cancelled waiter does not abort the shared generation
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if key in self._abandoned:
+                    self._abandoned.discard(key)
+                    task.cancel()
+
+    def abandon(self, key: str):
+        """
+        Stops the in-flight generation of `key` once its current waiters are gone,
+        unless another caller joins first. For speculative work that was superseded.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            return
+        if key in self._waiters:
+            self._abandoned.add(key)
+        else:
+            task.cancel()
+
+    async def _create(self, key: str, factory):
+        data = await factory()
+        if data:
+            self.put(key, data)
+        return data
+
+    def path_for(self, key: str):
+        """Path of the on-disk entry for `key`, or None if it is not on disk."""
+        return self.disk.path_for(key)
+
+    def name_for(self, key: str):
+        """File name `key` is served under by GET /images, or None if it is not stored."""
+        return self.disk.name_for(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            memory_items, memory_bytes = len(self._memory), self._memory_bytes
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_items": memory_items,
+            "memory_bytes": memory_bytes,
+            "inflight": len(self._inflight),
+            "disk": self.disk.stats(),
+        }
+
+    # --- Memory tier ---
+
+    def _from_memory(self, key: str):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return data
+
+    def _remember(self, key: str, data: bytes):
+        # Caller holds self._lock
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        if len(data) > self.max_memory_bytes:
+            return
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # --- Disk tier ---
+
+    def _from_disk(self, key: str):
+        data = self.disk.read(key)
+        if data is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, data)
+        return data
+
+
+# Process-wide cache shared by every ImageGenAgent
+image_cache = ImageCache()
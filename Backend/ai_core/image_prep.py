@@ -0,0 +1,105 @@
+import hashlib
+import os
+from collections import OrderedDict
+from io import BytesIO
+from typing import Union
+
+from PIL import Image as PILImage
+
+EMU_PER_INCH = 914400
+
+# Resolution images are resampled to for their on-slide box
+IMAGE_DPI = int(os.getenv("IMAGE_DPI", "150"))
+JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+# Source images up to this factor larger than the target are passed through as is
+PASSTHROUGH_SLACK = 1.25
+# Images with at most this many distinct colors in a 128x128 sample are treated
+# as flat graphics and kept lossless (PNG); anything richer is a photo (JPEG)
+FLAT_GRAPHIC_MAX_COLORS = 1024
+
+_PREPARED_CACHE_SIZE = 32
+_prepared = OrderedDict()  # (source digest, target px) -> blob
+
+
+def fit_image(
+    image: Union[PILImage.Image, bytes],
+    box_width: int,
+    box_height: int,
+    fill: float = 0.9,
+    dpi: int = IMAGE_DPI,
+):
+    """
+    Fit `image` inside a box of `box_width` x `box_height` EMU, scaled by `fill`
+    and keeping its aspect ratio.
+    Returns (blob, width_emu, height_emu) where `blob` is the encoded image to embed.
+    """
+    img = image if isinstance(image, PILImage.Image) else PILImage.open(BytesIO(image))
+    orig_w, orig_h = img.size
+    scale = min(box_width / orig_w, box_height / orig_h) * fill
+    width, height = int(orig_w * scale), int(orig_h * scale)
+    target = (
+        max(1, round(width / EMU_PER_INCH * dpi)),
+        max(1, round(height / EMU_PER_INCH * dpi)),
+    )
+    return prepare_image(image, target, img), width, height
+
+
+def prepare_image(image: Union[PILImage.Image, bytes], target_size, opened: PILImage.Image = None) -> bytes:
+    """
+    Encoded image for a picture shown at `target_size` pixels:
+      - Original bytes when they are PNG/JPEG and not much larger than needed
+      - Otherwise resampled to `target_size`, as JPEG for photos and PNG for
+        flat graphics or images with transparency
+    Results for encoded input are memoized, so the same image placed twice yields
+    the same blob (python-pptx then stores a single media part).
+    """
+    if isinstance(image, PILImage.Image):
+        return _encode(image, target_size)
+
+    key = (hashlib.sha1(image).digest(), tuple(target_size))
+    blob = _prepared.get(key)
+    if blob is not None:
+        _prepared.move_to_end(key)
+        return blob
+
+    img = opened if opened is not None else PILImage.open(BytesIO(image))
+    if _can_pass_through(img, target_size):
+        blob = image
+    else:
+        blob = _encode(img, target_size)
+
+    _prepared[key] = blob
+    while len(_prepared) > _PREPARED_CACHE_SIZE:
+        _prepared.popitem(last=False)
+    return blob
+
+
+def _can_pass_through(img: PILImage.Image, target_size) -> bool:
+    if img.format not in ("PNG", "JPEG"):
+        return False
+    if img.format == "JPEG" and img.mode not in ("RGB", "L"):
+        return False  # e.g. CMYK JPEGs render poorly in PowerPoint
+    return img.width <= target_size[0] * PASSTHROUGH_SLACK and img.height <= target_size[1] * PASSTHROUGH_SLACK
+
+
+def _encode(img: PILImage.Image, target_size) -> bytes:
+    if img.format == "JPEG":
+        img.draft("RGB", target_size)  # decode at reduced scale when possible
+
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    if img.width > target_size[0] or img.height > target_size[1]:
+        img = img.resize(target_size, PILImage.LANCZOS, reducing_gap=2.0)
+
+    out = BytesIO()
+    if has_alpha or _is_flat_graphic(img):
+        img.save(out, format="PNG", optimize=True)
+    else:
+        img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _is_flat_graphic(img: PILImage.Image) -> bool:
+    """Charts, diagrams and icons use few distinct colors; photos use many."""
+    sample = img if img.width * img.height <= 128 * 128 else img.resize((128, 128), PILImage.NEAREST)
+    return sample.getcolors(maxcolors=FLAT_GRAPHIC_MAX_COLORS) is not None
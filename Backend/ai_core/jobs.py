@@ -0,0 +1,212 @@
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from ai_core.agents import image_agent
+from ai_core.prefetch import image_prefetcher
+from ai_core.render_pool import render_deck
+from ai_core.metrics import log, trace_id_var, FAILURES
+
+# Defaults, overridable through the environment
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))              # decks built at the same time
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))    # queued + running jobs accepted
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "3600"))     # seconds a finished job is kept
+JOB_RESULT_DIR = os.getenv("JOB_RESULT_DIR", os.path.join(tempfile.gettempdir(), "auto_ppt_jobs"))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already pending."""
+
+
+class Job:
+    def __init__(self, slides: list, theme: str = None):
+        self.id = uuid.uuid4().hex
+        self.slides = slides
+        self.theme = theme
+        self.status = QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result_path = None
+        # Per-slide progress: pending -> image_ready / image_failed / no_image -> rendered
+        self.slide_status = ["pending"] * len(slides)
+        self.image_keys = [None] * len(slides)
+        self.task = None
+        # Trace id of the submitting request; the job's task inherits it for logs
+        self.trace_id = trace_id_var.get()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def progress(self) -> float:
+        if not self.slides:
+            return 1.0 if self.status == DONE else 0.0
+        # Images and rendering each count for half of a slide
+        weights = {"pending": 0.0, "image_ready": 0.5, "image_failed": 0.5, "no_image": 0.5, "rendered": 1.0}
+        return round(sum(weights[s] for s in self.slide_status) / len(self.slides), 4)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "trace_id": self.trace_id,
+            "theme": self.theme,
+            "error": self.error,
+            "progress": self.progress(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "slides": [
+                {"slide_id": slide_id(self.id, idx), "status": status}
+                for idx, status in enumerate(self.slide_status)
+            ],
+        }
+
+
+def slide_id(job_id: str, idx: int) -> str:
+    return f"{job_id}-{idx + 1}"
+
+
+def parse_slide_id(value: str):
+    """Splits a slide id into (job_id, slide index); raises ValueError when malformed."""
+    job_id, _, number = value.rpartition("-")
+    idx = int(number) - 1
+    if not job_id or idx < 0:
+        raise ValueError(value)
+    return job_id, idx
+
+
+class JobManager:
+    """
+    Runs deck generation jobs in the background on a bounded pool of workers.
+    Finished jobs and their result files are dropped after `retention` seconds.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        retention: float = JOB_RETENTION,
+        result_dir: str = JOB_RESULT_DIR,
+    ):
+        self.max_pending = max_pending
+        self.retention = retention
+        self.result_dir = result_dir
+        self._slots = asyncio.Semaphore(max(1, workers))
+        self._jobs = {}
+
+    def submit(self, slides: list, theme: str = None) -> Job:
+        self.cleanup()
+        pending = sum(1 for job in self._jobs.values() if not job.finished)
+        if pending >= self.max_pending:
+            raise JobQueueFull()
+        job = Job(slides, theme)
+        self._jobs[job.id] = job
+        job.task = asyncio.ensure_future(self._run(job))
+        return job
+
+    def get(self, job_id: str):
+        self.cleanup()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        """Cancels a queued or running job. Returns the job, or None if unknown."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.finished and job.task is not None:
+            job.task.cancel()
+            if job.status == QUEUED:
+                # A task cancelled before its first step never runs `_run`
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        return job
+
+    def cleanup(self):
+        """Drops finished jobs (and their result files) older than the retention period."""
+        cutoff = time.time() - self.retention
+        expired = [
+            job for job in self._jobs.values()
+            if job.finished and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job in expired:
+            del self._jobs[job.id]
+            _remove_result(job)
+
+        # Result files left behind by a previous process or a cancelled render
+        if not os.path.isdir(self.result_dir):
+            return
+        live = {job.result_path for job in self._jobs.values()}
+        with os.scandir(self.result_dir) as it:
+            for entry in it:
+                if entry.path not in live and entry.stat().st_mtime < cutoff:
+                    _silent_remove(entry.path)
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    async def _run(self, job: Job):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started_at = time.time()
+                await self._build(job)
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            _remove_result(job)
+        except Exception as exc:
+            FAILURES.inc(stage="job")
+            log("job_failed", job=job.id, error=repr(exc))
+            job.status = FAILED
+            job.error = str(exc)
+            _remove_result(job)
+        finally:
+            job.finished_at = time.time()
+
+    async def _build(self, job: Job):
+        descriptions = [slide.get("slide_content", {}).get("image_description") for slide in job.slides]
+        job.image_keys = [image_agent.cache_key(d) if d else None for d in descriptions]
+
+        def _image_done(idx, data):
+            if data:
+                job.slide_status[idx] = "image_ready"
+            else:
+                job.slide_status[idx] = "image_failed" if descriptions[idx] else "no_image"
+                job.image_keys[idx] = None
+
+        image_prefetcher.promote(descriptions)
+        images = await image_agent.generate_images(descriptions, on_result=_image_done)
+
+        os.makedirs(self.result_dir, exist_ok=True)
+        job.result_path = os.path.join(self.result_dir, f"{job.id}.pptx")
+        # The whole deck is rendered in one go in the render process pool
+        await render_deck(job.slides, images, job.result_path, theme=job.theme)
+        job.slide_status = ["rendered"] * len(job.slides)
+
+
+def _remove_result(job: Job):
+    if job.result_path:
+        _silent_remove(job.result_path)
+    job.result_path = None
+
+
+def _silent_remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Process-wide job manager used by the API
+job_manager = JobManager()
@@ -0,0 +1,59 @@
+import json
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for a streamed top-level JSON array of objects.
+    Feed it text chunks as they arrive; `feed()` returns the elements whose
+    closing brace has been seen, already decoded. Only the text of the element
+    still being received is buffered, so parsing stays linear in the input.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0          # next character of `_buffer` to scan
+        self._depth = 0        # nesting depth; 1 = inside the top-level array
+        self._in_string = False
+        self._escaped = False
+        self._start = None     # buffer offset of the element being received
+        self.count = 0         # elements decoded so far
+        self.closed = False    # the top-level array has been closed
+
+    def feed(self, chunk: str) -> list:
+        """Adds `chunk` and returns the list of elements completed by it."""
+        self._buffer += chunk
+        elements = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+                if self._depth == 2 and self._start is None:
+                    self._start = i
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 1 and self._start is not None:
+                    elements.append(json.loads(buffer[self._start:i + 1]))
+                    self.count += 1
+                    self._start = None
+                elif self._depth == 0:
+                    self.closed = True
+            i += 1
+
+        # Drop what has been consumed, keeping the partial element (if any)
+        keep_from = self._start if self._start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._start is not None:
+            self._start = 0
+        return elements
@@ -0,0 +1,240 @@
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, from 5 ms to 2 minutes (Gemini image calls can take that long)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Trace id of the request being handled; asyncio tasks inherit it from the request
+trace_id_var = contextvars.ContextVar("trace_id", default=None)
+
+# Structured events are logged at INFO; main.py sets up the handler and LOG_LEVEL
+logger = logging.getLogger(__name__)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def log(event: str, trace_id: str = None, **fields):
+    """One structured log line: `[trace] event key=value ...` (trace id from the context by default)."""
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    trace_id = trace_id or trace_id_var.get() or "-"
+    details = " ".join(f"{key}={value}" for key, value in fields.items())
+    logger.info("%s", f"[{trace_id}] {event} {details}".rstrip())
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values tuple -> state
+        self._lock = threading.Lock()  # observed from worker threads too
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple, **extra) -> dict:
+        labels = dict(zip(self.labelnames, key))
+        labels.update(extra)
+        return labels
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]  # bucket counts, sum, count
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the duration of the block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", self._labels(key, le=_format_value(float(bound))), cumulative
+            yield f"{self.name}_bucket", self._labels(key, le="+Inf"), count
+            yield f"{self.name}_sum", self._labels(key), total
+            yield f"{self.name}_count", self._labels(key), count
+
+
+class Registry:
+    """
+    Metrics of this process in the Prometheus text format. Besides counters and
+    histograms, collectors can export values read at scrape time (cache stats, queues).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """`collector()` returns [(name, kind, documentation, [(labels dict, value), ...]), ...]."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as exc:
+                log("metrics_collector_failed", error=repr(exc))
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware giving every HTTP request a trace id (the client's X-Request-Id,
+    or a new one), returned as X-Trace-Id and visible to everything the request runs.
+    Also records the request duration, body transfer included.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:64] or new_trace_id()
+        token = trace_id_var.set(trace_id)
+        status = "500"
+        started = time.perf_counter()
+
+        async def send_with_trace_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            # Route template, not the raw path, to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=status
+            )
+            trace_id_var.reset(token)
+
+
+# Process-wide registry, served by GET /metrics
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_seconds", "HTTP request duration, response body included", ("method", "route", "status")
+)
+GEMINI_REQUEST_SECONDS = registry.histogram(
+    "gemini_request_seconds", "Duration of one Gemini API attempt", ("model", "outcome")
+)
+GEMINI_QUEUE_SECONDS = registry.histogram(
+    "gemini_queue_wait_seconds", "Time waiting for a scheduler slot", ("model", "priority")
+)
+GEMINI_RETRY_SECONDS = registry.histogram(
+    "gemini_retry_backoff_seconds", "Back-off slept before retrying an overloaded call", ("model",)
+)
+GEMINI_TOKENS = registry.counter("gemini_tokens_total", "Tokens reported by Gemini usage metadata", ("model", "kind"))
+IMAGE_GENERATION_SECONDS = registry.histogram(
+    "image_generation_seconds", "Time to get one slide image, cache and queueing included", ("outcome",)
+)
+IMAGE_BYTES = registry.counter("image_bytes_total", "Bytes of images returned by Gemini")
+RENDER_SLIDE_SECONDS = registry.histogram(
+    "render_slide_seconds", "Time to build one slide, image preparation included", ("category",)
+)
+PPTX_SAVE_SECONDS = registry.histogram("pptx_save_seconds", "Time to serialize a deck to PPTX")
+RENDER_DECK_SECONDS = registry.histogram(
+    "render_deck_seconds", "Deck rendering as seen by the API process, pool dispatch included", ("mode",)
+)
+PPTX_BYTES = registry.counter("pptx_bytes_total", "Bytes of PPTX files written")
+THUMBNAIL_RENDER_SECONDS = registry.histogram("thumbnail_render_seconds", "Time to rasterize one slide thumbnail")
+RESPONSE_TRANSFER_SECONDS = registry.histogram(
+    "response_transfer_seconds", "Time streaming a file to the client", ("endpoint",)
+)
+RESPONSE_BYTES = registry.counter("response_bytes_total", "Bytes of files streamed to clients", ("endpoint",))
+FAILURES = registry.counter("failures_total", "Failures by stage", ("stage",))
@@ -1,13 +1,24 @@
 from pptx import Presentation
-from pptx.util import Inches, Pt
+from pptx.util import Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE
 from io import BytesIO
 from PIL import Image as PILImage
-from typing import Union
 from typing import Union, List
-from pptx.oxml import parse_xml
-from pptx.enum.text import MSO_AUTO_SIZE
+from ai_core.image_prep import fit_image
+from ai_core.schemas import normalize_category
+from ai_core.text_layout import fit_box, TEXT_MIN_FONT_SIZE, TITLE_MIN_FONT_SIZE
+from ai_core.themes import (
+    new_presentation, get_layout, layout_shape, placeholder_text_box, IMAGE_AREA,
+    TITLE_SLIDE, CONTENT_WITH_IMAGE_SLIDE, BULLET_SLIDE, TWO_COLUMN_SLIDE,
+)
+
+# Slides are created from the themed layouts built in `themes`: background,
+# image container and text styles live in the master/layouts, so builders only
+# fill placeholders and place the picture. Font sizes are reduced where the
+# text would overflow its box (see `text_layout`).
+
+
 def create_title_slide(
     prs: Presentation,
     title: str,
@@ -20,153 +31,35 @@ def create_title_slide(
       - Left: title / subtitle / content (stacked, no overlap)
       - Right bottom corner: image in a styled container
     """
-
-    # --- Create blank slide ---
-    slide_layout = prs.slide_layouts[6]
-    slide = prs.slides.add_slide(slide_layout)
-
-    # --- Gradient background ---
-    background = slide.background
-    fill = background.fill
-    try:
-        fill.gradient()
-        grad_stops = fill.gradient_stops
-        grad_stops[0].color.rgb = RGBColor(255, 230, 230)
-        grad_stops[1].color.rgb = RGBColor(255, 255, 255)
-    except Exception:
-        fill.solid()
-        fill.fore_color.rgb = RGBColor(255, 250, 250)
-
-    # --- Geometry setup ---
-    margin = Inches(0.7)
-    padding_between = Inches(0.25)
-
-    slide_w, slide_h = prs.slide_width, prs.slide_height
-
-    # Left column (text)
-    text_col_left = margin
-    text_col_width = slide_w - margin - Inches(4.5) - padding_between  # leave space for image
-
-    # --- Title ---
-    title_box = slide.shapes.add_textbox(text_col_left, Inches(0.9), text_col_width, Inches(2))
-    title_tf = title_box.text_frame
-    title_tf.clear()
-    p = title_tf.paragraphs[0]
-    p.text = title
-    r = p.runs[0]
-    r.font.size = Pt(24)
-    r.font.bold = True
-    r.font.color.rgb = RGBColor(10, 10, 10)
-    r.font.name = "Segoe UI"
-
-    title_tf.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
-    title_bottom = title_box.top + title_box.height + Pt(6)
-
-    # --- Subtitle ---
-    if subtitle:
-        sub_box = slide.shapes.add_textbox(text_col_left, title_bottom, text_col_width, Inches(1))
-        sub_tf = sub_box.text_frame
-        sub_tf.clear()
-        p = sub_tf.paragraphs[0]
-        p.text = subtitle
-        r = p.runs[0]
-        r.font.size = Pt(18)
-        r.font.italic = True
-        r.font.color.rgb = RGBColor(95, 95, 95)
-        r.font.name = "Segoe UI"
-        subtitle_bottom = sub_box.top + sub_box.height + Pt(6)
-    else:
-        subtitle_bottom = title_bottom
-
-    # --- Content ---
-    if content:
-        content_h = slide_h - subtitle_bottom - margin
-        content_box = slide.shapes.add_textbox(text_col_left, subtitle_bottom, text_col_width, content_h)
-        content_tf = content_box.text_frame
-        content_tf.clear()
-        p = content_tf.paragraphs[0]
-        p.text = content
-        r = p.runs[0]
-        r.font.size = Pt(14)
-        r.font.color.rgb = RGBColor(70, 70, 70)
-        r.font.name = "Segoe UI"
-        content_tf.word_wrap = True
-        for para in content_tf.paragraphs:
-            para.space_after = Pt(6)
-
-    # --- Image area (bottom-right corner) ---
-    image_area_width = Inches(4.0)
-    image_area_height = Inches(3.0)
-    image_left = slide_w - image_area_width - margin
-    image_top = slide_h - image_area_height - margin
-
-    # Decorative container
-    container = slide.shapes.add_shape(
-        MSO_SHAPE.ROUNDED_RECTANGLE, image_left, image_top, image_area_width, image_area_height
-    )
-    container.fill.gradient()
-    grad_stops = container.fill.gradient_stops
-    grad_stops[0].color.rgb = RGBColor(245, 245, 255)
-    grad_stops[1].color.rgb = RGBColor(225, 225, 240)
-    container.line.color.rgb = RGBColor(180, 180, 200)
-    try:
-        container.shadow.inherit = False
-        container.shadow.blur_radius = Pt(8)
-        container.shadow.distance = Pt(4)
-    except Exception:
-        pass
-
-    # --- Add image inside container ---
-    if image:
-        try:
-            if isinstance(image, bytes):
-                image_obj = PILImage.open(BytesIO(image))
-            elif isinstance(image, PILImage.Image):
-                image_obj = image
-            else:
-                image_obj = PILImage.open(image)
-
-            orig_w, orig_h = image_obj.size
-            target_w = int(image_area_width * 0.9)
-            scaled_h = int(target_w * (orig_h / orig_w))
-
-            if scaled_h > (image_area_height * 0.9):
-                target_h = int(image_area_height * 0.9)
-                scaled_w = int(target_h * (orig_w / orig_h))
-                target_w, scaled_h = scaled_w, target_h
-
-            img_left = image_left + int((image_area_width - target_w) / 2)
-            img_top = image_top + int((image_area_height - scaled_h) / 2)
-
-            img_stream = BytesIO()
-            if image_obj.mode in ("RGBA", "P"):
-                image_obj = image_obj.convert("RGB")
-            image_obj.save(img_stream, format="PNG")
-            img_stream.seek(0)
-
-            slide.shapes.add_picture(img_stream, img_left, img_top, width=target_w, height=scaled_h)
-
-        except Exception:
-            _add_image_placeholder(slide, image_left, image_top, image_area_width, image_area_height, "Image Error")
-    else:
-        _add_image_placeholder(slide, image_left, image_top, image_area_width, image_area_height)
-
+    slide = prs.slides.add_slide(get_layout(prs, TITLE_SLIDE))
+    _fill_text(slide, 0, title)
+    _fill_text(slide, 1, subtitle)
+    _fill_text(slide, 2, content)
+    _fit_text(slide, 0, [title], TITLE_MIN_FONT_SIZE)
+    _fit_text(slide, 1, [subtitle])
+    _fit_text(slide, 2, [content])
+    _place_image(slide, image)
     return prs
 
 
-def _add_image_placeholder(slide, left, top, width, height, text: str):
-    """Helper: add a placeholder rectangle with text."""
-    placeholder = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
-    placeholder.fill.solid()
-    placeholder.fill.fore_color.rgb = RGBColor(240, 240, 240)
-    placeholder.line.color.rgb = RGBColor(200, 200, 200)
-    tf = placeholder.text_frame
-    tf.text = text
-    tf.paragraphs[0].runs[0].font.size = Pt(14)
-    tf.paragraphs[0].runs[0].font.color.rgb = RGBColor(120, 120, 120)
-
-
-
+def create_content_with_image_slide(
+    prs: Presentation,
+    title: str,
+    content: str = "",
+    image: Union[PILImage.Image, bytes, None] = None
+) -> Presentation:
+    """
+    Add a content slide to `prs`:
+      - Left: title and content paragraph
+      - Right bottom corner: image in a styled container
+    """
+    slide = prs.slides.add_slide(get_layout(prs, CONTENT_WITH_IMAGE_SLIDE))
+    _fill_text(slide, 0, title)
+    _fill_text(slide, 1, content)
+    _fit_text(slide, 0, [title], TITLE_MIN_FONT_SIZE)
+    _fit_text(slide, 1, [content])
+    _place_image(slide, image)
+    return prs
 
 
 def create_bullet_slide(
@@ -177,230 +70,237 @@ def create_bullet_slide(
 ) -> Presentation:
     """
     Add a bullet-point slide to `prs`:
-      - Left: Title and bullet points
+      - Left: Title and bullet points, extended down next to the image when long
       - Right: Image inside a styled container (auto-scaled)
     """
+    slide = prs.slides.add_slide(get_layout(prs, BULLET_SLIDE))
+    _fill_text(slide, 0, title)
+    _fill_paragraphs(slide, 1, bullet_points)
+    _fit_text(slide, 0, [title], TITLE_MIN_FONT_SIZE)
+    area = layout_shape(slide.slide_layout, IMAGE_AREA)
+    _fit_text(slide, 1, bullet_points, grow_to=area.top + area.height if area is not None else None)
+    _place_image(slide, image, fill=0.85)
+    return prs
 
-    # --- Create blank slide ---
-    slide_layout = prs.slide_layouts[6]
-    slide = prs.slides.add_slide(slide_layout)
 
-    # --- Gradient background ---
-    background = slide.background
-    fill = background.fill
-    try:
-        fill.gradient()
-        grad_stops = fill.gradient_stops
-        grad_stops[0].color.rgb = RGBColor(255, 230, 230)
-        grad_stops[1].color.rgb = RGBColor(255, 255, 255)
-    except Exception:
-        fill.solid()
-        fill.fore_color.rgb = RGBColor(255, 250, 250)
-
-    # --- Geometry ---
-    margin = Inches(0.7)
-    padding_between = Inches(0.3)
-    slide_w, slide_h = prs.slide_width, prs.slide_height
-
-    # Right column (image)
-    max_image_col = int(slide_w * 0.42)
-    min_image_col = Inches(3.2)
-    image_col_width = max(min_image_col, max_image_col)
-
-    # Left column (text)
-    text_col_left = margin
-    text_col_width = slide_w - margin - image_col_width - padding_between - margin
-
-    # --- Title ---
-    title_box = slide.shapes.add_textbox(text_col_left, Inches(0.7), text_col_width, Inches(1.5))  ### CHANGED
-    title_tf = title_box.text_frame
-    title_tf.clear()
-    p = title_tf.paragraphs[0]
-    p.text = title
-    r = p.runs[0]
-    r.font.size = Pt(22)
-    r.font.bold = True
-    r.font.color.rgb = RGBColor(10, 10, 10)
-    r.font.name = "Segoe UI"
-
-    # --- Measure title height ---   ### CHANGED
-    title_height = title_box.height
-    bullets_top = title_box.top + title_height + Pt(6)   ### CHANGED
-    bullets_h = (slide_h / 2) - bullets_top              ### CHANGED (limit to half slide)
-
-    # --- Bullet points ---
-    bullets_box = slide.shapes.add_textbox(text_col_left, bullets_top, text_col_width, bullets_h)
-    bullets_tf = bullets_box.text_frame
-    bullets_tf.clear()
-    bullets_tf.word_wrap = True
-
-    for idx, point in enumerate(bullet_points):
-        p = bullets_tf.add_paragraph() if idx > 0 else bullets_tf.paragraphs[0]
-        p.text = point
-        p.level = 0
-        # ✅ enforce bullets
-        p._element.get_or_add_pPr().insert(
-            0,
-            parse_xml("<a:buChar xmlns:a='http://schemas.openxmlformats.org/drawingml/2006/main' char='•'/>")
-        )
-        r = p.runs[0]
-        r.font.size = Pt(16)
-        r.font.color.rgb = RGBColor(60, 60, 60)
-        r.font.name = "Segoe UI"
-        p.space_after = Pt(6)
-        
-        p._element.get_or_add_pPr().set("marL", "342900")   # ~0.3 inch left margin
-        p._element.get_or_add_pPr().set("indent", "-171450")  # hanging indent
-
-    # --- Image area (styled container) ---
-    image_left = slide_w - image_col_width - margin
-    image_area_top = title_box.top + title_height + Inches(0.3)   ### CHANGED (starts below title)
-    image_area_width = image_col_width
-    image_area_height = slide_h - image_area_top - margin         ### CHANGED (fits rest of slide)
-
-    container = slide.shapes.add_shape(
-        MSO_SHAPE.ROUNDED_RECTANGLE, image_left, image_area_top, image_area_width, image_area_height
-    )
-    container.fill.solid()
-    container.fill.fore_color.rgb = RGBColor(250, 250, 250)
-    container.line.color.rgb = RGBColor(200, 200, 200)
-
-    try:
-        container.shadow.inherit = False
-        container.shadow.blur_radius = Pt(6)
-        container.shadow.distance = Pt(4)
-    except Exception:
-        pass
+def create_two_column_slide(
+    prs: Presentation,
+    title: str,
+    left_column: List[str],
+    right_column: List[str],
+    image: Union[PILImage.Image, bytes, None] = None
+) -> Presentation:
+    """
+    Add a two-column slide to `prs`:
+      - Top: Title
+      - Middle: left / right columns of points
+      - Bottom: image strip; without an image the columns take its space
+    """
+    slide = prs.slides.add_slide(get_layout(prs, TWO_COLUMN_SLIDE))
+    _fill_text(slide, 0, title)
+    _fill_paragraphs(slide, 1, left_column)
+    _fill_paragraphs(slide, 2, right_column)
 
+    placed = False
     if image:
         try:
-            if isinstance(image, bytes):
-                image_obj = PILImage.open(BytesIO(image))
-            elif isinstance(image, PILImage.Image):
-                image_obj = image
-            else:
-                image_obj = PILImage.open(image)
-
-            orig_w, orig_h = image_obj.size
-            target_w = int(image_area_width * 0.85)
-            scaled_h = int(target_w * (orig_h / orig_w))
-
-            if scaled_h > (image_area_height * 0.85):
-                target_h = int(image_area_height * 0.85)
-                scaled_w = int(target_h * (orig_w / orig_h))
-                target_w, scaled_h = scaled_w, target_h
+            _place_image(slide, image, placeholder_text=None)
+            placed = True
+        except Exception:
+            pass  # silently fail if image can't be placed
+    if not placed:
+        _extend_columns_over_image_area(slide)
+    _fit_text(slide, 0, [title], TITLE_MIN_FONT_SIZE)
+    _fit_text(slide, 1, left_column)
+    _fit_text(slide, 2, right_column)
+    return prs
 
-            image_left_adj = int(image_left + (image_area_width - target_w) / 2)
-            image_top_adj = int(image_area_top + (image_area_height - scaled_h) / 2)
 
-            img_stream = BytesIO()
-            if image_obj.mode in ("RGBA", "P"):
-                image_obj = image_obj.convert("RGB")
-            image_obj.save(img_stream, format="PNG")
-            img_stream.seek(0)
+def _fill_text(slide, idx: int, text: str):
+    """Helper: set the text of placeholder `idx`, or drop the placeholder when empty."""
+    placeholder = slide.placeholders[idx]
+    if not text:
+        _remove_shape(placeholder)
+        return
+    placeholder.text_frame.paragraphs[0].text = text
 
-            slide.shapes.add_picture(img_stream, image_left_adj, image_top_adj, width=target_w, height=scaled_h)
 
-        except Exception:
-            _add_image_placeholder(slide, image_left, image_area_top, image_area_width, image_area_height, "Image error")
-    else:
-        _add_image_placeholder(slide, image_left, image_area_top, image_area_width, image_area_height, "Image Placeholder")
+def _fill_paragraphs(slide, idx: int, points: List[str]):
+    """Helper: one paragraph per point in placeholder `idx`; its layout decides bullets and style."""
+    placeholder = slide.placeholders[idx]
+    if not points:
+        _remove_shape(placeholder)
+        return
+    tf = placeholder.text_frame
+    for i, point in enumerate(points):
+        p = tf.add_paragraph() if i > 0 else tf.paragraphs[0]
+        p.text = point
 
-    return prs
 
-def create_two_column_slide(
-    prs: Presentation,
-    title: str,
-    left_column: List[str],
-    right_column: List[str],
-    image: Union[PILImage.Image, bytes, None] = None
-) -> Presentation:
-    slide_layout = prs.slide_layouts[6]
-    slide = prs.slides.add_slide(slide_layout)
-    # --- Gradient background ---
-    background = slide.background
-    fill = background.fill
+def _fit_text(slide, idx: int, paragraphs: List[str], min_size: float = TEXT_MIN_FONT_SIZE, grow_to: int = None):
+    """
+    Helper: make `paragraphs` fit placeholder `idx` as measured by `text_layout`. With
+    `grow_to` (EMU) the box is first extended down to that edge; then the font size is
+    reduced as needed, not below `min_size`. Text that fits is left as styled.
+    """
+    paragraphs = [p for p in paragraphs if p]
+    if not paragraphs:
+        return
+    placeholder = slide.placeholders[idx]
+    style = placeholder_text_box(slide.slide_layout.placeholders.get(idx=idx) or placeholder)
+    left, top, width, height = placeholder.left, placeholder.top, placeholder.width, placeholder.height
+    box, size = fit_box(paragraphs, style._replace(left=left, top=top, width=width, height=height), min_size, grow_to)
+    if box.height != height:
+        # Slide placeholders inherit their box from the layout; give this one its own
+        placeholder.left, placeholder.top = left, top
+        placeholder.width, placeholder.height = width, box.height
+    if size != box.size:
+        for paragraph in placeholder.text_frame.paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(size)
+
+
+def _remove_shape(shape):
+    element = shape._element
+    element.getparent().remove(element)
+
+
+def _extend_columns_over_image_area(slide):
+    """Helper: grow the column placeholders of a two-column slide down to the image area's bottom."""
+    area = layout_shape(slide.slide_layout, IMAGE_AREA)
+    if area is None:
+        return
+    bottom = area.top + area.height
+    for placeholder in slide.placeholders:
+        if placeholder.placeholder_format.idx in (1, 2):
+            left, top, width = placeholder.left, placeholder.top, placeholder.width
+            # Slide placeholders inherit their box from the layout; give this one its own
+            placeholder.left, placeholder.top = left, top
+            placeholder.width, placeholder.height = width, bottom - top
+
+
+def _place_image(slide, image, fill: float = 0.9, placeholder_text: str = "Image Placeholder"):
+    """
+    Helper: fit `image` into the layout's image area. Missing or broken images get a
+    placeholder box with `placeholder_text`; pass None to raise / skip instead.
+    """
+    area = layout_shape(slide.slide_layout, IMAGE_AREA)
+    left, top, width, height = area.left, area.top, area.width, area.height
+    if not image:
+        if placeholder_text is not None:
+            _add_image_placeholder(slide, left, top, width, height, placeholder_text)
+        return
     try:
-        fill.gradient()
-        grad_stops = fill.gradient_stops
-        grad_stops[0].color.rgb = RGBColor(255, 230, 230)
-        grad_stops[1].color.rgb = RGBColor(255, 255, 255)
+        _add_fitted_picture(slide, image, left, top, width, height, fill=fill)
     except Exception:
-        fill.solid()
-        fill.fore_color.rgb = RGBColor(255, 250, 250)
+        if placeholder_text is None:
+            raise
+        _add_image_placeholder(slide, left, top, width, height, "Image Error")
+
 
+def _add_fitted_picture(slide, image, left, top, width, height, fill: float):
+    """Helper: add `image` centered in the box, scaled to `fill` of it and resampled to its on-slide size."""
+    if not isinstance(image, (bytes, PILImage.Image)):
+        image = PILImage.open(image)
+    blob, pic_w, pic_h = fit_image(image, width, height, fill=fill)
+    pic_left = int(left + (width - pic_w) / 2)
+    pic_top = int(top + (height - pic_h) / 2)
+    slide.shapes.add_picture(BytesIO(blob), pic_left, pic_top, width=pic_w, height=pic_h)
 
-    # --- Setup dimensions ---
-    margin = Inches(0.7)
-    slide_w, slide_h = prs.slide_width, prs.slide_height
 
-    # Title box
-    title_box = slide.shapes.add_textbox(margin, Inches(0.5), slide_w - 2 * margin, Inches(1.2))
-    title_tf = title_box.text_frame
-    title_tf.text = title
-    title_tf.paragraphs[0].runs[0].font.size = Pt(26)
-    title_tf.paragraphs[0].runs[0].font.bold = True
-    title_tf.paragraphs[0].alignment = 1
+def _add_image_placeholder(slide, left, top, width, height, text: str):
+    """Helper: add a placeholder rectangle with text."""
+    placeholder = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
+    placeholder.fill.solid()
+    placeholder.fill.fore_color.rgb = RGBColor(240, 240, 240)
+    placeholder.line.color.rgb = RGBColor(200, 200, 200)
+    tf = placeholder.text_frame
+    tf.text = text
+    tf.paragraphs[0].runs[0].font.size = Pt(14)
+    tf.paragraphs[0].runs[0].font.color.rgb = RGBColor(120, 120, 120)
 
-    # Content area
-    content_top = title_box.top + title_box.height + Inches(0.2)
-    content_height = slide_h - content_top - margin  
 
-    # Reserve potential image space (max 3 inches)
-    max_image_height = Inches(3)
-    min_text_area = Inches(3)  # minimum height we want for text
+# normalized slide_category -> (builder, content fields passed to it in order, with defaults)
+SLIDE_BUILDERS = {
+    "title slide": (create_title_slide, (("title", ""), ("subtitle", ""), ("content", ""))),
+    "bullet slide": (create_bullet_slide, (("title", ""), ("bullets", []))),
+    "two column slide": (create_two_column_slide, (("title", ""), ("left_column", []), ("right_column", []))),
+    "content with image slide": (create_content_with_image_slide, (("title", ""), ("content", ""))),
+}
 
-    # If text area already small, skip image
-    if content_height <= min_text_area:
-        image = None  
 
-    # Adjust content height depending on whether we keep image
-    if image:
-        content_height = content_height - max_image_height - Inches(0.3)
-
-    # --- Two-column text boxes ---
-    col_width = (slide_w - 2 * margin - Inches(0.4)) / 2
-    left_box = slide.shapes.add_textbox(margin, content_top, col_width, content_height)
-    right_box = slide.shapes.add_textbox(margin + col_width + Inches(0.4), content_top, col_width, content_height)
-
-    for box, points in [(left_box, left_column), (right_box, right_column)]:
-        tf = box.text_frame
-        tf.clear()
-        for idx, point in enumerate(points):
-            p = tf.add_paragraph() if idx > 0 else tf.paragraphs[0]
-            p.text = point
-            p.level = 0
-            p.runs[0].font.size = Pt(16)
-
-    # --- Image placement (only if enough room left) ---
-    if image:
-        remaining_space = slide_h - (content_top + content_height) - margin
-        if remaining_space >= Inches(2):  # only place if >=2 inches free
-            image_area_height = min(remaining_space, max_image_height)
-            image_left = margin
-            image_top = slide_h - image_area_height - margin
-            image_area_width = slide_w - 2 * margin
-
-            # Scale and center image
-            try:
-                if isinstance(image, bytes):
-                    img = PILImage.open(BytesIO(image))
-                elif isinstance(image, PILImage.Image):
-                    img = image
-                else:
-                    img = PILImage.open(image)
-
-                orig_w, orig_h = img.size
-                scale = min(image_area_width / orig_w, image_area_height / orig_h) * 0.9
-                target_w, target_h = int(orig_w * scale), int(orig_h * scale)
-                img_left = int(image_left + (image_area_width - target_w) / 2)
-                img_top = int(image_top + (image_area_height - target_h) / 2)
-
-                stream = BytesIO()
-                img.convert("RGB").save(stream, format="PNG")
-                stream.seek(0)
-                slide.shapes.add_picture(stream, img_left, img_top, width=target_w, height=target_h)
-            except Exception:
-                pass  # silently fail if image can't be placed
+def add_slide(prs: Presentation, slide: dict, image: Union[PILImage.Image, bytes, None] = None) -> Presentation:
+    """
+    Add one slide described by a `Slide`-shaped dict to `prs`, built by the
+    SLIDE_BUILDERS entry of its `slide_category`. Decks are validated before they
+    get here, so an unknown category is an error rather than a skipped slide.
+    """
+    category = normalize_category(slide.get("slide_category", ""))
+    entry = SLIDE_BUILDERS.get(category)
+    if entry is None:
+        raise ValueError(f"Unknown slide category {slide.get('slide_category')!r}")
+    builder, fields = entry
+    content = slide.get("slide_content") or {}
+    builder(prs, *(content.get(field, default) for field, default in fields), image=image)
+    return prs
 
+
+def build_presentation(
+    slides: List[dict],
+    images: List[Union[PILImage.Image, bytes, None]],
+    on_slide=None,
+    theme: str = None
+) -> Presentation:
+    """
+    Build a deck from slide dicts on the given theme (default theme when None).
+    `images` is aligned with `slides`; each entry is released as soon as its
+    slide is placed so decoded images do not pile up.
+    `on_slide(idx)` is called after each slide is added.
+    """
+    prs = new_presentation(theme)
+    for idx, slide in enumerate(slides):
+        image, images[idx] = images[idx], None
+        add_slide(prs, slide, image)
+        del image
+        if on_slide is not None:
+            on_slide(idx)
+    return prs
+
+
+def update_presentation(
+    prs: Presentation,
+    slides: List[dict],
+    images: List[Union[PILImage.Image, bytes, None]],
+    reuse: List[Union[int, None]],
+    on_slide=None
+) -> Presentation:
+    """
+    Turn `prs`, a deck rendered from an earlier version of the slides, into the deck
+    for `slides`. `reuse[i]` is the index of the existing slide that slide i keeps
+    untouched (with its pictures), or None to build it from `slides[i]` and `images[i]`.
+    Existing slides that are not reused are dropped together with their parts.
+    """
+    sldIdLst = prs.slides._sldIdLst  # accessing .slides also numbers the slide parts 1..n
+    old_ids = list(sldIdLst)
+    order = []
+    for idx, slide in enumerate(slides):
+        if reuse[idx] is not None:
+            order.append(old_ids[reuse[idx]])
+        else:
+            image, images[idx] = images[idx], None
+            add_slide(prs, slide, image)  # adds exactly one slide, or raises
+            del image
+            order.append(sldIdLst[-1])
+        if on_slide is not None:
+            on_slide(idx)
+
+    kept = set(order)
+    for sldId in list(sldIdLst):
+        sldIdLst.remove(sldId)
+    for sldId in old_ids:
+        if sldId not in kept:
+            prs.part.drop_rel(sldId.rId)  # unreferenced slide parts are not written out
+    for sldId in order:
+        sldIdLst.append(sldId)
+    prs.part.rename_slide_parts([sldId.rId for sldId in order])
     return prs
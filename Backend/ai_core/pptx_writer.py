@@ -0,0 +1,98 @@
+import functools
+import os
+import tempfile
+import zipfile
+
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+# Decks smaller than this stay in memory; larger ones roll over to a temp file
+PPTX_SPOOL_MAX_MEMORY = int(os.getenv("PPTX_SPOOL_MAX_MEMORY", str(8 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+
+# Parts that are already compressed; deflating them again only burns CPU
+_PRECOMPRESSED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp", "mp3", "mp4", "m4a", "m4v"}
+
+
+class _MediaAwareZipWriter:
+    """Zip writer that deflates XML parts but stores already-compressed media as is."""
+
+    def __init__(self, file):
+        self._zipf = zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED, strict_timestamps=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._zipf.close()
+
+    def write(self, pack_uri, blob: bytes):
+        compress_type = (
+            zipfile.ZIP_STORED if pack_uri.ext.lower() in _PRECOMPRESSED_EXTENSIONS else zipfile.ZIP_DEFLATED
+        )
+        self._zipf.writestr(pack_uri.membername, blob, compress_type=compress_type)
+
+
+@functools.lru_cache(maxsize=None)
+def _package_writer_class():
+    # Defined on first use so importing this module (e.g. for the streaming
+    # helpers below) does not load python-pptx
+    from pptx.opc.serialized import PackageWriter
+
+    class _PackageWriter(PackageWriter):
+        def _write(self):
+            with _MediaAwareZipWriter(self._pkg_file) as phys_writer:
+                self._write_content_types_stream(phys_writer)
+                self._write_pkg_rels(phys_writer)
+                self._write_parts(phys_writer)
+
+    return _PackageWriter
+
+
+def write_presentation(prs, file):
+    """Same as `prs.save(file)`, except media parts are stored without re-deflating."""
+    package = prs.part.package
+    _package_writer_class().write(file, package._rels, tuple(package.iter_parts()))
+
+
+def spool_presentation(prs, max_memory: int = PPTX_SPOOL_MAX_MEMORY):
+    """
+    Serialize `prs` into a SpooledTemporaryFile rewound to the start.
+    Small decks stay in memory, large ones are spilled to disk.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=max_memory, suffix=".pptx")
+    try:
+        write_presentation(prs, output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def file_size(file) -> int:
+    """Size of a seekable file without moving its current position."""
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+def iter_file_chunks(file, chunk_size: int = CHUNK_SIZE, delete_path: str = None):
+    """
+    Yield `file` in chunks and close it once exhausted (or abandoned).
+    `delete_path`, typically the file's own temp path, is removed afterwards.
+    """
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+        if delete_path:
+            try:
+                os.remove(delete_path)
+            except OSError:
+                pass
@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import os
+from collections import OrderedDict
+
+from ai_core.agents import image_agent
+from ai_core.metrics import log
+from ai_core.scheduler import scheduler, Ticket, SPECULATIVE, BULK
+
+# Speculative image generation: once a preview is returned, its images are queued
+# at the lowest scheduler priority, so that by the time the user asks for the deck
+# /generate_ppt finds them in the image cache (or joins the call in flight).
+
+IMAGE_PREFETCH = os.getenv("IMAGE_PREFETCH", "0") == "1"            # default for requests that do not say
+PREFETCH_MAX_IMAGES = int(os.getenv("PREFETCH_MAX_IMAGES", "12"))    # speculative images per session
+PREFETCH_MAX_SESSIONS = int(os.getenv("PREFETCH_MAX_SESSIONS", "64"))  # sessions prefetching at a time
+
+
+def image_descriptions(slides) -> list:
+    """Distinct image descriptions of a (possibly unvalidated) deck, in slide order."""
+    if not isinstance(slides, list):
+        return []
+    descriptions = (
+        (slide.get("slide_content") or {}).get("image_description") if isinstance(slide, dict) else None
+        for slide in slides
+    )
+    return list(dict.fromkeys(d for d in descriptions if isinstance(d, str) and d))
+
+
+class ImagePrefetcher:
+    """
+    Speculative image generations per session. A session's newest preview replaces
+    its previous one: images the new deck no longer uses are abandoned (their
+    Gemini calls stop unless a deck request joined them), the others carry on.
+    """
+
+    def __init__(self, agent=image_agent, max_images: int = PREFETCH_MAX_IMAGES, max_sessions: int = PREFETCH_MAX_SESSIONS):
+        self.agent = agent
+        self.max_images = max_images
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session key -> {description: pending task}, least recently used first
+        self._tickets = {}              # image cache key -> Ticket of its speculative generation
+        self.started = 0
+        self.cancelled = 0
+        self.promoted = 0
+        self.failed = 0
+
+    def prefetch(self, session_key: str, slides):
+        """Starts (or keeps) the speculative images of `slides` for `session_key`."""
+        descriptions = image_descriptions(slides)[: self.max_images]
+        previous = self._sessions.pop(session_key, {})
+        tasks = {}
+        for description in descriptions:
+            task = previous.pop(description, None)
+            if task is None or (task.done() and (task.cancelled() or task.result() is None)):
+                task = asyncio.ensure_future(self._generate(description))
+                task.add_done_callback(functools.partial(self._forget, session_key, description))
+                self.started += 1
+            tasks[description] = task
+        self._cancel(previous)  # superseded by the new deck
+        self._sessions[session_key] = tasks
+        while len(self._sessions) > self.max_sessions:
+            _, oldest = self._sessions.popitem(last=False)
+            self._cancel(oldest)
+        log("image_prefetch", session=session_key, images=len(tasks), superseded=len(previous))
+
+    def cancel(self, session_key: str):
+        """Drops the speculative images of `session_key` (e.g. the session was deleted)."""
+        self._cancel(self._sessions.pop(session_key, {}))
+
+    def promote(self, descriptions):
+        """
+        Moves the speculative generations of `descriptions` to the BULK class: a deck
+        is now waiting on them, so they must not queue behind other speculation.
+        """
+        for description in descriptions:
+            ticket = self._tickets.get(self.agent.cache_key(description)) if description else None
+            if ticket is not None and ticket.priority > BULK:
+                scheduler.promote(ticket, BULK)
+                self.promoted += 1
+
+    async def _generate(self, description: str):
+        key = self.agent.cache_key(description)
+        ticket = self._tickets.setdefault(key, Ticket(SPECULATIVE))
+        try:
+            return await self.agent.agenerate_image_bytes(description, priority=ticket)
+        except Exception as exc:
+            self.failed += 1
+            log("image_prefetch_failed", error=repr(exc))
+            return None
+        finally:
+            if self._tickets.get(key) is ticket:
+                del self._tickets[key]
+
+    def _forget(self, session_key: str, description: str, task):
+        """Drops a finished task (and the bytes it holds; they are in the image cache) from its session."""
+        tasks = self._sessions.get(session_key)
+        if tasks is None or tasks.get(description) is not task:
+            return  # superseded or cancelled with its session
+        del tasks[description]
+        if not tasks:
+            del self._sessions[session_key]
+
+    def _cancel(self, tasks: dict):
+        for description, task in tasks.items():
+            if task.done():
+                continue
+            task.cancel()
+            self.agent.cache.abandon(self.agent.cache_key(description))
+            self.cancelled += 1
+
+    def stats(self) -> dict:
+        pending = sum(not task.done() for tasks in self._sessions.values() for task in tasks.values())
+        return {
+            "sessions": len(self._sessions),
+            "pending": pending,
+            "started": self.started,
+            "cancelled": self.cancelled,
+            "promoted": self.promoted,
+            "failed": self.failed,
+        }
+
+
+# Process-wide prefetcher shared by the preview endpoints
+image_prefetcher = ImagePrefetcher()
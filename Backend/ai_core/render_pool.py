@@ -0,0 +1,163 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from ai_core import themes
+from ai_core.metrics import (
+    log, trace_id_var, RENDER_DECK_SECONDS, RENDER_SLIDE_SECONDS, PPTX_SAVE_SECONDS, PPTX_BYTES, FAILURES,
+)
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on Windows / macOS
+        return os.cpu_count() or 1
+
+
+# Processes used for deck assembly + serialization; 0 renders on a thread instead
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(_available_cores())))
+
+_CATEGORIES = {name.lower() for name in themes.LAYOUT_NAMES}
+
+_executor = None
+_executor_lock = threading.Lock()  # the startup warm-up creates the pool from a thread
+
+
+def get_render_pool():
+    """Process pool shared by all requests, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None and RENDER_WORKERS > 0:
+            # Each worker builds the theme templates once, before its first deck
+            _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS, initializer=themes.preload)
+        return _executor
+
+
+def warm_up_render_pool():
+    """
+    Starts every render worker (each preloads the theme templates) so the first
+    deck does not pay for process start-up; builds the templates here in thread mode.
+    """
+    pool = get_render_pool()
+    if pool is None:
+        themes.preload()
+        return
+    # Submitted together, so the pool starts a process for each instead of reusing the first
+    wait([pool.submit(os.getpid) for _ in range(RENDER_WORKERS)])
+
+
+def render_pool_stats() -> dict:
+    return {
+        "mode": "process" if RENDER_WORKERS > 0 else "thread",
+        "workers": RENDER_WORKERS,
+        "started": _executor is not None,
+    }
+
+
+def shutdown_render_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_deck_file(
+    slides: list,
+    images: list,
+    path: str,
+    theme: str = None,
+    base_path: str = None,
+    reuse: list = None,
+    trace_id: str = None,
+    draft: bool = False,
+) -> dict:
+    """
+    Builds the deck and writes it to `path`. Runs inside a worker process, so it
+    only takes plain slide dicts and encoded image bytes, which pickle cheaply.
+    With `base_path` (a deck rendered from an earlier version) only the slides
+    whose `reuse` entry is None are built; the others are kept from the base.
+    With `draft` the images are placeholders drawn from the image descriptions.
+    Returns the timings, which the API process adds to its metrics (workers have none).
+    """
+    # Imported here so the API process only loads python-pptx / PIL when it renders itself
+    from ai_core.ppt_templ import build_presentation, update_presentation
+    from ai_core.pptx_writer import write_presentation
+
+    if draft:
+        from ai_core.draft_images import draft_images_for
+
+        images = draft_images_for(slides, theme)
+    timings = {"slides": [], "save": 0.0, "bytes": 0}
+    last = time.perf_counter()
+
+    def on_slide(idx):
+        nonlocal last
+        now = time.perf_counter()
+        if reuse is None or reuse[idx] is None:
+            category = str(slides[idx].get("slide_category", "")).lower()
+            # Metric label: known categories only, the value comes from the model
+            timings["slides"].append((category if category in _CATEGORIES else "other", now - last))
+        last = now
+
+    if base_path is not None:
+        from pptx import Presentation
+
+        prs = update_presentation(Presentation(base_path), slides, images, reuse, on_slide=on_slide)
+    else:
+        prs = build_presentation(slides, images, on_slide=on_slide, theme=theme)
+    started = time.perf_counter()
+    with open(path, "wb") as f:
+        write_presentation(prs, f)
+        timings["bytes"] = f.tell()
+    timings["save"] = time.perf_counter() - started
+    log(
+        "render_deck", trace_id=trace_id, slides=len(slides), draft=draft, built=len(timings["slides"]),
+        save_ms=round(timings["save"] * 1000, 1), bytes=timings["bytes"],
+    )
+    return timings
+
+
+async def render_deck(
+    slides: list,
+    images: list,
+    path: str = None,
+    theme: str = None,
+    base_path: str = None,
+    reuse: list = None,
+    draft: bool = False,
+) -> str:
+    """
+    Renders a deck off the event loop, in the process pool when one is configured.
+    `images` must be encoded bytes (or None). Returns the path of the written PPTX;
+    when `path` is not given a temp file is created and the caller must remove it.
+    See `render_deck_file` for incremental rendering from `base_path` and drafts.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".pptx")
+        os.close(fd)
+    pool = get_render_pool()
+    args = (render_deck_file, slides, images, path, theme, base_path, reuse, trace_id_var.get(), draft)
+    mode = "draft" if draft else "incremental" if base_path is not None else "full"
+    try:
+        with RENDER_DECK_SECONDS.time(mode=mode):
+            if pool is None:
+                timings = await asyncio.to_thread(*args)
+            else:
+                timings = await asyncio.get_running_loop().run_in_executor(pool, *args)
+    except BaseException as exc:
+        if not isinstance(exc, asyncio.CancelledError):
+            FAILURES.inc(stage="render")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    for category, seconds in timings["slides"]:
+        RENDER_SLIDE_SECONDS.observe(seconds, category=category)
+    PPTX_SAVE_SECONDS.observe(timings["save"])
+    PPTX_BYTES.inc(timings["bytes"])
+    return path
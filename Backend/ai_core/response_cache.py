@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Defaults, overridable through the environment
+PREVIEW_CACHE_MAX_ENTRIES = int(os.getenv("PREVIEW_CACHE_MAX_ENTRIES", "256"))
+PREVIEW_CACHE_TTL = float(os.getenv("PREVIEW_CACHE_TTL", "600"))
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text or "").split())
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU of LLM responses with a TTL per entry.
+    Identical concurrent requests share one upstream call (single-flight).
+    """
+
+    def __init__(self, max_entries: int = PREVIEW_CACHE_MAX_ENTRIES, ttl: float = PREVIEW_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._waiters = {}  # task -> number of callers awaiting it
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(system_prompt: str, prompt: str, history: list, mode: str = "single") -> str:
+        """Hash of the whitespace-normalized system prompt, prompt and history, and the generation mode."""
+        payload = {
+            "mode": mode,
+            "system": _normalize(system_prompt),
+            "prompt": _normalize(prompt),
+            "history": [
+                [_normalize(msg.get("role")).lower(), _normalize(msg.get("content"))]
+                for msg in history or []
+            ],
+        }
+        encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_create(self, key: str, factory, fresh: bool = False, cacheable=None):
+        """
+        Returns the cached value for `key`, or awaits `factory()` and caches its result
+        when `cacheable(result)` is true. `fresh=True` skips the lookup and coalescing,
+        and replaces the cached entry with the new result.
+        """
+        if not fresh:
+            value = self.get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            task = self._inflight.get(key)
+            if task is not None:
+                self.coalesced += 1
+                return await self._join(task)
+
+        self.misses += 1
+        task = asyncio.ensure_future(self._create(key, factory, cacheable))
+        if not fresh:
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await self._join(task)
+
+    async def _join(self, task):
+        """
+        Awaits a shared task. A cancelled caller does not abort it for the others,
+        but the upstream call is cancelled once its last caller has gone away.
+        """
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    task.cancel()
+
+    async def _create(self, key: str, factory, cacheable):
+        value = await factory()
+        if value is not None and (cacheable is None or cacheable(value)):
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+        }
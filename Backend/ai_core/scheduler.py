@@ -0,0 +1,270 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+
+from ai_core.metrics import GEMINI_REQUEST_SECONDS, GEMINI_QUEUE_SECONDS, GEMINI_RETRY_SECONDS, FAILURES
+
+# Priority classes; lower values are served first
+INTERACTIVE = 0   # user is waiting on the response (previews)
+BULK = 1          # background work (image generation)
+SPECULATIVE = 2   # work the user may never ask for (image prefetch)
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", SPECULATIVE: "speculative"}
+
+# Per-model quota: (requests per minute, max concurrent calls).
+# Override with GEMINI_MODEL_LIMITS='{"<model>": [rpm, concurrency], ...}'
+MODEL_LIMITS = {
+    "gemini-2.5-flash": (60, 8),
+    "gemini-2.0-flash-exp": (30, 4),
+}
+MODEL_LIMITS.update({
+    model: tuple(limits) for model, limits in json.loads(os.getenv("GEMINI_MODEL_LIMITS", "{}")).items()
+})
+DEFAULT_RPM = float(os.getenv("SCHEDULER_DEFAULT_RPM", "30"))
+DEFAULT_CONCURRENCY = int(os.getenv("SCHEDULER_DEFAULT_CONCURRENCY", "4"))
+MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "6"))
+BASE_BACKOFF = float(os.getenv("SCHEDULER_BASE_BACKOFF", "1"))
+MAX_BACKOFF = float(os.getenv("SCHEDULER_MAX_BACKOFF", "30"))
+
+# HTTP codes that mean "quota / capacity exceeded, try again later"
+OVERLOAD_CODES = {429, 500, 502, 503, 504}
+
+
+def is_overload(exc: BaseException) -> bool:
+    """True for errors worth backing off on: genai ServerError / 429 ClientError (both carry `.code`)."""
+    return getattr(exc, "code", None) in OVERLOAD_CODES
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdaptiveLimit:
+    """
+    AIMD concurrency limit: halves on overload, grows by roughly one slot
+    per `limit` successful calls, within [1, max_limit].
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.value = float(max_limit)
+
+    def on_success(self):
+        self.value = min(self.max_limit, self.value + 1 / self.value)
+
+    def on_overload(self):
+        self.value = max(1.0, self.value / 2)
+
+    @property
+    def slots(self) -> int:
+        return max(1, int(self.value))
+
+
+class Ticket:
+    """
+    Priority of the calls made for one piece of work, passed instead of a plain
+    priority class. `GeminiScheduler.promote` raises it, queued calls included.
+    """
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.queued = []  # (lane, future) of calls waiting for a slot
+
+
+class _Lane:
+    """Scheduling state of one model."""
+
+    def __init__(self, rpm: float, concurrency: int, clock):
+        self.bucket = TokenBucket(rate=rpm / 60, capacity=max(1, concurrency), clock=clock)
+        self.limit = AdaptiveLimit(concurrency)
+        self.inflight = 0
+        self.waiters = []   # heap of (priority, seq, future)
+        self.wakeup = None  # pending call_later handle while waiting for a token
+        self.calls = 0
+        self.overloads = 0
+        self.retries = 0
+
+
+class GeminiScheduler:
+    """
+    Central gate for Gemini calls. Every model gets a token bucket (request rate)
+    and an adaptive concurrency limit; queued calls are served by priority class,
+    then FIFO. Overload errors shrink the limit and are retried with jittered
+    exponential back-off that does not hold a slot.
+    """
+
+    def __init__(
+        self,
+        model_limits: dict = None,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_backoff: float = BASE_BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+        retryable=is_overload,
+        clock=time.monotonic,
+    ):
+        self.model_limits = dict(MODEL_LIMITS if model_limits is None else model_limits)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retryable = retryable
+        self._clock = clock
+        self._lanes = {}
+        self._seq = itertools.count()
+
+    def _lane(self, model: str) -> _Lane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            rpm, concurrency = self.model_limits.get(model, (DEFAULT_RPM, DEFAULT_CONCURRENCY))
+            lane = self._lanes[model] = _Lane(rpm, concurrency, self._clock)
+        return lane
+
+    async def call(self, model: str, fn, priority=BULK, max_attempts: int = None):
+        """
+        Runs `await fn()` under `model`'s quota, retrying overload errors.
+        `fn` must create a fresh awaitable on every call. `priority` is a class or a Ticket.
+        """
+        lane = self._lane(model)
+        attempts = max_attempts or self.max_attempts
+        for attempt in range(1, attempts + 1):
+            async with self.slot(model, priority):
+                started = time.perf_counter()
+                try:
+                    result = await fn()
+                except Exception as exc:
+                    overload = self.retryable(exc)
+                    GEMINI_REQUEST_SECONDS.observe(
+                        time.perf_counter() - started, model=model, outcome="overload" if overload else "error"
+                    )
+                    if not overload:
+                        FAILURES.inc(stage="gemini_request")
+                        raise
+                    lane.overloads += 1
+                    lane.limit.on_overload()
+                    if attempt == attempts:
+                        FAILURES.inc(stage="gemini_request")
+                        raise
+                else:
+                    GEMINI_REQUEST_SECONDS.observe(time.perf_counter() - started, model=model, outcome="ok")
+                    lane.limit.on_success()
+                    return result
+            # Back off outside the slot so other callers keep flowing
+            lane.retries += 1
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+            delay = random.uniform(delay / 2, delay)
+            GEMINI_RETRY_SECONDS.observe(delay, model=model)
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority=BULK):
+        """Holds one of `model`'s concurrency slots (and one rate token) for the block."""
+        lane = self._lane(model)
+        ticket = priority if isinstance(priority, Ticket) else None
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.waiters, (ticket.priority if ticket else priority, next(self._seq), future))
+        if ticket is not None:
+            ticket.queued.append((lane, future))
+        queued_at = time.perf_counter()
+        self._dispatch(lane)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(lane)  # granted, but the caller went away
+            raise
+        finally:
+            if ticket is not None:
+                ticket.queued.remove((lane, future))
+                priority = ticket.priority
+        GEMINI_QUEUE_SECONDS.observe(
+            time.perf_counter() - queued_at, model=model, priority=PRIORITY_NAMES.get(priority, str(priority))
+        )
+        lane.calls += 1
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    def promote(self, ticket: Ticket, priority: int):
+        """
+        Raises `ticket` to `priority` (when that is more urgent). Its queued calls are
+        queued again at the new class; the old heap entries are skipped once granted.
+        """
+        if priority >= ticket.priority:
+            return
+        ticket.priority = priority
+        for lane, future in list(ticket.queued):
+            if not future.done():
+                heapq.heappush(lane.waiters, (priority, next(self._seq), future))
+                self._dispatch(lane)
+
+    def _release(self, lane: _Lane):
+        lane.inflight -= 1
+        self._dispatch(lane)
+
+    def _dispatch(self, lane: _Lane):
+        while lane.waiters and lane.inflight < lane.limit.slots:
+            if lane.waiters[0][2].done():  # cancelled while queued
+                heapq.heappop(lane.waiters)
+                continue
+            wait = lane.bucket.try_take()
+            if wait > 0:
+                if lane.wakeup is None:
+                    lane.wakeup = asyncio.get_running_loop().call_later(wait, self._wake, lane)
+                return
+            _, _, future = heapq.heappop(lane.waiters)
+            lane.inflight += 1
+            future.set_result(None)
+
+    def _wake(self, lane: _Lane):
+        lane.wakeup = None
+        self._dispatch(lane)
+
+    def stats(self) -> dict:
+        models = {}
+        for model, lane in self._lanes.items():
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            seen = set()  # promoted calls have an entry per class
+            for priority, _, future in sorted(lane.waiters, key=lambda entry: entry[:2]):
+                if not future.done() and id(future) not in seen:
+                    seen.add(id(future))
+                    name = PRIORITY_NAMES.get(priority, str(priority))
+                    queued[name] = queued.get(name, 0) + 1
+            models[model] = {
+                "queued": queued,
+                "queue_depth": sum(queued.values()),
+                "inflight": lane.inflight,
+                "concurrency_limit": round(lane.limit.value, 2),
+                "max_concurrency": lane.limit.max_limit,
+                "calls": lane.calls,
+                "overloads": lane.overloads,
+                "retries": lane.retries,
+            }
+        return models
+
+
+# Process-wide scheduler shared by GeminiAgent and ImageGenAgent
+scheduler = GeminiScheduler()
@@ -1,5 +1,5 @@
-from typing import List, Union
-from pydantic import BaseModel
+from typing import Annotated, List, Literal, Union
+from pydantic import BaseModel, Field, TypeAdapter
 
 class TitleSlide(BaseModel):
     title: str
@@ -24,6 +24,100 @@ class ContentWithImageSlide(BaseModel):
     image_description: str
 
 class SlidePreview(BaseModel):
+    # Response schema of the structured Gemini calls; use `Slide` / `SLIDES` to validate decks
     slide_no: int
-    slide_category: str   # one of: "title_slide", "bullet_slide", "two_column_slide", "content_with_image"
+    slide_category: str   # one of: "Title Slide", "Bullet Slide", "Two Column Slide", "Content with Image Slide"
     slide_content: Union[TitleSlide, BulletSlide, TwoColumnSlide, ContentWithImageSlide]
+
+
+class SlideOutline(BaseModel):
+    # One entry of the outline call in outline-then-expand generation
+    slide_no: int
+    slide_category: Literal["Title Slide", "Bullet Slide", "Two Column Slide", "Content with Image Slide"]
+    title: str
+    summary: str   # what the slide should cover, one sentence
+
+
+# --- Validation of decks: one model per category, picked by slide_category ---
+
+# Canonical category names, keyed by their normalized spelling
+CATEGORIES = {
+    "title slide": "Title Slide",
+    "bullet slide": "Bullet Slide",
+    "two column slide": "Two Column Slide",
+    "content with image slide": "Content with Image Slide",
+}
+_CANONICAL = frozenset(CATEGORIES.values())
+# Canonical category -> model of its slide_content (schema of the per-slide expansion calls)
+CONTENT_MODELS = {
+    "Title Slide": TitleSlide,
+    "Bullet Slide": BulletSlide,
+    "Two Column Slide": TwoColumnSlide,
+    "Content with Image Slide": ContentWithImageSlide,
+}
+_ALIASES = {"content with image": "content with image slide"}
+
+
+def normalize_category(category) -> str:
+    """'Title Slide', 'title_slide' and 'TITLE SLIDE' all give 'title slide'."""
+    key = " ".join(str(category).replace("_", " ").replace("-", " ").lower().split())
+    return _ALIASES.get(key, key)
+
+
+class TitleSlidePreview(BaseModel):
+    slide_no: int
+    slide_category: Literal["Title Slide"]
+    slide_content: TitleSlide
+
+class BulletSlidePreview(BaseModel):
+    slide_no: int
+    slide_category: Literal["Bullet Slide"]
+    slide_content: BulletSlide
+
+class TwoColumnSlidePreview(BaseModel):
+    slide_no: int
+    slide_category: Literal["Two Column Slide"]
+    slide_content: TwoColumnSlide
+
+class ContentWithImageSlidePreview(BaseModel):
+    slide_no: int
+    slide_category: Literal["Content with Image Slide"]
+    slide_content: ContentWithImageSlide
+
+
+# Tagged union: pydantic goes straight to the model named by slide_category
+Slide = Annotated[
+    Union[TitleSlidePreview, BulletSlidePreview, TwoColumnSlidePreview, ContentWithImageSlidePreview],
+    Field(discriminator="slide_category"),
+]
+
+# Built once at import, so no request pays for building the validators
+SLIDE = TypeAdapter(Slide)
+SLIDES = TypeAdapter(List[Slide])
+OUTLINE = TypeAdapter(List[SlideOutline])
+
+
+def _canonical(slide):
+    """`slide` with a known category spelled canonically (copied only when it was not)."""
+    if isinstance(slide, dict):
+        category = slide.get("slide_category")
+        if isinstance(category, str) and category not in _CANONICAL:
+            canonical = CATEGORIES.get(normalize_category(category))
+            if canonical is not None:
+                return dict(slide, slide_category=canonical)
+    return slide
+
+
+def validate_slide(slide) -> dict:
+    """One slide as a plain dict with its canonical category; raises pydantic.ValidationError."""
+    return SLIDE.dump_python(SLIDE.validate_python(_canonical(slide)))
+
+
+def validate_slides(slides) -> list:
+    """
+    `slides` as plain dicts with canonical categories; raises pydantic.ValidationError
+    listing every malformed slide.
+    """
+    if isinstance(slides, list):
+        slides = [_canonical(slide) for slide in slides]
+    return SLIDES.dump_python(SLIDES.validate_python(slides))
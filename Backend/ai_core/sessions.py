@@ -0,0 +1,232 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+# Defaults, overridable through the environment
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "4000"))       # history tokens sent per turn
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024)))  # deck + instructions kept per session
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))            # seconds before an idle session is dropped
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))      # least recently used beyond this are dropped
+SESSION_SUMMARY_CHARS = 1500   # cap of the summary of dropped instructions
+SUMMARY_CHARS_PER_TURN = 160   # each dropped instruction is cut to this in the summary
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); enough to budget prompts and compare them."""
+    return (len(text) + 3) // 4
+
+
+def _history_tokens(history: list) -> int:
+    return sum(estimate_tokens(f"{msg['role'].capitalize()}: {msg['content']}\n") for msg in history)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def deck_markdown(deck: list) -> str:
+    """
+    The deck as the chat UI renders it (Frontend/app.py `slides_markdown`). Clients
+    without sessions resend this transcript with every prompt, so it is what the
+    "before" side of the prompt token comparison counts.
+    """
+    text = ""
+    for slide in deck:
+        content = slide.get("slide_content") or {}
+        category = slide.get("slide_category")
+        text += f"---\n### Slide {slide.get('slide_no')}\n**Category:** {category}\n"
+        text += f"\n\n**Title:** {content.get('title', 'N/A')}"
+        if category == "Title Slide":
+            text += f"\n\n**Subtitle:** {content.get('subtitle', 'N/A')}\n\n**content:** {content.get('content', 'N/A')}"
+        for field, label in (("bullets", "Bullets"), ("left_column", "Left Column"), ("right_column", "Right Column")):
+            if content.get(field):
+                text += f"\n\n**{label}:**\n" + "\n".join(f"- {item}" for item in content[field])
+        if category == "Content with Image Slide" and content.get("content"):
+            text += f"\n\n**Content:**\n{content['content']}"
+        text += f"\n\n**Image Description:** {content.get('image_description', 'N/A')}"
+    return text
+
+
+def _check_size(deck: list, max_bytes: int) -> int:
+    deck_size = len(json.dumps(deck, ensure_ascii=False, separators=(",", ":")))
+    if deck_size > max_bytes:
+        raise SessionTooLarge(f"Deck of {deck_size} bytes exceeds the session limit of {max_bytes}")
+    return deck_size
+
+
+class SessionTooLarge(Exception):
+    """Raised when a deck alone does not fit in SESSION_MAX_BYTES."""
+
+
+class Session:
+    """
+    One conversation. The structured deck is the canonical state: follow-ups are sent
+    with the current deck plus the most recent instructions that fit the token budget;
+    older instructions are folded into a short summary.
+    """
+
+    def __init__(self, deck: list = None):
+        self.id = uuid.uuid4().hex
+        self.deck = deck          # latest list of SlidePreview dicts (a client may seed it)
+        self.instructions = []    # user prompts not yet folded into `summary`
+        self.summary = ""
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()  # turns of one session run one at a time
+        # Size of the transcript a client would have resent (prompts + every deck as markdown), in tokens
+        self.transcript_tokens = _history_tokens([{"role": "assistant", "content": deck_markdown(deck)}]) if deck else 0
+        self.turns = []           # per-turn prompt sizes: {"before": ..., "after": ...}
+
+    def history(self, prompt: str, budget: int = SESSION_TOKEN_BUDGET) -> list:
+        """
+        Compact history for the next turn: summary of old instructions, the recent
+        ones that fit in `budget` tokens (newest first), then the current deck.
+        """
+        deck_msg = None
+        if self.deck is not None:
+            deck_json = json.dumps(self.deck, ensure_ascii=False, separators=(",", ":"))
+            deck_msg = {"role": "assistant", "content": f"Current slide deck (JSON):\n{deck_json}"}
+
+        remaining = budget - estimate_tokens(prompt) - (_history_tokens([deck_msg]) if deck_msg else 0)
+        kept = []
+        dropped = []
+        for instruction in reversed(self.instructions):
+            msg = {"role": "user", "content": instruction}
+            cost = _history_tokens([msg])
+            if not dropped and cost <= remaining:
+                kept.append(msg)
+                remaining -= cost
+            else:
+                dropped.append(instruction)
+
+        history = []
+        summary = self._summarize(reversed(dropped), self.summary)
+        if summary and estimate_tokens(summary) <= remaining:
+            history.append({"role": "user", "content": f"Earlier requests (summary): {summary}"})
+        history.extend(reversed(kept))
+        if deck_msg:
+            history.append(deck_msg)
+        return history
+
+    def record(self, prompt: str, deck: list, prompt_tokens: dict, max_bytes: int = SESSION_MAX_BYTES):
+        """Stores the outcome of a turn, folding old instructions into the summary to stay under `max_bytes`."""
+        deck_size = _check_size(deck, max_bytes)
+        self.deck = deck
+        self.instructions.append(prompt)
+        self.transcript_tokens += _history_tokens([
+            {"role": "user", "content": prompt}, {"role": "assistant", "content": deck_markdown(deck)},
+        ])
+        self.turns.append(prompt_tokens)
+
+        while self.instructions and deck_size + sum(len(i) for i in self.instructions) + len(self.summary) > max_bytes:
+            self.summary = self._summarize([self.instructions.pop(0)], self.summary)
+
+    @staticmethod
+    def _summarize(instructions, summary: str = "") -> str:
+        """Extractive summary: clipped instructions appended in order, keeping the newest within the cap."""
+        parts = [summary] if summary else []
+        parts.extend(_clip(i, SUMMARY_CHARS_PER_TURN) for i in instructions)
+        text = " | ".join(parts)
+        return text if len(text) <= SESSION_SUMMARY_CHARS else "..." + text[-(SESSION_SUMMARY_CHARS - 3):]
+
+    def memory_bytes(self) -> int:
+        deck_size = len(json.dumps(self.deck, separators=(",", ":"))) if self.deck is not None else 0
+        return deck_size + sum(len(i) for i in self.instructions) + len(self.summary)
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.id,
+            "deck": self.deck,
+            "turns": len(self.turns),
+            "instructions_kept": len(self.instructions),
+            "summary": self.summary,
+            "memory_bytes": self.memory_bytes(),
+            "prompt_tokens": self.turns,
+        }
+
+
+class SessionStore:
+    """
+    In-memory sessions keyed by id. Idle sessions expire after `idle_ttl` and the
+    least recently used ones are dropped beyond `max_sessions`.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX_SESSIONS, idle_ttl: float = SESSION_IDLE_TTL):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()  # id -> Session, least recently used first
+        self.evicted = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def create(self, deck: list = None) -> Session:
+        """New session, optionally seeded with `deck` (e.g. after the previous one expired)."""
+        if deck is not None:
+            _check_size(deck, SESSION_MAX_BYTES)
+        self.evict_idle()
+        session = Session(deck)
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+        return session
+
+    def get(self, session_id: str):
+        self.evict_idle()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used > cutoff or session.lock.locked():
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    async def run_turn(self, session: Session, prompt: str, generate):
+        """
+        Runs one follow-up: `generate(prompt, history)` gets the compact history and
+        returns the new deck (a list) or an error value, which leaves the session as is.
+        Returns (result, prompt_tokens) where prompt_tokens compares the naive
+        transcript ("before") with what was actually sent ("after").
+        """
+        async with session.lock:
+            history = session.history(prompt)
+            # A client without sessions sends the transcript with the new prompt appended, plus the prompt
+            prompt_tokens = {
+                "before": session.transcript_tokens + _history_tokens([{"role": "user", "content": prompt}])
+                + estimate_tokens(prompt),
+                "after": _history_tokens(history) + estimate_tokens(prompt),
+            }
+            result = await generate(prompt, history)
+            if isinstance(result, list):
+                session.record(prompt, result, prompt_tokens)
+                self.tokens_before += prompt_tokens["before"]
+                self.tokens_after += prompt_tokens["after"]
+            session.last_used = time.monotonic()
+            return result, prompt_tokens
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "evicted": self.evicted,
+            "memory_bytes": sum(s.memory_bytes() for s in self._sessions.values()),
+            "prompt_tokens_before": self.tokens_before,
+            "prompt_tokens_after": self.tokens_after,
+        }
+
+
+# Process-wide session store
+session_store = SessionStore()
@@ -0,0 +1,251 @@
+import functools
+import os
+import unicodedata
+
+from ai_core import themes
+from ai_core.themes import EMU_PER_PT, BULLET_SLIDE, IMAGE_AREA
+
+# Text is measured in-process from per-font glyph width tables instead of being
+# left to PowerPoint's autofit, so builders can pick font sizes (and split long
+# bullet lists) that fit their boxes when the deck is built.
+
+TEXT_MIN_FONT_SIZE = float(os.getenv("TEXT_MIN_FONT_SIZE", "11"))    # pt, body text is not shrunk below this
+TITLE_MIN_FONT_SIZE = float(os.getenv("TITLE_MIN_FONT_SIZE", "16"))  # pt, same for titles
+SPLIT_LONG_BULLETS = os.getenv("SPLIT_LONG_BULLETS", "1") == "1"     # continue bullet lists on extra slides
+# Where TrueType files are looked up to measure the theme fonts exactly (os.pathsep-separated)
+FONT_DIRS = [d for d in os.getenv("FONT_DIRS", "").split(os.pathsep) if d] + [
+    "/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/Library/Fonts"), "/Library/Fonts", "C:\\Windows\\Fonts",
+]
+
+LINE_SPACING = 1.2            # line height / font size for single spacing
+INSET_X = 0.1 * 72            # pt, default left/right inset of a text box
+INSET_Y = 0.05 * 72           # pt, default top/bottom inset
+BULLET_INDENT = 342900 / EMU_PER_PT  # pt, marL of the bulleted list style in themes
+
+_TABLE_SIZE = 0x250  # Basic Latin through Latin Extended-B
+
+# Helvetica AFM advance widths (1/1000 em) of ' ' through '~'; close to Arial /
+# Segoe UI and used when the theme font file is not installed
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def font_file(font: str, bold: bool = False):
+    """TrueType file of `font` in FONT_DIRS (e.g. segoeui.ttf / segoeuib.ttf), or None."""
+    if not font:
+        return None
+    stem = font.lower().replace(" ", "")
+    names = [f"{stem}{suffix}.ttf" for suffix in (("b", "bd", "-bold") if bold else ("", "-regular"))]
+    for directory in FONT_DIRS:
+        if not os.path.isdir(directory):
+            continue
+        for root, _, files in os.walk(directory):
+            lowered = {f.lower(): f for f in files}
+            for name in names:
+                if name in lowered:
+                    return os.path.join(root, lowered[name])
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def glyph_widths(font: str = None, bold: bool = False) -> tuple:
+    """
+    Advance widths in 1/1000 em of code points 0.._TABLE_SIZE-1, built once per
+    process and font: measured from the font file when one is found, otherwise
+    the Helvetica metrics (Latin letters outside ASCII get their base letter's width).
+    """
+    path = font_file(font, bold)
+    if path is not None:
+        try:
+            from PIL import ImageFont
+
+            face = ImageFont.truetype(path, 1000)
+            return tuple(face.getlength(chr(cp)) if cp >= 32 else 0.0 for cp in range(_TABLE_SIZE))
+        except (OSError, ImportError):
+            pass
+    ascii_widths = _HELVETICA_BOLD if bold else _HELVETICA
+    table = []
+    for cp in range(_TABLE_SIZE):
+        if cp < 32:
+            table.append(0.0)
+        elif cp < 127:
+            table.append(float(ascii_widths[cp - 32]))
+        else:
+            base = unicodedata.normalize("NFD", chr(cp))[0]
+            table.append(float(ascii_widths[ord(base) - 32]) if 32 <= ord(base) < 127 else 556.0)
+    return tuple(table)
+
+
+def _char_width(table: tuple, char: str) -> float:
+    cp = ord(char)
+    if cp < _TABLE_SIZE:
+        return table[cp]
+    if unicodedata.combining(char):
+        return 0.0
+    return 1000.0 if unicodedata.east_asian_width(char) in ("W", "F") else 556.0
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_width(word: str, font: str, bold: bool) -> float:
+    table = glyph_widths(font, bold)
+    return sum(_char_width(table, char) for char in word)
+
+
+def text_width(text: str, size: float, font: str = None, bold: bool = False) -> float:
+    """Width in points of `text` on one line at `size` pt."""
+    return _word_width(text, font, bold) * size / 1000
+
+
+def line_count(text: str, width: float, size: float, font: str = None, bold: bool = False) -> int:
+    """Lines `text` wraps to in `width` points at `size` pt (greedy word wrap, as PowerPoint)."""
+    if width <= 0:
+        return max(1, len(text))
+    limit = width * 1000 / size  # line width in 1/1000 em
+    space = _word_width(" ", font, bold)
+    lines, used = 1, None
+    for word in text.split():
+        w = _word_width(word, font, bold)
+        if used is None:
+            used = w
+        elif used + space + w <= limit:
+            used += space + w
+            continue
+        else:
+            lines += 1
+            used = w
+        if w > limit:  # words longer than a line are broken between characters
+            extra = int(w // limit)
+            lines += extra
+            used = w - extra * limit
+    return lines
+
+
+def wrap_lines(text: str, width: float, size: float, font: str = None, bold: bool = False) -> list:
+    """The lines of `text` wrapped as `line_count` counts them (for drawing; words too long are kept whole)."""
+    limit = width * 1000 / size
+    space = _word_width(" ", font, bold)
+    lines, current, used = [], [], 0.0
+    for word in text.split():
+        w = _word_width(word, font, bold)
+        if current and used + space + w > limit:
+            lines.append(" ".join(current))
+            current, used = [], 0.0
+        used += (space if current else 0) + w
+        current.append(word)
+    if current or not lines:
+        lines.append(" ".join(current))
+    return lines
+
+
+def text_height(paragraphs: list, box: themes.TextBox, size: float) -> float:
+    """Height in points of `paragraphs` laid out in `box` at `size` pt, insets included."""
+    width = box.width / EMU_PER_PT - 2 * INSET_X - (BULLET_INDENT if box.bulleted else 0)
+    lines = sum(line_count(p, width, size, box.font, box.bold) for p in paragraphs)
+    return lines * size * LINE_SPACING + box.space_after * max(0, len(paragraphs) - 1) + 2 * INSET_Y
+
+
+def fits(paragraphs: list, box: themes.TextBox, size: float = None) -> bool:
+    return text_height(paragraphs, box, size or box.size) <= box.height / EMU_PER_PT
+
+
+def fit_font_size(paragraphs: list, box: themes.TextBox, min_size: float = TEXT_MIN_FONT_SIZE):
+    """
+    Largest size, from the box's own size down to `min_size` in 1pt steps, at which
+    `paragraphs` fit in `box`. Returns (size, fitted); at `min_size` fitted may be False.
+    """
+    size = box.size
+    while size > min_size:
+        if fits(paragraphs, box, size):
+            return size, True
+        size = max(min_size, size - 1)
+    return min_size, fits(paragraphs, box, min_size)
+
+
+def fit_box(paragraphs: list, box: themes.TextBox, min_size: float = TEXT_MIN_FONT_SIZE, grow_to: int = None):
+    """
+    (box, size) used to lay out `paragraphs`: the box itself at its own size when they
+    fit; otherwise the box extended down to `grow_to` (EMU, when given) if that is
+    enough, else the font size reduced as far as needed, not below `min_size`.
+    """
+    if fits(paragraphs, box):
+        return box, box.size
+    if grow_to is not None and grow_to > box.top + box.height:
+        box = box._replace(height=grow_to - box.top)
+        if fits(paragraphs, box):
+            return box, box.size
+    return box, fit_font_size(paragraphs, box, min_size)[0]
+
+
+def split_paragraphs(paragraphs: list, box: themes.TextBox, size: float = None) -> list:
+    """
+    Groups of consecutive `paragraphs` that each fit in `box` at `size` pt (the box's
+    own size by default). A paragraph too tall on its own gets a group of its own.
+    """
+    groups, current = [], []
+    for paragraph in paragraphs:
+        if current and not fits(current + [paragraph], box, size):
+            groups.append(current)
+            current = []
+        current.append(paragraph)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def bullet_box(box: themes.TextBox, image_area) -> themes.TextBox:
+    """Bullets box grown down to the bottom of the image column next to it."""
+    if image_area is None:
+        return box
+    bottom = image_area[1] + image_area[3]
+    return box._replace(height=max(box.height, bottom - box.top))
+
+
+def paginate_slides(slides: list, theme: str = None) -> list:
+    """
+    Splits bullet slides whose bullets do not fit even at TEXT_MIN_FONT_SIZE into
+    continuation slides ("<title> (cont.)", same image description) that fit at the
+    layout's own size. Slides are renumbered when any is split; otherwise `slides`
+    is returned as is. Idempotent, so decks can go through it more than once.
+    """
+    if not SPLIT_LONG_BULLETS:
+        return slides
+    geometry = themes.layout_geometry(theme or themes.DEFAULT_THEME, BULLET_SLIDE)
+    if 1 not in geometry:
+        return slides
+    box = bullet_box(geometry[1], geometry.get(IMAGE_AREA))
+
+    result, split = [], False
+    for slide in slides:
+        content = slide.get("slide_content") or {}
+        bullets = content.get("bullets") or []
+        if (
+            str(slide.get("slide_category", "")).lower() != BULLET_SLIDE.lower()
+            or fits(bullets, box, TEXT_MIN_FONT_SIZE)
+        ):
+            result.append(slide)
+            continue
+        split = True
+        for page, group in enumerate(split_paragraphs(bullets, box)):
+            title = content.get("title", "")
+            if page:
+                title = f"{title} (cont.)" if title else "(cont.)"
+            result.append(dict(slide, slide_content=dict(content, title=title, bullets=group)))
+    if not split:
+        return slides
+    return [dict(slide, slide_no=idx + 1) for idx, slide in enumerate(result)]
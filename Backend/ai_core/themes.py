@@ -0,0 +1,357 @@
+import functools
+import os
+from collections import namedtuple
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+# python-pptx is imported where templates are built or opened, so listing and
+# validating themes in the API process does not load it
+if TYPE_CHECKING:
+    from pptx.presentation import Presentation
+
+# Branded templates dropped here as <name>.pptx are picked up as extra themes.
+# They must contain layouts named after the slide categories (see LAYOUT_NAMES),
+# with the placeholder idx values used below and an "Image Area" shape.
+THEME_DIR = os.getenv("THEME_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "themes"))
+DEFAULT_THEME = os.getenv("DEFAULT_THEME", "blush")
+
+TITLE_SLIDE = "Title Slide"
+CONTENT_WITH_IMAGE_SLIDE = "Content with Image Slide"
+BULLET_SLIDE = "Bullet Slide"
+TWO_COLUMN_SLIDE = "Two Column Slide"
+LAYOUT_NAMES = (TITLE_SLIDE, CONTENT_WITH_IMAGE_SLIDE, BULLET_SLIDE, TWO_COLUMN_SLIDE)
+
+# Name of the layout shape that marks where the slide image goes
+IMAGE_AREA = "Image Area"
+
+# Size of the built-in templates (python-pptx default, 10 x 7.5 in) and unit conversions
+DEFAULT_SLIDE_SIZE = (9144000, 6858000)
+EMU_PER_INCH = 914400
+EMU_PER_PT = 12700
+
+# Box (EMU) and level-1 text style of a layout placeholder, as used for text measurement
+# and thumbnails (`color` is an RRGGBB string, or None when inherited)
+TextBox = namedtuple("TextBox", "left top width height size bold font bulleted space_after color", defaults=(None,))
+
+# Colors are RRGGBB hex strings
+THEMES = {
+    "blush": {
+        "font": "Segoe UI",
+        "background": ("FFE6E6", "FFFFFF"),
+        "container": ("F5F5FF", "E1E1F0"),
+        "container_line": "B4B4C8",
+        "title": "0A0A0A",
+        "subtitle": "5F5F5F",
+        "body": "464646",
+        "bullets": "3C3C3C",
+    },
+    "ocean": {
+        "font": "Segoe UI",
+        "background": ("DDEFFB", "FFFFFF"),
+        "container": ("F4FAFF", "D6E8F5"),
+        "container_line": "9CC3DE",
+        "title": "0B2A40",
+        "subtitle": "35607F",
+        "body": "2F4A5E",
+        "bullets": "2F4A5E",
+    },
+    "slate": {
+        "font": "Segoe UI",
+        "background": ("2B3440", "161B22"),
+        "container": ("3A4552", "2A323C"),
+        "container_line": "5A6675",
+        "title": "F5F7FA",
+        "subtitle": "B8C2CC",
+        "body": "DCE2E8",
+        "bullets": "DCE2E8",
+    },
+}
+
+
+class UnknownTheme(ValueError):
+    """Raised when a requested theme is neither built in nor in THEME_DIR."""
+
+
+def available_themes() -> list:
+    names = set(THEMES)
+    if os.path.isdir(THEME_DIR):
+        names.update(os.path.splitext(f)[0] for f in os.listdir(THEME_DIR) if f.endswith(".pptx"))
+    return sorted(names)
+
+
+@functools.lru_cache(maxsize=None)
+def template_bytes(theme: str) -> bytes:
+    """Serialized template for `theme`, loaded or built once per process."""
+    path = os.path.join(THEME_DIR, f"{theme}.pptx")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    if theme not in THEMES:
+        raise UnknownTheme(theme)
+    return _build_template(THEMES[theme])
+
+
+def new_presentation(theme: str = None) -> "Presentation":
+    """Empty deck whose master and layouts carry the theme's decoration and text styles."""
+    from pptx import Presentation
+
+    return Presentation(BytesIO(template_bytes(theme or DEFAULT_THEME)))
+
+
+def preload():
+    """Build every theme template up front (startup / render worker initializer)."""
+    for theme in available_themes():
+        template_bytes(theme)
+
+
+def get_layout(prs: "Presentation", name: str):
+    layout = prs.slide_layouts.get_by_name(name)
+    if layout is None:
+        raise ValueError(f"Presentation has no '{name}' layout; create it with themes.new_presentation()")
+    return layout
+
+
+def layout_shape(layout, name: str):
+    """Layout shape (e.g. the image area) by name, or None."""
+    for shape in layout.shapes:
+        if shape.name == name:
+            return shape
+    return None
+
+
+def image_area_size(theme: str, layout_name: str):
+    """(width, height) in EMU of the image area of `layout_name` in `theme`."""
+    _, _, width, height = layout_geometry(theme, layout_name)[IMAGE_AREA]
+    return width, height
+
+
+@functools.lru_cache(maxsize=None)
+def layout_geometry(theme: str, layout_name: str) -> dict:
+    """
+    Boxes of a layout: {IMAGE_AREA: (left, top, width, height), idx: TextBox, ...}.
+    Built-in themes are computed from the layout specs, without loading python-pptx;
+    branded templates are read from their file.
+    """
+    if not os.path.exists(os.path.join(THEME_DIR, f"{theme}.pptx")) and theme in THEMES:
+        font = THEMES[theme]["font"]
+        geometry = {}
+        for kind, idx, _, box, style in _layout_specs(*DEFAULT_SLIDE_SIZE)[layout_name]:
+            if style is None:
+                geometry[IMAGE_AREA] = tuple(int(v) for v in box)
+            else:
+                size, bold, _, color_key, bulleted, space_after = style
+                geometry[idx] = TextBox(
+                    *(int(v) for v in box), size, bold, font, bulleted, space_after, THEMES[theme][color_key]
+                )
+        return geometry
+
+    layout = get_layout(new_presentation(theme), layout_name)
+    area = layout_shape(layout, IMAGE_AREA)
+    geometry = {IMAGE_AREA: (area.left, area.top, area.width, area.height)}
+    for placeholder in layout.placeholders:
+        geometry[placeholder.placeholder_format.idx] = placeholder_text_box(placeholder)
+    return geometry
+
+
+def placeholder_text_box(placeholder) -> TextBox:
+    """
+    TextBox of a placeholder from its level-1 list style (the themed layouts set
+    one); text styles inherited from a branded master fall back to 18pt regular.
+    """
+    from pptx.oxml.ns import qn
+
+    size, bold, font, bulleted, space_after, color = 18, False, None, False, 0, None
+    level = placeholder._element.find(f"{qn('p:txBody')}/{qn('a:lstStyle')}/{qn('a:lvl1pPr')}")
+    if level is not None:
+        run = level.find(qn("a:defRPr"))
+        if run is not None:
+            size = int(run.get("sz", "1800")) / 100
+            bold = run.get("b") in ("1", "true")
+            latin = run.find(qn("a:latin"))
+            font = latin.get("typeface") if latin is not None else None
+            rgb = run.find(f"{qn('a:solidFill')}/{qn('a:srgbClr')}")
+            color = rgb.get("val") if rgb is not None else None
+        bulleted = level.find(qn("a:buChar")) is not None or level.find(qn("a:buAutoNum")) is not None
+        points = level.find(f"{qn('a:spcAft')}/{qn('a:spcPts')}")
+        if points is not None:
+            space_after = int(points.get("val")) / 100
+    return TextBox(
+        placeholder.left, placeholder.top, placeholder.width, placeholder.height,
+        size, bold, font, bulleted, space_after, color,
+    )
+
+
+# --- Template construction ---
+
+def _layout_specs(slide_w: int, slide_h: int) -> dict:
+    """
+    Geometry and text styles of every layout, as (kind, idx, name, box, style) tuples.
+    `style` is (size_pt, bold, italic, color_key, bulleted, space_after_pt) for placeholders.
+    """
+    def Inches(value):
+        return int(value * EMU_PER_INCH)
+
+    def Pt(value):
+        return int(value * EMU_PER_PT)
+
+    margin = Inches(0.7)
+
+    # Title / content with image: text on the left, image container bottom-right
+    title_col_w = slide_w - margin - Inches(4.5) - Inches(0.25)
+    title_box = (margin, Inches(0.9), title_col_w, Inches(2))
+    title_bottom = title_box[1] + title_box[3] + Pt(6)
+    subtitle_box = (margin, title_bottom, title_col_w, Inches(1))
+    subtitle_bottom = subtitle_box[1] + subtitle_box[3] + Pt(6)
+    corner_image = (slide_w - Inches(4.0) - margin, slide_h - Inches(3.0) - margin, Inches(4.0), Inches(3.0))
+
+    # Bullets: text column on the left, image column on the right below the title
+    image_col_w = max(Inches(3.2), int(slide_w * 0.42))
+    bullet_col_w = slide_w - margin - image_col_w - Inches(0.3) - margin
+    bullet_title = (margin, Inches(0.7), bullet_col_w, Inches(1.5))
+    bullets_top = bullet_title[1] + bullet_title[3] + Pt(6)
+    bullet_image_top = bullet_title[1] + bullet_title[3] + Inches(0.3)
+
+    # Two columns: full-width title, columns, image strip along the bottom
+    two_col_title = (margin, Inches(0.5), slide_w - 2 * margin, Inches(1.2))
+    columns_top = two_col_title[1] + two_col_title[3] + Inches(0.2)
+    column_w = int((slide_w - 2 * margin - Inches(0.4)) / 2)
+    columns_h = slide_h - columns_top - margin - Inches(3) - Inches(0.3)
+    strip_h = min(slide_h - (columns_top + columns_h) - margin, Inches(3))
+
+    return {
+        TITLE_SLIDE: [
+            ("title", 0, "Title", title_box, (24, True, False, "title", False, 0)),
+            ("body", 1, "Subtitle", subtitle_box, (18, False, True, "subtitle", False, 0)),
+            ("body", 2, "Content", (margin, subtitle_bottom, title_col_w, slide_h - subtitle_bottom - margin),
+             (14, False, False, "body", False, 6)),
+            ("container", None, IMAGE_AREA, corner_image, None),
+        ],
+        CONTENT_WITH_IMAGE_SLIDE: [
+            ("title", 0, "Title", title_box, (24, True, False, "title", False, 0)),
+            ("body", 1, "Content", (margin, title_bottom, title_col_w, slide_h - title_bottom - margin),
+             (14, False, False, "body", False, 6)),
+            ("container", None, IMAGE_AREA, corner_image, None),
+        ],
+        BULLET_SLIDE: [
+            ("title", 0, "Title", bullet_title, (22, True, False, "title", False, 0)),
+            ("body", 1, "Bullets", (margin, bullets_top, bullet_col_w, int(slide_h / 2) - bullets_top),
+             (16, False, False, "bullets", True, 6)),
+            ("container", None, IMAGE_AREA,
+             (slide_w - image_col_w - margin, bullet_image_top, image_col_w, slide_h - bullet_image_top - margin), None),
+        ],
+        TWO_COLUMN_SLIDE: [
+            ("title", 0, "Title", two_col_title, (26, True, False, "title", False, 0)),
+            ("body", 1, "Left Column", (margin, columns_top, column_w, columns_h), (16, False, False, "body", False, 0)),
+            ("body", 2, "Right Column", (margin + column_w + Inches(0.4), columns_top, column_w, columns_h),
+             (16, False, False, "body", False, 0)),
+            ("area", None, IMAGE_AREA, (margin, slide_h - strip_h - margin, slide_w - 2 * margin, strip_h), None),
+        ],
+    }
+
+
+_NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+)
+
+
+def _xfrm(box) -> str:
+    left, top, width, height = (int(v) for v in box)
+    return f'<a:xfrm><a:off x="{left}" y="{top}"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+
+
+def _gradient(stops, angle: int = 0) -> str:
+    return (
+        '<a:gradFill rotWithShape="1"><a:gsLst>'
+        f'<a:gs pos="0"><a:srgbClr val="{stops[0]}"/></a:gs>'
+        f'<a:gs pos="100000"><a:srgbClr val="{stops[1]}"/></a:gs>'
+        f'</a:gsLst><a:lin ang="{angle}" scaled="0"/></a:gradFill>'
+    )
+
+
+def _placeholder_xml(shape_id, kind, idx, name, box, style, theme) -> str:
+    size, bold, italic, color_key, bulleted, space_after = style
+    ph = '<p:ph type="title"/>' if kind == "title" else f'<p:ph type="body" idx="{idx}"/>'
+    if bulleted:
+        bullet = '<a:buFont typeface="Arial"/><a:buChar char="&#8226;"/>'
+        indent = 'marL="342900" indent="-171450"'
+    else:
+        bullet = '<a:buNone/>'
+        indent = 'marL="0" indent="0"'
+    spacing = f'<a:spcAft><a:spcPts val="{space_after * 100}"/></a:spcAft>' if space_after else ''
+    autofit = '<a:spAutoFit/>' if kind == "title" else ''
+    return (
+        f'<p:sp {_NS}><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+        f'<p:nvPr>{ph}</p:nvPr></p:nvSpPr>'
+        f'<p:spPr>{_xfrm(box)}</p:spPr>'
+        f'<p:txBody><a:bodyPr wrap="square" anchor="t">{autofit}</a:bodyPr><a:lstStyle>'
+        f'<a:lvl1pPr {indent} algn="l">{spacing}{bullet}'
+        f'<a:defRPr sz="{size * 100}" b="{int(bold)}" i="{int(italic)}">'
+        f'<a:solidFill><a:srgbClr val="{theme[color_key]}"/></a:solidFill>'
+        f'<a:latin typeface="{theme["font"]}"/></a:defRPr></a:lvl1pPr>'
+        f'</a:lstStyle><a:p><a:r><a:rPr lang="en-US"/><a:t>{name}</a:t></a:r></a:p></p:txBody></p:sp>'
+    )
+
+
+def _image_area_xml(shape_id, name, box, theme, decorated: bool) -> str:
+    if decorated:
+        fill = _gradient(theme["container"], angle=5400000)
+        line = f'<a:ln><a:solidFill><a:srgbClr val="{theme["container_line"]}"/></a:solidFill></a:ln>'
+        effect = (
+            '<a:effectLst><a:outerShdw blurRad="101600" dist="50800" dir="2700000" algn="tl" rotWithShape="0">'
+            '<a:srgbClr val="000000"><a:alpha val="25000"/></a:srgbClr></a:outerShdw></a:effectLst>'
+        )
+        geometry = "roundRect"
+    else:
+        fill, line, effect, geometry = "<a:noFill/>", "<a:ln><a:noFill/></a:ln>", "", "rect"
+    return (
+        f'<p:sp {_NS}><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/><p:cNvSpPr/>'
+        '<p:nvPr userDrawn="1"/></p:nvSpPr>'
+        f'<p:spPr>{_xfrm(box)}<a:prstGeom prst="{geometry}"><a:avLst/></a:prstGeom>{fill}{line}{effect}</p:spPr></p:sp>'
+    )
+
+
+def _build_template(theme: dict) -> bytes:
+    from pptx import Presentation
+    from pptx.oxml import parse_xml
+
+    prs = Presentation()
+    master = prs.slide_master
+    bg = parse_xml(f'<p:bg {_NS}><p:bgPr>{_gradient(theme["background"])}<a:effectLst/></p:bgPr></p:bg>')
+    cSld = master._element.cSld
+    if cSld.bg is not None:
+        cSld.remove(cSld.bg)
+    cSld.insert(0, bg)
+
+    specs = _layout_specs(prs.slide_width, prs.slide_height)
+    layouts = list(prs.slide_layouts)
+    for layout, (name, shapes) in zip(layouts, specs.items()):
+        _rebuild_layout(layout, name, shapes, theme)
+    for layout in layouts[len(specs):]:
+        prs.slide_layouts.remove(layout)
+
+    out = BytesIO()
+    prs.save(out)
+    return out.getvalue()
+
+
+def _rebuild_layout(layout, name: str, shapes: list, theme: dict):
+    from pptx.oxml import parse_xml
+
+    element = layout._element
+    element.set("type", "cust")
+    element.set("preserve", "1")
+    element.cSld.set("name", name)
+
+    spTree = element.cSld.spTree
+    for child in list(spTree.iterchildren()):
+        if not child.tag.endswith(("}nvGrpSpPr", "}grpSpPr")):
+            spTree.remove(child)
+
+    for shape_id, (kind, idx, shape_name, box, style) in enumerate(shapes, start=2):
+        if kind in ("title", "body"):
+            xml = _placeholder_xml(shape_id, kind, idx, shape_name, box, style, theme)
+        else:
+            xml = _image_area_xml(shape_id, shape_name, box, theme, decorated=(kind == "container"))
+        spTree.append(parse_xml(xml))
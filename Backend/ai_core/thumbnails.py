@@ -0,0 +1,272 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image as PILImage, ImageDraw, ImageFont, ImageOps
+
+from ai_core import themes
+from ai_core.decks import slide_fingerprint
+from ai_core.text_layout import (
+    fit_box, font_file, wrap_lines, TEXT_MIN_FONT_SIZE, TITLE_MIN_FONT_SIZE,
+    LINE_SPACING, INSET_X, INSET_Y, BULLET_INDENT,
+)
+from ai_core.themes import (
+    EMU_PER_PT, IMAGE_AREA, TITLE_SLIDE, CONTENT_WITH_IMAGE_SLIDE, BULLET_SLIDE, TWO_COLUMN_SLIDE,
+)
+
+# Slide previews rasterized with PIL straight from the slide dict, using the same
+# layout geometry and text fitting as the ppt_templ builders: no deck is built.
+
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "480"))                          # px, default width
+THUMBNAIL_MAX_WIDTH = int(os.getenv("THUMBNAIL_MAX_WIDTH", "1920"))                 # px, largest allowed
+THUMBNAIL_CACHE_BYTES = int(os.getenv("THUMBNAIL_CACHE_BYTES", str(32 * 1024 * 1024)))
+THUMBNAIL_MAX_SPECS = int(os.getenv("THUMBNAIL_MAX_SPECS", "4096"))                 # registered, not yet rendered
+FORMATS = {"png": "image/png", "webp": "image/webp"}
+
+# Bumped when the drawing changes, so content-addressed thumbnails are re-rendered
+_RENDER_VERSION = 1
+
+# slide_category -> (layout, placeholder idx -> content field(s), image fill), as in ppt_templ.add_slide
+_LAYOUTS = {
+    "title slide": (TITLE_SLIDE, {0: "title", 1: "subtitle", 2: "content"}, 0.9),
+    "content with image slide": (CONTENT_WITH_IMAGE_SLIDE, {0: "title", 1: "content"}, 0.9),
+    "bullet slide": (BULLET_SLIDE, {0: "title", 1: "bullets"}, 0.85),
+    "two column slide": (TWO_COLUMN_SLIDE, {0: "title", 1: "left_column", 2: "right_column"}, 0.9),
+}
+_BULLET_OFFSET = 171450 / EMU_PER_PT  # pt, bullet character position (marL + indent) in the themed layouts
+
+
+def image_digest(image: bytes) -> str:
+    """Digest of the image bytes drawn into a thumbnail (a regenerated image gets a new one)."""
+    return hashlib.sha256(image).hexdigest()
+
+
+def thumbnail_key(slide: dict, theme: str, width: int, fmt: str, image_digest: str = None) -> str:
+    """Content hash of a thumbnail: everything it is drawn from, the image's bytes included."""
+    payload = [_RENDER_VERSION, slide_fingerprint(slide), theme or themes.DEFAULT_THEME, width, fmt, image_digest]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+@functools.lru_cache(maxsize=128)
+def _font(name: str, bold: bool, px: int):
+    """(PIL font, fake bold) for drawing; the default font stands in when `name` is not installed."""
+    path = font_file(name, bold) or font_file(name)
+    if path is not None:
+        return ImageFont.truetype(path, px), bold and font_file(name, bold) is None
+    try:
+        return ImageFont.load_default(size=px), bold
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        return ImageFont.load_default(), bold
+
+
+def _rgb(hex_color: str, default=(0, 0, 0)):
+    if not hex_color:
+        return default
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+@functools.lru_cache(maxsize=64)
+def _gradient(size, stops, horizontal: bool) -> PILImage.Image:
+    """Gradient fill, shared between thumbnails: copy before drawing on it."""
+    gradient = PILImage.linear_gradient("L")
+    if horizontal:
+        gradient = gradient.rotate(90)
+    return ImageOps.colorize(gradient.resize(size), _rgb(stops[0]), _rgb(stops[1]))
+
+
+def render_thumbnail(slide: dict, theme: str = None, image: bytes = None, width: int = THUMBNAIL_WIDTH, fmt: str = "png") -> bytes:
+    """
+    Encoded `fmt` thumbnail of one slide `width` px wide: background, image container
+    with `image` (or the builders' placeholder box) and the text at the sizes the
+    builders would pick. Unknown categories give an empty themed slide.
+    """
+    theme = theme or themes.DEFAULT_THEME
+    colors = themes.THEMES.get(theme) if not os.path.exists(os.path.join(themes.THEME_DIR, f"{theme}.pptx")) else None
+    slide_w, slide_h = themes.DEFAULT_SLIDE_SIZE
+    scale = width / slide_w
+    height = round(slide_h * scale)
+
+    def px(emu) -> int:
+        return round(emu * scale)
+
+    if colors is not None:
+        canvas = _gradient((width, height), colors["background"], horizontal=True).copy()
+    else:
+        canvas = PILImage.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(canvas)
+
+    category = str(slide.get("slide_category", "")).lower()
+    if category in _LAYOUTS:
+        layout, fields, fill = _LAYOUTS[category]
+        content = slide.get("slide_content") or {}
+        geometry = themes.layout_geometry(theme, layout)
+        area = geometry.get(IMAGE_AREA)
+        placed = area is not None and _draw_image_area(canvas, draw, area, px, image, fill, layout, colors)
+
+        for idx, field in fields.items():
+            box = geometry.get(idx)
+            value = content.get(field)
+            paragraphs = [p for p in (value if isinstance(value, list) else [value]) if p]
+            if box is None or not paragraphs:
+                continue
+            grow_to = None
+            if area is not None and layout == BULLET_SLIDE and idx == 1:
+                grow_to = area[1] + area[3]
+            if area is not None and layout == TWO_COLUMN_SLIDE and not placed and idx in (1, 2):
+                box = box._replace(height=area[1] + area[3] - box.top)  # the builder extends the columns
+            min_size = TITLE_MIN_FONT_SIZE if idx == 0 else TEXT_MIN_FONT_SIZE
+            box, size = fit_box(paragraphs, box, min_size, grow_to)
+            _draw_text(draw, paragraphs, box, size, px)
+
+    buf = BytesIO()
+    if fmt == "webp":
+        canvas.save(buf, format="WEBP", quality=80, method=4)
+    else:
+        canvas.save(buf, format="PNG", compress_level=3)
+    return buf.getvalue()
+
+
+def _draw_image_area(canvas, draw, area, px, image, fill, layout, colors) -> bool:
+    """Draws the container and picture (or placeholder); returns whether a picture was placed."""
+    left, top, width, height = (px(v) for v in area)
+    if colors is not None and layout != TWO_COLUMN_SLIDE:
+        radius = max(2, min(width, height) // 12)
+        mask = PILImage.new("L", (width, height), 0)
+        ImageDraw.Draw(mask).rounded_rectangle([0, 0, width - 1, height - 1], radius=radius, fill=255)
+        canvas.paste(_gradient((width, height), colors["container"], horizontal=False), (left, top), mask)
+        draw.rounded_rectangle(
+            [left, top, left + width - 1, top + height - 1], radius=radius, outline=_rgb(colors["container_line"])
+        )
+    if image:
+        try:
+            picture = _scaled_picture(image, max(1, int(width * fill)), max(1, int(height * fill)))
+            canvas.paste(picture, (left + (width - picture.width) // 2, top + (height - picture.height) // 2))
+            return True
+        except Exception:
+            label = "Image Error"
+    else:
+        label = "Image Placeholder"
+    if layout == TWO_COLUMN_SLIDE:
+        return False  # the builder leaves the strip to the columns instead
+    draw.rectangle([left, top, left + width - 1, top + height - 1], fill=(240, 240, 240), outline=(200, 200, 200))
+    font, _ = _font(None, False, max(6, px(14 * EMU_PER_PT)))
+    draw.text((left + width // 2, top + height // 2), label, font=font, fill=(120, 120, 120), anchor="mm")
+    return False
+
+
+_pictures = OrderedDict()  # (image digest, box) -> scaled picture, most recently used last
+_pictures_lock = threading.Lock()
+
+
+def _scaled_picture(image: bytes, width: int, height: int) -> PILImage.Image:
+    """`image` decoded and scaled to fit width x height; kept for the other thumbnails of the image."""
+    key = (hashlib.sha1(image).digest(), width, height)
+    with _pictures_lock:
+        picture = _pictures.get(key)
+        if picture is not None:
+            _pictures.move_to_end(key)
+            return picture
+    picture = PILImage.open(BytesIO(image))
+    picture.draft("RGB", (width, height))  # JPEG: decode at reduced size
+    picture = picture.convert("RGB")
+    if picture.width > width or picture.height > height:
+        picture.thumbnail((width, height), reducing_gap=2.0)
+    else:
+        picture = ImageOps.contain(picture, (width, height))
+    with _pictures_lock:
+        _pictures[key] = picture
+        while len(_pictures) > 256:
+            _pictures.popitem(last=False)
+    return picture
+
+
+def _draw_text(draw, paragraphs: list, box: themes.TextBox, size: float, px):
+    font, fake_bold = _font(box.font, box.bold, max(6, px(size * EMU_PER_PT)))
+    color = _rgb(box.color)
+    text_width = box.width / EMU_PER_PT - 2 * INSET_X - (BULLET_INDENT if box.bulleted else 0)
+    x = box.left + (INSET_X + (BULLET_INDENT if box.bulleted else 0)) * EMU_PER_PT
+    y = box.top + INSET_Y * EMU_PER_PT
+    line_height = size * LINE_SPACING * EMU_PER_PT
+    for paragraph in paragraphs:
+        if box.bulleted:
+            # Drawn rather than typeset: the fallback font has no bullet glyph
+            cx, cy = px(box.left + (INSET_X + _BULLET_OFFSET) * EMU_PER_PT), px(y + line_height / 2)
+            r = max(1, px(size * 0.15 * EMU_PER_PT))
+            draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=color)
+        for line in wrap_lines(paragraph, text_width, size, box.font, box.bold):
+            draw.text(
+                (px(x), px(y + 0.1 * line_height)), line, font=font, fill=color,
+                stroke_width=1 if fake_bold else 0, stroke_fill=color,
+            )
+            y += line_height
+        y += box.space_after * EMU_PER_PT
+
+
+class ThumbnailCache:
+    """
+    Rendered thumbnails by content hash (LRU bounded by bytes), plus the slides
+    registered for rendering on first request, bounded by count.
+    """
+
+    def __init__(self, max_bytes: int = THUMBNAIL_CACHE_BYTES, max_specs: int = THUMBNAIL_MAX_SPECS):
+        self.max_bytes = max_bytes
+        self.max_specs = max_specs
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()  # rendered thumbnails are stored from worker threads
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, key: str, spec: dict):
+        """`spec`: keyword arguments of `render_thumbnail` plus `image_key`."""
+        with self._lock:
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.max_specs:
+                self._specs.popitem(last=False)
+
+    def spec(self, key: str):
+        with self._lock:
+            return self._specs.get(key)
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._data[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._data:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "registered": len(self._specs),
+            }
+
+
+# Process-wide thumbnail cache
+thumbnail_cache = ThumbnailCache()
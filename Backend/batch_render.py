@@ -0,0 +1,282 @@
+"""
+Batch renderer: turns already generated decks into PPTX files without the HTTP API.
+
+Input is a JSONL file (one deck per line) or a directory of `*.json` files (one
+deck per file). A deck is either a list of SlidePreview objects or an object
+{"name": ..., "theme": ..., "slides": [...]}; the name defaults to the file name
+or the line number. Each deck is written to `<out>/<name>.pptx`.
+
+Decks are rendered in parallel worker processes with the ppt_templ builders.
+Image descriptions are deduplicated across the whole batch, so each distinct
+image is generated once (and kept in the image cache). Output files are written
+atomically, so a re-run after a crash skips the decks already written; decks
+that failed are listed in `<out>/_failed.jsonl` and retried on the next run.
+A deck whose Gemini images did not all come back counts as failed: it is
+written with placeholders to `<out>/<name>.incomplete.pptx` until a run gets them.
+
+Run from the Backend directory:
+    python batch_render.py decks.jsonl --out out/ --workers 8
+    python batch_render.py decks_dir/ --out out/ --images draft
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pydantic import ValidationError
+
+from ai_core import themes
+from ai_core.render_pool import render_deck_file
+from ai_core.schemas import validate_slides
+from ai_core.text_layout import paginate_slides
+
+IMAGE_MODES = ("gemini", "draft", "none")
+FAILED_FILE = "_failed.jsonl"
+INCOMPLETE_SUFFIX = ".incomplete.pptx"  # decks rendered with missing Gemini images
+
+
+class Deck:
+    def __init__(self, name: str, slides: list, theme: str = None, error: str = None):
+        self.name = name
+        self.slides = slides
+        self.theme = theme
+        self.error = error  # set when the input could not be read / validated
+
+    def descriptions(self) -> list:
+        return [(slide.get("slide_content") or {}).get("image_description") for slide in self.slides]
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).strip("._")[:120] or "deck"
+
+
+def _parse_deck(record, default_name: str, default_theme: str) -> Deck:
+    name, theme = default_name, default_theme
+    slides = record
+    if isinstance(record, dict):
+        name = record.get("name") or record.get("id") or default_name
+        theme = record.get("theme") or default_theme
+        slides = record.get("slides", [])
+        if isinstance(slides, str):
+            try:
+                slides = json.loads(slides)
+            except json.JSONDecodeError as exc:
+                return Deck(name, [], theme, error=f"invalid slides JSON: {exc}")
+    if not isinstance(slides, list):
+        return Deck(name, [], theme, error="deck has no list of slides")
+    if theme is not None and theme not in themes.available_themes():
+        return Deck(name, [], theme, error=f"unknown theme '{theme}'")
+    try:
+        slides = validate_slides(slides)
+    except ValidationError as exc:
+        return Deck(name, [], theme, error=f"invalid slides: {exc.error_count()} errors")
+    return Deck(name, paginate_slides(slides, theme), theme)
+
+
+def read_decks(source: str, default_theme: str = None) -> list:
+    """Decks of a JSONL file or a directory of JSON files, with unique output names."""
+    decks = []
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if not filename.endswith(".json"):
+                continue
+            stem = filename[: -len(".json")]
+            try:
+                with open(os.path.join(source, filename), encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError) as exc:
+                decks.append(Deck(stem, [], error=f"unreadable: {exc}"))
+                continue
+            decks.append(_parse_deck(record, stem, default_theme))
+    else:
+        with open(source, encoding="utf-8") as f:
+            for lineno, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                default_name = f"deck-{lineno:06d}"
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    decks.append(Deck(default_name, [], error=f"invalid JSON: {exc}"))
+                    continue
+                decks.append(_parse_deck(record, default_name, default_theme))
+
+    seen = {}
+    for deck in decks:
+        name = _safe_name(deck.name)
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        deck.name = name if count == 0 else f"{name}-{count + 1}"
+    return decks
+
+
+class Progress:
+    """One status line on stderr: done/total, throughput and ETA (rewritten in place on a TTY)."""
+
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last_print = 0.0
+        self._tty = sys.stderr.isatty()
+
+    def rate(self) -> float:
+        """Decks rendered per minute in this run."""
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
+
+    def update(self, ok: bool):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        self.print()
+
+    def print(self, final: bool = False):
+        now = time.monotonic()
+        if not final and now - self._last_print < (0.2 if self._tty else 5):
+            return
+        self._last_print = now
+        finished = self.skipped + self.done + self.failed
+        rate = self.rate()
+        remaining = self.total - finished
+        eta = f"{remaining / rate:.1f} min" if rate and remaining else "-"
+        line = (
+            f"[{finished}/{self.total}] rendered={self.done} skipped={self.skipped} failed={self.failed} "
+            f"{rate:.1f} decks/min eta={eta}"
+        )
+        if self._tty:
+            print("\r" + line.ljust(100), end="\n" if final else "", file=sys.stderr, flush=True)
+        else:
+            print(line, file=sys.stderr, flush=True)
+
+
+async def _chunk_images(chunk: list, mode: str, concurrency: int) -> dict:
+    """
+    description -> image bytes for the decks of `chunk`, one generation per
+    distinct description. Descriptions already generated for earlier chunks
+    are served by the image cache instead of Gemini.
+    """
+    if mode != "gemini":
+        return {}
+    from ai_core.agents import image_agent
+
+    wanted = list(dict.fromkeys(d for deck in chunk for d in deck.descriptions() if d))
+    images = await image_agent.generate_images(wanted, max_concurrency=concurrency)
+    return dict(zip(wanted, images))
+
+
+def _init_worker():
+    themes.preload()
+
+
+async def run_batch(decks: list, out_dir: str, args) -> Progress:
+    os.makedirs(out_dir, exist_ok=True)
+    invalid = [deck for deck in decks if deck.error]
+    pending = [
+        deck for deck in decks
+        if not deck.error and not os.path.exists(os.path.join(out_dir, f"{deck.name}.pptx"))
+    ]
+    progress = Progress(len(decks), len(decks) - len(pending) - len(invalid))
+    failures = [{"name": deck.name, "error": deck.error} for deck in invalid]
+    progress.failed = len(invalid)
+
+    references = sum(len([d for d in deck.descriptions() if d]) for deck in pending)
+    unique = len({d for deck in pending for d in deck.descriptions() if d})
+    print(
+        f"{len(pending)} decks to render, {progress.skipped} already done, {len(invalid)} invalid; "
+        f"{unique} distinct images for {references} slides",
+        file=sys.stderr,
+    )
+
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker)
+
+    async def render(deck: Deck, images: dict):
+        final_path = os.path.join(out_dir, f"{deck.name}.pptx")
+        incomplete_path = os.path.join(out_dir, f"{deck.name}{INCOMPLETE_SUFFIX}")
+        part_path = final_path + ".part"
+        deck_images = [images.get(d) if d else None for d in deck.descriptions()]
+        # Gemini images that failed: the deck is written with placeholders under a
+        # non-final name and listed as failed, so the next run retries it
+        missing = sum(1 for d, image in zip(deck.descriptions(), deck_images) if d and image is None)
+        if args.images != "gemini":
+            missing = 0
+        try:
+            await loop.run_in_executor(
+                pool, render_deck_file, deck.slides, deck_images, part_path, deck.theme,
+                None, None, None, args.images == "draft",
+            )
+            # only complete files count as done on resume
+            os.replace(part_path, incomplete_path if missing else final_path)
+        except Exception as exc:
+            failures.append({"name": deck.name, "error": repr(exc)})
+            progress.update(False)
+            return
+        if missing:
+            failures.append({"name": deck.name, "error": f"{missing} images missing", "output": incomplete_path})
+            progress.update(False)
+            return
+        try:
+            os.remove(incomplete_path)  # left by an earlier run
+        except OSError:
+            pass
+        progress.update(True)
+
+    try:
+        chunks = [pending[i:i + args.chunk_size] for i in range(0, len(pending), args.chunk_size)]
+        in_flight = set()
+        # Images of the next chunk are generated while the current one renders
+        next_images = None
+        if chunks:
+            next_images = asyncio.ensure_future(_chunk_images(chunks[0], args.images, args.image_concurrency))
+        for idx, chunk in enumerate(chunks):
+            images = await next_images
+            if idx + 1 < len(chunks):
+                next_images = asyncio.ensure_future(
+                    _chunk_images(chunks[idx + 1], args.images, args.image_concurrency)
+                )
+            for deck in chunk:
+                # Bounded queue in front of the pool keeps pickled decks and images out of memory
+                while len(in_flight) >= args.workers * 2:
+                    _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                in_flight.add(asyncio.ensure_future(render(deck, images)))
+            del images
+        if in_flight:
+            await asyncio.wait(in_flight)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        with open(os.path.join(out_dir, FAILED_FILE), "w", encoding="utf-8") as f:
+            for failure in failures:
+                f.write(json.dumps(failure) + "\n")
+        progress.print(final=True)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="JSONL file or directory of JSON files")
+    parser.add_argument("--out", required=True, help="output directory for the PPTX files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="render processes")
+    parser.add_argument("--theme", choices=themes.available_themes(), help="theme of decks that name none")
+    parser.add_argument(
+        "--images", choices=IMAGE_MODES, default="gemini",
+        help="gemini: generate the images; draft: placeholders drawn from the descriptions; none: empty frames",
+    )
+    parser.add_argument("--image-concurrency", type=int, default=8, help="concurrent Gemini image calls")
+    parser.add_argument("--chunk-size", type=int, default=50, help="decks whose images are generated together")
+    args = parser.parse_args(argv)
+
+    decks = read_decks(args.source, args.theme)
+    progress = asyncio.run(run_batch(decks, args.out, args))
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Bytes and encode time saved by the image preparation stage.
+
+For every picture in the sample decks, compares the old path (decode, convert
+to RGB, re-encode a full-resolution PNG) with `image_prep.prepare_image` at the
+picture's on-slide size.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_image_prep [deck.pptx ...]
+"""
+import argparse
+import glob
+import os
+import time
+from io import BytesIO
+
+from PIL import Image as PILImage
+from pptx import Presentation
+from pptx.shapes.picture import Picture
+
+from ai_core import image_prep
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "sample_ppt")
+
+
+def _old_encode(blob: bytes) -> bytes:
+    image_obj = PILImage.open(BytesIO(blob))
+    if image_obj.mode in ("RGBA", "P"):
+        image_obj = image_obj.convert("RGB")
+    out = BytesIO()
+    image_obj.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _pictures(path: str):
+    for slide in Presentation(path).slides:
+        for shape in slide.shapes:
+            if isinstance(shape, Picture):
+                yield shape.image.blob, shape.width, shape.height
+
+
+def bench_deck(path: str, dpi: int):
+    totals = {"images": 0, "old_bytes": 0, "new_bytes": 0, "old_s": 0.0, "new_s": 0.0}
+    for blob, width, height in _pictures(path):
+        target = (
+            max(1, round(width / image_prep.EMU_PER_INCH * dpi)),
+            max(1, round(height / image_prep.EMU_PER_INCH * dpi)),
+        )
+        start = time.perf_counter()
+        old = _old_encode(blob)
+        totals["old_s"] += time.perf_counter() - start
+
+        image_prep._prepared.clear()  # measure real work, not the memo
+        start = time.perf_counter()
+        new = image_prep.prepare_image(blob, target)
+        totals["new_s"] += time.perf_counter() - start
+
+        totals["images"] += 1
+        totals["old_bytes"] += len(old)
+        totals["new_bytes"] += len(new)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("decks", nargs="*", help="decks to measure (default: sample_ppt/*.pptx)")
+    parser.add_argument("--dpi", type=int, default=image_prep.IMAGE_DPI)
+    args = parser.parse_args()
+    decks = args.decks or sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.pptx")))
+
+    print(f"{'deck':<40} | {'imgs':>4} | {'old KB':>8} | {'new KB':>8} | {'saved':>6} | {'old ms':>7} | {'new ms':>7}")
+    for path in decks:
+        t = bench_deck(path, args.dpi)
+        saved = 1 - t["new_bytes"] / t["old_bytes"] if t["old_bytes"] else 0.0
+        print(
+            f"{os.path.basename(path)[:40]:<40} | {t['images']:>4} | {t['old_bytes'] / 1024:>8.0f} | "
+            f"{t['new_bytes'] / 1024:>8.0f} | {saved:>6.0%} | {t['old_s'] * 1000:>7.0f} | {t['new_s'] * 1000:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+End-to-end load test of /content_generation_api, /content_generation_stream and
+/generate_ppt against a local fake Gemini backend (see benchmarks/fake_gemini.py): no quota, no network.
+
+The API runs under uvicorn in a child process with the fake installed in the
+shared client pool, so the scheduler, caches, agents and render pool are the
+real ones. N concurrent clients are run for every endpoint / deck size, and for
+each scenario the driver reports p50/p95/p99 latency, requests/s, errors, peak
+RSS of the server (render workers included) and event-loop lag of the server.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_load --clients 1 8 32 --slides 5 10 --requests 40
+    python -m benchmarks.bench_load --json after.json --baseline before.json
+
+Results are deterministic for a given --seed apart from timing noise, so runs
+can be compared to catch regressions (`--baseline` prints the change in p95
+latency and throughput per scenario).
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = ("content_generation_api", "content_generation_stream", "generate_ppt")
+LAG_INTERVAL = 0.01  # seconds between event-loop lag probes
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+# --- Server side (child process) ---
+
+def _rss_bytes(pid) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class _Probe:
+    """Samples event-loop lag and RSS (this process + render workers) every LAG_INTERVAL."""
+
+    def __init__(self):
+        self.lags = collections.deque(maxlen=200_000)
+        self.peak_rss = 0
+        self.task = None
+
+    def reset(self):
+        self.lags.clear()
+        self.peak_rss = 0
+
+    def _rss(self) -> int:
+        from ai_core import render_pool
+
+        pids = [os.getpid()]
+        if render_pool._executor is not None:
+            pids += list(getattr(render_pool._executor, "_processes", {}) or {})
+        rss = sum(_rss_bytes(pid) for pid in pids)
+        if not rss:  # no /proc (macOS): peak of this process only
+            scale = 1 if sys.platform == "darwin" else 1024
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return rss
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        ticks = 0
+        while True:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, loop.time() - expected))
+            ticks += 1
+            if ticks % 10 == 0:
+                self.peak_rss = max(self.peak_rss, self._rss())
+
+    def stats(self) -> dict:
+        lags = list(self.lags)
+        return {
+            "loop_lag_p99_ms": round(_percentile(lags, 99) * 1000, 2),
+            "loop_lag_max_ms": round(max(lags, default=0) * 1000, 2),
+            "peak_rss_mb": round(max(self.peak_rss, self._rss()) / 1e6, 1),
+        }
+
+
+def serve(port: int, args):
+    # Isolated caches, and quotas high enough that the server (not the limiter) is measured
+    os.environ.setdefault("IMAGE_CACHE_DIR", tempfile.mkdtemp(prefix="bench_images_"))
+    os.environ.setdefault("DECK_STORE_DIR", tempfile.mkdtemp(prefix="bench_decks_"))
+    os.environ.setdefault("GEMINI_MODEL_LIMITS", json.dumps({
+        "gemini-2.5-flash": [args.rpm, args.model_concurrency],
+        "gemini-2.0-flash-exp": [args.rpm, args.model_concurrency],
+    }))
+    os.environ.setdefault("SCHEDULER_BASE_BACKOFF", "0.2")
+    try:
+        import settings  # noqa: F401
+    except ImportError:  # the fake needs no API key
+        sys.modules["settings"] = type(sys)("settings")
+        sys.modules["settings"].GENAI_API_KEY = ""
+
+    import uvicorn
+    from fastapi.responses import JSONResponse
+    from benchmarks.fake_gemini import FakeGemini
+    from ai_core.clients import client_pool
+    import main
+
+    fake = FakeGemini(
+        llm_latency=args.llm_latency,
+        image_latency=args.image_latency,
+        sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        output_rate=args.output_rate or None,
+        bad_json_rate=args.bad_json_rate,
+    )
+    client_pool._build = lambda api_version: fake
+    probe = _Probe()
+
+    @main.app.post("/_bench/reset")
+    async def bench_reset():
+        if probe.task is None:
+            probe.task = asyncio.create_task(probe.run())
+        probe.reset()
+        return JSONResponse({"ok": True})
+
+    @main.app.get("/_bench/stats")
+    async def bench_stats():
+        return JSONResponse(dict(probe.stats(), fake_calls=fake.calls, fake_errors=fake.errors))
+
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+# --- Driver ---
+
+def _payload(endpoint: str, slides: int, run_id: str, idx: int, mode: str = None) -> dict:
+    from benchmarks.fake_gemini import fake_slides
+
+    topic = f"run {run_id} request {idx}"
+    if endpoint in ("content_generation_api", "content_generation_stream"):
+        payload = {"prompt": f"Create a {slides}-slide deck about {topic}", "history": []}
+        if mode and endpoint == "content_generation_api":
+            payload["generation_mode"] = mode
+        return payload
+    # Unique descriptions per request: every image is generated, nothing comes from the cache
+    return {"slides": fake_slides(slides, topic)}
+
+
+def _complete(endpoint: str, body: bytes) -> bool:
+    """False for a stream that failed after its 200 status went out (no `done` event)."""
+    return endpoint != "content_generation_stream" or b"event: done" in body
+
+
+async def _scenario(
+    base_url: str, endpoint: str, clients: int, slides: int, requests: int, run_id: str, mode: str = None
+) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as http:
+        await http.post("/_bench/reset")
+        latencies, errors = [], 0
+        pending = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for idx in pending:
+                started = time.perf_counter()
+                response = await http.post(f"/{endpoint}", json=_payload(endpoint, slides, run_id, idx, mode))
+                body = await response.aread()
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200 or not _complete(endpoint, body):
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+        server = (await http.get("/_bench/stats")).json()
+
+    return {
+        "endpoint": endpoint,
+        "clients": clients,
+        "slides": slides,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        **{key: server[key] for key in ("peak_rss_mb", "loop_lag_p99_ms", "loop_lag_max_ms")},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int, argv: list):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_load", "--serve", str(port)] + argv,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    import httpx
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited: {server.stderr.read().decode(errors='replace')[-2000:]}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not become ready")
+
+
+def _print_table(results: list, baseline: dict):
+    header = (
+        f"{'endpoint':>25} | {'clients':>7} | {'slides':>6} | {'rps':>7} | {'p50 ms':>8} | {'p95 ms':>8} | "
+        f"{'p99 ms':>8} | {'errors':>6} | {'peak RSS MB':>11} | {'lag p99 ms':>10} | {'lag max ms':>10}"
+    )
+    if baseline:
+        header += f" | {'Δp95':>7} | {'Δrps':>7}"
+    print(header)
+    for r in results:
+        line = (
+            f"{r['endpoint']:>25} | {r['clients']:>7} | {r['slides']:>6} | {r['rps']:>7} | {r['p50_ms']:>8} | "
+            f"{r['p95_ms']:>8} | {r['p99_ms']:>8} | {r['errors']:>6} | {r['peak_rss_mb']:>11} | "
+            f"{r['loop_lag_p99_ms']:>10} | {r['loop_lag_max_ms']:>10}"
+        )
+        before = baseline.get((r["endpoint"], r["clients"], r["slides"]))
+        if before:
+            line += f" | {_change(before['p95_ms'], r['p95_ms']):>7} | {_change(before['rps'], r['rps']):>7}"
+        print(line)
+
+
+def _change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32], help="concurrent clients")
+    parser.add_argument("--slides", type=int, nargs="+", default=[5, 10], help="deck sizes")
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="median seconds of a structured call")
+    parser.add_argument("--image-latency", type=float, default=1.0, help="median seconds of an image call")
+    parser.add_argument("--latency-sigma", type=float, default=0.35, help="log-normal sigma of latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake calls failing with 503")
+    parser.add_argument("--output-rate", type=float, default=0.0, help="chars/s of structured output (0: latency only)")
+    parser.add_argument("--bad-json-rate", type=float, default=0.0, help="fraction of structured calls cut off mid-JSON")
+    parser.add_argument(
+        "--generation-mode", choices=["auto", "single", "outline"], help="generation_mode of preview requests"
+    )
+    parser.add_argument("--rpm", type=float, default=100_000, help="scheduler requests/minute per model")
+    parser.add_argument("--model-concurrency", type=int, default=64, help="scheduler concurrency per model")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args)
+        return
+
+    server_argv = [
+        "--llm-latency", str(args.llm_latency), "--image-latency", str(args.image_latency),
+        "--latency-sigma", str(args.latency_sigma), "--error-rate", str(args.error_rate),
+        "--output-rate", str(args.output_rate), "--bad-json-rate", str(args.bad_json_rate),
+        "--rpm", str(args.rpm), "--model-concurrency", str(args.model_concurrency), "--seed", str(args.seed),
+    ]
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(r["endpoint"], r["clients"], r["slides"]): r for r in json.load(f)["results"]}
+
+    port = _free_port()
+    server = _start_server(port, server_argv)
+    results = []
+    try:
+        for endpoint in args.endpoints:
+            for slides in args.slides:
+                for clients in args.clients:
+                    run_id = f"{args.seed}-{endpoint}-{slides}-{clients}"
+                    results.append(asyncio.run(_scenario(
+                        f"http://127.0.0.1:{port}", endpoint, clients, slides, args.requests, run_id, args.generation_mode
+                    )))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    _print_table(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Peak memory of deck assembly + serialization against slide count.
+
+Compares the old buffered path (every image decoded and held, whole deck saved
+into a BytesIO) with the streamed path (encoded bytes released per slide,
+package spooled and read back in chunks). Each measurement runs in a fresh
+process so peak RSS readings do not leak between runs.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_pptx_memory --slides 5 10 20 40
+"""
+import argparse
+import gc
+import io
+import random
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ("buffered", "streamed")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _synthetic_images(count: int, size=(1536, 1024)):
+    """Distinct photo-like PNGs, roughly the size of what Gemini returns."""
+    from PIL import Image
+
+    images = []
+    for idx in range(count):
+        rng = random.Random(idx)
+        base = Image.linear_gradient("L").resize(size)
+        noise = Image.effect_noise(size, 24 + idx % 8)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        img = Image.merge("RGB", (base, noise, Image.new("L", size, color[2])))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        images.append(buf.getvalue())
+    return images
+
+
+def _slides(count: int):
+    categories = [
+        ("Title Slide", {"title": "Title", "subtitle": "Subtitle", "content": "Some content " * 20}),
+        ("Bullet Slide", {"title": "Bullets", "bullets": [f"Point {i} " * 6 for i in range(5)]}),
+        ("Two Column Slide", {"title": "Columns", "left_column": ["Left"] * 4, "right_column": ["Right"] * 4}),
+        ("Content with Image Slide", {"title": "Content", "content": "Body text " * 30}),
+    ]
+    slides = []
+    for idx in range(count):
+        category, content = categories[idx % len(categories)]
+        slides.append({
+            "slide_no": idx + 1,
+            "slide_category": category,
+            "slide_content": dict(content, image_description=f"image {idx}"),
+        })
+    return slides
+
+
+def run_single(mode: str, count: int):
+    from PIL import Image
+    from ai_core.ppt_templ import build_presentation
+    from ai_core.pptx_writer import spool_presentation, iter_file_chunks
+
+    slides = _slides(count)
+    images = _synthetic_images(count)
+    gc.collect()
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+
+    if mode == "buffered":
+        decoded = [Image.open(io.BytesIO(data)) for data in images]
+        for img in decoded:
+            img.load()
+        del images
+        prs = build_presentation(slides, list(decoded))
+        output = io.BytesIO()
+        prs.save(output)
+        size = len(output.getvalue())
+    else:
+        prs = build_presentation(slides, images)
+        del images
+        size = sum(len(chunk) for chunk in iter_file_chunks(spool_presentation(prs)))
+
+    elapsed = time.perf_counter() - start
+    print(f"{_peak_rss_mb() - baseline:.1f} {size / 1e6:.2f} {elapsed:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--single", nargs=2, metavar=("MODE", "SLIDES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single[0], int(args.single[1]))
+        return
+
+    print(f"{'slides':>6} | {'mode':>9} | {'peak RSS +MB':>12} | {'pptx MB':>7} | {'seconds':>7}")
+    for count in args.slides:
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_pptx_memory", "--single", mode, str(count)],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            peak, size, seconds = out.split()
+            print(f"{count:>6} | {mode:>9} | {peak:>12} | {size:>7} | {seconds:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Validation throughput of slide decks: the per-slide `SlidePreview` model, whose
+`slide_content` union is resolved by trying each member in turn, against the
+`SLIDES` TypeAdapter that picks the model from `slide_category` directly.
+
+For every deck size, both validate (and dump back to dicts) the same decks of
+mixed categories; the time to reject a deck whose last slide is malformed is
+reported too, since that is what an API request pays before failing.
+
+Run from the Backend directory:
+    python -m benchmarks.bench_validation --slides 10 100 1000 --repeat 20
+"""
+import argparse
+import time
+
+from pydantic import ValidationError
+
+from ai_core.schemas import SlidePreview, validate_slides
+from benchmarks.fake_gemini import fake_slides
+
+
+def _per_slide(deck: list) -> list:
+    return [SlidePreview.model_validate(slide).model_dump() for slide in deck]
+
+
+def _best_of(fn, deck: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            fn(deck)
+        except ValidationError:
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, nargs="+", default=[10, 100, 1000], help="deck sizes")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    print(f"{'slides':>6} | {'per-slide /s':>12} | {'adapter /s':>12} | {'speedup':>7} | {'reject ms':>9}")
+    for count in args.slides:
+        deck = fake_slides(count, f"bench {count}")
+        assert _per_slide(deck) and validate_slides(deck)  # both accept the deck
+        malformed = deck[:-1] + [dict(deck[-1], slide_content={"title": "no fields"})]
+
+        old = _best_of(_per_slide, deck, args.repeat)
+        new = _best_of(validate_slides, deck, args.repeat)
+        reject = _best_of(validate_slides, malformed, args.repeat)
+        print(
+            f"{count:>6} | {count / old:>12,.0f} | {count / new:>12,.0f} | {old / new:>6.1f}x | {reject * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Local stand-in for the genai client used by GeminiAgent and ImageGenAgent.
+
+Implements the `client.aio.models` calls the agents make (`generate_content`
+for structured previews and images, `generate_content_stream` for streamed
+previews) with configurable log-normal latency and 503 error rate. Responses
+are deterministic for a given prompt: the slide JSON is derived from a hash of
+the prompt, and images come from a small pool of pre-encoded PNGs, so the fake
+costs no CPU in the server being measured. Outline and per-slide calls (see
+`agents.outlined_structured_output`) are answered from the same slides.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import math
+import random
+import re
+from types import SimpleNamespace
+
+CATEGORIES = ("Title Slide", "Bullet Slide", "Two Column Slide", "Content with Image Slide")
+
+
+class FakeServerError(Exception):
+    """Looks like a genai ServerError to the scheduler (it checks `.code`)."""
+
+    code = 503
+
+
+def fake_slides(count: int, topic: str) -> list:
+    """Deterministic SlidePreview dicts; image descriptions are unique per topic and slide."""
+    rng = random.Random(topic)
+    slides = []
+    for idx in range(count):
+        category = CATEGORIES[0] if idx == 0 else CATEGORIES[1 + rng.randrange(3)]
+        content = {"title": f"{topic} part {idx + 1}", "image_description": f"{topic} illustration {idx + 1}"}
+        if category == "Title Slide":
+            content.update(subtitle=f"About {topic}", content=f"An overview of {topic}. " * 3)
+        elif category == "Bullet Slide":
+            content.update(bullets=[f"Point {i + 1} about {topic} " * 2 for i in range(4)])
+        elif category == "Two Column Slide":
+            content.update(left_column=[f"Before {i + 1}" for i in range(3)], right_column=[f"After {i + 1}" for i in range(3)])
+        else:
+            content.update(content=f"Details of {topic}. " * 8)
+        slides.append({"slide_no": idx + 1, "slide_category": category, "slide_content": content})
+    return slides
+
+
+def _image_pool(count: int, size) -> list:
+    """Photo-like PNGs, roughly what Gemini returns, encoded once up front."""
+    from PIL import Image
+
+    images = []
+    for idx in range(count):
+        base = Image.linear_gradient("L").resize(size).rotate(idx * 37)
+        noise = Image.effect_noise(size, 20 + idx)
+        img = Image.merge("RGB", (base, noise, Image.new("L", size, (idx * 53) % 256)))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        images.append(buf.getvalue())
+    return images
+
+
+def _usage(prompt_tokens: int, output_tokens: int):
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens, candidates_token_count=output_tokens, thoughts_token_count=None
+    )
+
+
+class FakeGemini:
+    """
+    Drop-in for `genai.Client` as far as the agents are concerned.
+    Latency is log-normal with the given median (seconds) and sigma;
+    `error_rate` of the calls fail with a 503 after half their latency.
+    """
+
+    def __init__(
+        self,
+        llm_latency: float = 0.5,
+        image_latency: float = 1.5,
+        sigma: float = 0.35,
+        error_rate: float = 0.0,
+        image_size=(1024, 768),
+        image_pool: int = 8,
+        seed: int = 0,
+        output_rate: float = None,
+        bad_json_rate: float = 0.0,
+    ):
+        self.llm_latency = llm_latency
+        self.image_latency = image_latency
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.output_rate = output_rate        # chars/s of structured output; None: fixed latency
+        self.bad_json_rate = bad_json_rate    # fraction of structured responses cut short
+        self._rng = random.Random(seed)
+        self._images = _image_pool(image_pool, image_size)
+        self.calls = 0
+        self.errors = 0
+        self.aio = SimpleNamespace(models=_FakeModels(self), aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def _wait(self, median: float):
+        self.calls += 1
+        delay = median * math.exp(self._rng.gauss(0, self.sigma)) if median > 0 else 0
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            await asyncio.sleep(delay / 2)
+            raise FakeServerError("503 UNAVAILABLE (fake)")
+        await asyncio.sleep(delay)
+
+    def structured_text(self, prompt: str, schema=None, contents: str = "") -> str:
+        """
+        The deck JSON for `prompt`; its outline or one slide's content when `schema`
+        is the outline list or a slide content model (slide number taken from `contents`).
+        """
+        match = re.search(r"(\d+)[- ]slide", prompt)
+        count = int(match.group(1)) if match else 5
+        topic = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:10]
+        slides = fake_slides(count, topic)
+        if getattr(schema, "__origin__", None) is list and getattr(schema.__args__[0], "__name__", "") == "SlideOutline":
+            return json.dumps([
+                {
+                    "slide_no": slide["slide_no"],
+                    "slide_category": slide["slide_category"],
+                    "title": slide["slide_content"]["title"],
+                    "summary": f"What {topic} means for part {slide['slide_no']}.",
+                }
+                for slide in slides
+            ])
+        if isinstance(schema, type):
+            wanted = re.search(r"Write slide (\d+)", contents)
+            idx = min(count, int(wanted.group(1)) if wanted else 1) - 1
+            return json.dumps(slides[idx]["slide_content"])
+        return json.dumps(slides)
+
+    def latency(self, text: str) -> float:
+        """Median latency of a structured response: grows with its length when output_rate is set."""
+        return self.llm_latency + (len(text) / self.output_rate if self.output_rate else 0)
+
+    def maybe_truncate(self, text: str) -> str:
+        if self.bad_json_rate and self._rng.random() < self.bad_json_rate:
+            return text[: len(text) // 2]
+        return text
+
+    def image_bytes(self, prompt: str) -> bytes:
+        digest = hashlib.sha1(prompt.encode("utf-8")).digest()
+        # Pool image plus a per-prompt trailer after IEND (ignored by decoders), so every
+        # prompt yields distinct bytes and memoization in image_prep does not kick in
+        return self._images[digest[0] % len(self._images)] + digest
+
+
+class _FakeModels:
+    def __init__(self, fake: FakeGemini):
+        self._fake = fake
+
+    async def generate_content(self, model, contents, config=None):
+        if _wants_image(config):
+            prompt = contents[-1] if isinstance(contents, list) else contents
+            await self._fake._wait(self._fake.image_latency)
+            parts = [
+                SimpleNamespace(text="Here is the image.", inline_data=None),
+                SimpleNamespace(text=None, inline_data=SimpleNamespace(data=self._fake.image_bytes(prompt))),
+            ]
+            return SimpleNamespace(
+                candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))],
+                usage_metadata=_usage(len(prompt) // 4, 1290),
+                text=None,
+            )
+        schema = config.get("response_schema") if isinstance(config, dict) else None
+        text = self._fake.structured_text(_last_user_line(contents), schema, str(contents))
+        await self._fake._wait(self._fake.latency(text))
+        text = self._fake.maybe_truncate(text)
+        return SimpleNamespace(text=text, usage_metadata=_usage(len(contents) // 4, len(text) // 4))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        text = self._fake.structured_text(_last_user_line(contents))
+        # First token after a fifth of the latency, the rest spread over the remainder
+        await self._fake._wait(self._fake.llm_latency / 5)
+        fake = self._fake
+
+        async def chunks():
+            size = 64
+            pieces = [text[i:i + size] for i in range(0, len(text), size)]
+            step = fake.llm_latency * 0.8 / max(1, len(pieces))
+            for idx, piece in enumerate(pieces):
+                await asyncio.sleep(step)
+                last = idx == len(pieces) - 1
+                yield SimpleNamespace(
+                    text=piece, usage_metadata=_usage(len(contents) // 4, len(text) // 4) if last else None
+                )
+
+        return chunks()
+
+
+def _wants_image(config) -> bool:
+    modalities = config.get("response_modalities") if isinstance(config, dict) else getattr(config, "response_modalities", None)
+    return bool(modalities) and "IMAGE" in modalities
+
+
+def _last_user_line(contents) -> str:
+    text = contents if isinstance(contents, str) else "\n".join(map(str, contents))
+    lines = [line for line in text.splitlines() if line.startswith("User: ")]
+    return lines[-1][len("User: "):] if lines else text
@@ -1,6 +1,36 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routers import router
+from ai_core.render_pool import shutdown_render_pool
+from ai_core.clients import client_pool, warmup, STARTUP_WARMUP
+from ai_core.metrics import TraceMiddleware
 
-app = FastAPI()
+# Level of the app's structured event log (ai_core.*); other libraries log warnings only
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+logging.getLogger("ai_core").setLevel(LOG_LEVEL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients, heavy imports and render workers are warmed up in the background,
+    # so the worker starts serving immediately; /health reports when it is done
+    warmup_task = None
+    if STARTUP_WARMUP:
+        warmup_task = asyncio.create_task(warmup.run(client_pool))
+    else:
+        warmup.skip()
+    yield
+    if warmup_task is not None:
+        warmup_task.cancel()
+    await client_pool.aclose()
+    shutdown_render_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(TraceMiddleware)
 
 app.include_router(router)
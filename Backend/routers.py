@@ -1,87 +1,676 @@
 from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse, StreamingResponse
-from ai_core.agents import content_generation , structured_content_generation
-from ai_core.ppt_templ import create_title_slide , create_bullet_slide , create_two_column_slide
-from pptx import Presentation
-import io
+from fastapi.responses import JSONResponse, StreamingResponse, Response, FileResponse
+from ai_core.agents import content_generation , structured_content_generation, stream_structured_content, preview_cache, image_agent
+from ai_core.agents import MODES as GENERATION_MODES
+from ai_core.pptx_writer import PPTX_MEDIA_TYPE, iter_file_chunks, file_size
+from ai_core.render_pool import render_deck
+from ai_core.themes import available_themes, DEFAULT_THEME
+from ai_core.text_layout import paginate_slides
+from ai_core.schemas import validate_slides
+from ai_core.metrics import log, registry, RESPONSE_TRANSFER_SECONDS, RESPONSE_BYTES, FAILURES, THUMBNAIL_RENDER_SECONDS
+from pydantic import ValidationError
+import asyncio
+import functools
+import hashlib
 import json
 import os
-from datetime import datetime
+import re
+import time
 
 router = APIRouter()
 
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client went away before the response was ready."""
+
+
+async def _cancel_on_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """
+    Runs `coro` as a task and cancels it if the HTTP client goes away,
+    so abandoned requests stop holding upstream Gemini calls.
+    Raises ClientDisconnected when the client disconnected.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 @router.post("/content_generation_api")
 async def content_generation_api(request: Request):
     data = await request.json()
     prompt = data.get("prompt")
     history = data.get("history", [])
+    fresh = bool(data.get("fresh", False))  # opt out of the preview cache
+    mode = data.get("generation_mode")
+    if mode is not None and mode not in GENERATION_MODES:
+        return JSONResponse({"error": f"generation_mode must be one of {list(GENERATION_MODES)}"}, status_code=400)
 
-    response = await structured_content_generation(prompt, history)
+    try:
+        response = await _cancel_on_disconnect(
+            request, structured_content_generation(prompt, history, fresh=fresh, mode=mode)
+        )
+    except asyncio.TimeoutError:
+        return JSONResponse({"error": "Content generation timed out"}, status_code=504)
+    except ClientDisconnected:
+        log("client_disconnected", endpoint="content_generation_api")
+        return Response(status_code=499)
+    _prefetch_images(request, data, response)
     return JSONResponse({"content": response})
 
 
+def _prefetch_images(request: Request, data: dict, slides, session_id: str = None):
+    """
+    Opt-in (`prefetch_images`, default IMAGE_PREFETCH): starts the preview's images
+    at speculative priority. Without a server-side session, requests are grouped by
+    the `session_id` they send, else by client address, so a follow-up supersedes.
+    """
+    if not data.get("prefetch_images", IMAGE_PREFETCH) or not isinstance(slides, list):
+        return
+    if session_id is None:
+        client = request.client.host if request.client else "unknown"
+        session_id = f"client:{data.get('session_id') or client}"
+    image_prefetcher.prefetch(session_id, slides)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/content_generation_stream")
+async def content_generation_stream(request: Request):
+    """
+    Same input as /content_generation_api, answered as server-sent events: one
+    `slide` event per SlidePreview as soon as it is complete, then `done`
+    (or `error`). The upstream call is cancelled if the client disconnects.
+    """
+    data = await request.json()
+    prompt = data.get("prompt")
+    history = data.get("history", [])
+    fresh = bool(data.get("fresh", False))
+
+    async def events():
+        count = 0
+        slides = []
+        try:
+            async for event, payload in stream_structured_content(prompt, history, fresh=fresh):
+                count += event == "slide"
+                if event == "slide":
+                    slides.append(payload)
+                yield _sse(event, payload)
+        except asyncio.TimeoutError:
+            yield _sse("error", {"error": "Content generation timed out"})
+        except Exception as exc:
+            FAILURES.inc(stage="content_generation_stream")
+            log("content_generation_stream_failed", error=repr(exc))
+            yield _sse("error", {"error": str(exc)})
+        else:
+            _prefetch_images(request, data, slides)
+            yield _sse("done", {"slides": count})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+
+from ai_core.image_cache import image_cache
+from ai_core.scheduler import scheduler
+from ai_core.clients import client_pool, warmup
+from ai_core.render_pool import render_pool_stats
+from ai_core.jobs import job_manager, JobQueueFull, DONE, JOB_RETENTION, parse_slide_id
+from ai_core.sessions import session_store, SessionTooLarge
+from ai_core.decks import deck_store, plan_reuse
+from ai_core.prefetch import image_prefetcher, IMAGE_PREFETCH
+from ai_core.thumbnails import (
+    thumbnail_cache, thumbnail_key, image_digest, render_thumbnail, FORMATS, THUMBNAIL_WIDTH, THUMBNAIL_MAX_WIDTH,
+)
+
+
+@router.get("/cache_stats")
+async def cache_stats():
+    return JSONResponse(
+        {
+            "images": image_cache.stats(),
+            "previews": preview_cache.stats(),
+            "thumbnails": thumbnail_cache.stats(),
+            "image_prefetch": image_prefetcher.stats(),
+        }
+    )
+
+
+@router.get("/scheduler_stats")
+async def scheduler_stats():
+    return JSONResponse(scheduler.stats())
+
+
+def _collect_stats():
+    """Scrape-time metrics from the caches, scheduler, jobs and sessions."""
+    images = image_cache.stats()
+    previews = preview_cache.stats()
+    lanes = scheduler.stats()
+    jobs = job_manager.stats()
+    sessions = session_store.stats()
+    thumbnails = thumbnail_cache.stats()
+    return [
+        ("cache_hits_total", "counter", "Cache hits by cache and tier", [
+            ({"cache": "image", "tier": "memory"}, images["memory_hits"]),
+            ({"cache": "image", "tier": "disk"}, images["disk_hits"]),
+            ({"cache": "preview", "tier": "memory"}, previews["hits"]),
+            ({"cache": "thumbnail", "tier": "memory"}, thumbnails["hits"]),
+        ]),
+        ("cache_misses_total", "counter", "Cache misses by cache", [
+            ({"cache": "image"}, images["misses"]),
+            ({"cache": "preview"}, previews["misses"]),
+            ({"cache": "thumbnail"}, thumbnails["misses"]),
+        ]),
+        ("image_cache_memory_bytes", "gauge", "Bytes held by the image cache memory tier", [
+            ({}, images["memory_bytes"]),
+        ]),
+        ("image_cache_disk_bytes", "gauge", "Bytes held by the image cache disk tier", [
+            ({}, images["disk"]["disk_bytes"] or 0),
+        ]),
+        ("artifact_pending_writes", "gauge", "Artifacts queued for the background writer", [
+            ({"store": "images"}, images["disk"]["pending_writes"]),
+        ]),
+        ("gemini_queue_depth", "gauge", "Calls waiting for a scheduler slot", [
+            ({"model": model, "priority": priority}, depth)
+            for model, lane in lanes.items() for priority, depth in lane["queued"].items()
+        ]),
+        ("gemini_inflight", "gauge", "Gemini calls in flight", [
+            ({"model": model}, lane["inflight"]) for model, lane in lanes.items()
+        ]),
+        ("gemini_concurrency_limit", "gauge", "Current adaptive concurrency limit", [
+            ({"model": model}, lane["concurrency_limit"]) for model, lane in lanes.items()
+        ]),
+        ("jobs", "gauge", "Background jobs by state", [
+            ({"state": state}, count) for state, count in jobs.items() if isinstance(count, int)
+        ]),
+        ("sessions", "gauge", "Open conversation sessions", [({}, sessions["sessions"])]),
+        ("session_prompt_tokens_total", "counter", "Estimated prompt tokens of session turns", [
+            ({"history": "full"}, sessions["prompt_tokens_before"]),
+            ({"history": "compacted"}, sessions["prompt_tokens_after"]),
+        ]),
+    ]
+
+
+registry.add_collector(_collect_stats)
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/health")
+async def health():
+    """Liveness plus readiness: 503 until the startup warm-up has finished."""
+    return JSONResponse(
+        {
+            "status": "ok" if warmup.ready else "starting",
+            "warmup": warmup.stats(),
+            "clients": client_pool.stats(),
+            "render_pool": render_pool_stats(),
+        },
+        status_code=200 if warmup.ready else 503,
+    )
+
+def _timed_chunks(chunks, endpoint: str):
+    """Passes `chunks` through, recording the transfer time and bytes sent to the client."""
+    started = time.perf_counter()
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        RESPONSE_TRANSFER_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+        RESPONSE_BYTES.inc(sent, endpoint=endpoint)
+
+
+def _read_slides(data: dict):
+    """
+    (slides, None) with the deck validated against the per-category slide models,
+    or (None, error response) listing what is malformed, before anything is generated.
+    """
+    slides = data.get("slides", [])
+    try:
+        if isinstance(slides, str):
+            slides = json.loads(slides)
+        return validate_slides(slides), None
+    except ValueError as exc:  # pydantic.ValidationError is a ValueError too
+        errors = exc.errors(include_url=False, include_context=False) if isinstance(exc, ValidationError) else str(exc)
+        return None, JSONResponse({"error": "Invalid slides", "details": errors}, status_code=422)
+
+
+def _unknown_theme(theme):
+    """Error response for an unsupported `theme`, or None when it is fine."""
+    if theme is None or theme in available_themes():
+        return None
+    return JSONResponse(
+        {"error": f"Unknown theme '{theme}'", "themes": available_themes()}, status_code=400
+    )
+
+
+@router.get("/themes")
+async def list_themes():
+    return JSONResponse({"themes": available_themes(), "default": DEFAULT_THEME})
 
-from ai_core.gemini_client import ImageGenAgent
 
 @router.post("/generate_ppt")
 async def generate_ppt(request: Request):
     data = await request.json()
-    slides = data.get("slides", [])
-    if isinstance(slides, str):
-        slides = json.loads(slides)
-    prs = Presentation()
-    image_agent = ImageGenAgent()
-    for idx, slide in enumerate(slides):
-        category = slide.get("slide_category", "").lower()
-        print(f"Processing slide {idx+1} of category: {category}")
-        content = slide.get("slide_content", {})
-        image = None
-        if "image_description" in content and content["image_description"]:
-            # Generate image from description
-            _, image = image_agent.generate_image_response(content["image_description"])
-            # Save image for debugging
-            if image is not None:
-                images_dir = os.path.join(os.path.dirname(__file__), "images")
-                os.makedirs(images_dir, exist_ok=True)
-                image_filename = f"slide_{idx+1}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.png"
-                image_path = os.path.join(images_dir, image_filename)
-                image.save(image_path)
-        if category == "title slide":
-            create_title_slide(
-                prs,
-                content.get("title", ""),
-                content.get("subtitle", ""),
-                content.get("content", ""),
-                image=image
-            )
-        # TODO: Add more slide types here
-        elif category == 'bullet slide':
-            print(content.get("bullets"))
-            create_bullet_slide(
-                prs,
-                content.get("title", ""),
-                content.get("bullets", []),  # list of strings
-                image=image
-            )
-            
-        elif category == 'two column slide':
-            create_two_column_slide(prs, content.get("title", "") ,
-                content.get("left_column", []),
-                content.get("right_column", []),
-                                    image=image                                   
-                                    )
-        elif category == 'content with image slide':
-            print(content.get("content", ""))
-            create_title_slide(prs, content.get("title", ""),
-                               None,
-                               content.get("content", ""),
-                                 image=image
-                                 )
-    output = io.BytesIO()
-    prs.save(output)
-    output.seek(0)
+    slides, error = _read_slides(data)
+    if error is not None:
+        return error
+    theme = data.get("theme")
+    error = _unknown_theme(theme)
+    if error is not None:
+        return error
+    # Bullet lists too long for one slide continue on extra slides
+    slides = paginate_slides(slides, theme)
+    if data.get("draft"):
+        return await _draft_deck(slides, theme)
+    # Incremental mode: slides unchanged since the base deck are kept as rendered
+    base, reuse = None, None
+    if data.get("base_deck_id"):
+        base = deck_store.get(data["base_deck_id"])
+        if base is not None and (base.theme or DEFAULT_THEME) == (theme or DEFAULT_THEME):
+            reuse = plan_reuse(base.slides, slides, base.missing_images)
+        else:
+            base = None
+    # Generate the images of the slides to build concurrently; failed ones come back as None
+    descriptions = [
+        slide.get("slide_content", {}).get("image_description") if reuse is None or reuse[idx] is None else None
+        for idx, slide in enumerate(slides)
+    ]
+    image_prefetcher.promote(descriptions)  # speculative generations of these images now have a waiter
+    images = await image_agent.generate_images(descriptions)
+    # Assemble and serialize in the render process pool, then send the file in chunks
+    version = deck_store.reserve(slides, theme)
+    # Slides whose image failed are not reused by the next edit, so their images are retried
+    # (reused slides always have theirs: plan_reuse never picks one without)
+    version.missing_images = {idx for idx, data in enumerate(images) if descriptions[idx] and data is None}
+    path = await render_deck(
+        slides, images, version.path, theme=theme,
+        base_path=base.path if base is not None else None, reuse=reuse,
+    )
+    del images
+    deck_store.add(version)
+    output = open(path, "rb")
+    return StreamingResponse(
+        _timed_chunks(iter_file_chunks(output), "generate_ppt"),
+        media_type=PPTX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": "attachment; filename=generated_presentation.pptx",
+            "Content-Length": str(file_size(output)),
+            # Pass back as `base_deck_id` to render the next edit incrementally
+            "X-Deck-Id": version.id,
+            "X-Reused-Slides": str(sum(idx is not None for idx in reuse or [])),
+        }
+    )
+
+
+async def _draft_deck(slides: list, theme: str):
+    """
+    Draft mode: placeholder images drawn from the descriptions, so the deck comes
+    back in about a second. The real deck is built by a background job, started
+    first so its images are generated while the draft renders; its id is returned
+    in X-Upgrade-Job-Id (absent when the job queue is full). Drafts are not kept in
+    the deck store: their placeholders must not be reused by incremental edits.
+    """
+    try:
+        upgrade = job_manager.submit(slides, theme)
+    except JobQueueFull:
+        upgrade = None
+    path = await render_deck(slides, [None] * len(slides), theme=theme, draft=True)
+    output = open(path, "rb")
+    headers = {
+        "Content-Disposition": "attachment; filename=draft_presentation.pptx",
+        "Content-Length": str(file_size(output)),
+        "X-Draft": "1",
+    }
+    if upgrade is not None:
+        headers["X-Upgrade-Job-Id"] = upgrade.id
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        headers={"Content-Disposition": "attachment; filename=generated_presentation.pptx"}
-    )
\ No newline at end of file
+        _timed_chunks(iter_file_chunks(output, delete_path=path), "generate_ppt"),
+        media_type=PPTX_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+# --- Background jobs ---
+
+@router.post("/jobs")
+async def create_job(request: Request):
+    data = await request.json()
+    slides, error = _read_slides(data)
+    if error is not None:
+        return error
+    theme = data.get("theme")
+    error = _unknown_theme(theme)
+    if error is not None:
+        return error
+    try:
+        job = job_manager.submit(paginate_slides(slides, theme), theme)
+    except JobQueueFull:
+        return JSONResponse({"error": "Too many pending jobs, retry later"}, status_code=429)
+    return JSONResponse(job.to_dict(), status_code=202)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    if job.status != DONE or not job.result_path:
+        return JSONResponse({"error": f"Job is {job.status}", "status": job.status}, status_code=409)
+    # A finished job's deck never changes, so it can be kept until the job expires
+    return FileResponse(
+        job.result_path, media_type=PPTX_MEDIA_TYPE, filename="generated_presentation.pptx",
+        headers={"Cache-Control": f"private, max-age={int(JOB_RETENTION)}"},
+    )
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(job.to_dict(), status_code=202)
+
+
+@router.get("/slides/{slide_id}")
+async def get_slide(slide_id: str):
+    try:
+        job_id, idx = parse_slide_id(slide_id)
+    except ValueError:
+        return JSONResponse({"error": "Malformed slide id"}, status_code=400)
+    job = job_manager.get(job_id)
+    if job is None or idx >= len(job.slides):
+        return JSONResponse({"error": "Slide not found"}, status_code=404)
+
+    image_url = None
+    if job.image_keys[idx]:
+        name = image_cache.name_for(job.image_keys[idx])
+        if name:
+            image_url = f"/images/{name}"
+    return JSONResponse({
+        "slide_id": slide_id,
+        "job_id": job_id,
+        "status": job.slide_status[idx],
+        "slide": job.slides[idx],
+        "image_url": image_url,
+        "thumbnail_url": f"/slides/{slide_id}/thumbnail",
+    })
+
+
+_IMAGE_NAME = re.compile(r"^([0-9a-f]{64})\.(png|jpg|webp)$")
+_IMAGE_MEDIA_TYPES = {"png": "image/png", "jpg": "image/jpeg", "webp": "image/webp"}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match names `etag` (or is `*`)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+@functools.lru_cache(maxsize=1024)
+def _file_digest(path: str, inode: int, size: int, mtime_ns: int) -> str:
+    """sha256 of the file at `path`, cached per version of the file (a rewrite is a new inode)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stored_image(key: str, image_name: str):
+    """(queued bytes or None, path or None, sha256 of the bytes) of a stored image, or None if it is not stored."""
+    data = image_cache.disk.pending(key)
+    if data is not None:
+        return data, None, hashlib.sha256(data).hexdigest()
+    path = os.path.join(image_cache.cache_dir, image_name)
+    try:
+        st = os.stat(path)
+        return None, path, _file_digest(path, st.st_ino, st.st_size, st.st_mtime_ns)
+    except OSError:
+        return None
+
+
+@router.get("/images/{image_name}")
+async def get_image(image_name: str, request: Request):
+    """
+    A generated image by the name its slide lists, with an ETag of its bytes and
+    Range support. Images still being written are served from memory.
+    """
+    match = _IMAGE_NAME.match(image_name)
+    if match is None:
+        return JSONResponse({"error": "Image not found"}, status_code=404)
+    key, ext = match.groups()
+    stored = await asyncio.to_thread(_stored_image, key, image_name)
+    if stored is None:
+        return JSONResponse({"error": "Image not found"}, status_code=404)
+    data, path, digest = stored
+    # Names hash the generation inputs, not the bytes: an evicted image may come back
+    # regenerated under the same name, so caches revalidate against the bytes' digest
+    headers = {"Cache-Control": "public, no-cache", "ETag": f'"{digest}"'}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if data is not None:
+        return Response(data, media_type=_IMAGE_MEDIA_TYPES[ext], headers=headers)
+    return FileResponse(path, media_type=_IMAGE_MEDIA_TYPES[ext], headers=headers)
+
+
+# --- Thumbnails ---
+
+_THUMBNAIL_NAME = re.compile(r"^([0-9a-f]{64})\.(png|webp)$")
+
+
+def _thumbnail_options(width, fmt):
+    """(width, format) from query / body values, or an error response."""
+    try:
+        width = int(width or THUMBNAIL_WIDTH)
+    except (TypeError, ValueError):
+        return None, JSONResponse({"error": "width must be an integer"}, status_code=400)
+    if not 64 <= width <= THUMBNAIL_MAX_WIDTH:
+        return None, JSONResponse({"error": f"width must be between 64 and {THUMBNAIL_MAX_WIDTH}"}, status_code=400)
+    if fmt not in FORMATS:
+        return None, JSONResponse({"error": f"format must be one of {sorted(FORMATS)}"}, status_code=400)
+    return (width, fmt), None
+
+
+async def _register_thumbnail(slide: dict, theme: str, image_key: str, width: int, fmt: str) -> str:
+    """Content hash of the slide's thumbnail, registered so it can be rendered on request."""
+    image = await asyncio.to_thread(image_cache.peek, image_key) if image_key else None
+    # Hashed by the image's bytes, not its description: a regenerated image gets a new URL.
+    # Not generated (yet): drawn with the placeholder, and hashed as such
+    digest = image_digest(image) if image else None
+    key = thumbnail_key(slide, theme, width, fmt, digest)
+    thumbnail_cache.register(key, {
+        "slide": slide, "theme": theme, "width": width, "fmt": fmt,
+        "image_key": image_key if digest else None, "image_digest": digest,
+    })
+    return key
+
+
+async def _thumbnail_response(request: Request, key: str, fmt: str, cache_control: str):
+    """Thumbnail `key` with its ETag, rendered off the event loop on a cache miss."""
+    data = thumbnail_cache.get(key)
+    spec = thumbnail_cache.spec(key) if data is None else None
+    if data is None and spec is None:
+        return JSONResponse({"error": "Thumbnail not found"}, status_code=404)
+    headers = {"ETag": f'"{key}"', "Cache-Control": cache_control}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if data is None:
+        image = await asyncio.to_thread(image_cache.peek, spec["image_key"]) if spec["image_key"] else None
+        if spec["image_digest"] and (image is None or image_digest(image) != spec["image_digest"]):
+            # The image was evicted or regenerated since registration: these pixels are gone
+            return JSONResponse({"error": "Thumbnail not found"}, status_code=404)
+        with THUMBNAIL_RENDER_SECONDS.time():
+            data = await asyncio.to_thread(
+                render_thumbnail, spec["slide"], spec["theme"], image, spec["width"], spec["fmt"]
+            )
+        thumbnail_cache.put(key, data)
+    return Response(data, media_type=FORMATS[fmt], headers=headers)
+
+
+@router.post("/thumbnails")
+async def create_thumbnails(request: Request):
+    """
+    Registers thumbnails of `slides` (paginated as the deck would be) and returns
+    their content-addressed URLs; each one is rendered on its first GET. Images
+    already in the image cache are drawn in, the others as the placeholder.
+    """
+    data = await request.json()
+    slides, error = _read_slides(data)
+    if error is not None:
+        return error
+    theme = data.get("theme")
+    error = _unknown_theme(theme)
+    if error is not None:
+        return error
+    options, error = _thumbnail_options(data.get("width"), data.get("format", "png"))
+    if error is not None:
+        return error
+    width, fmt = options
+    thumbnails = []
+    for slide in paginate_slides(slides, theme):
+        description = (slide.get("slide_content") or {}).get("image_description")
+        image_key = image_agent.cache_key(description) if description else None
+        key = await _register_thumbnail(slide, theme, image_key, width, fmt)
+        thumbnails.append({"slide_no": slide.get("slide_no"), "url": f"/thumbnails/{key}.{fmt}", "etag": f'"{key}"'})
+    return JSONResponse({"thumbnails": thumbnails})
+
+
+@router.get("/thumbnails/{name}")
+async def get_thumbnail(name: str, request: Request):
+    match = _THUMBNAIL_NAME.match(name)
+    if match is None:
+        return JSONResponse({"error": "Thumbnail not found"}, status_code=404)
+    key, fmt = match.groups()
+    spec = thumbnail_cache.spec(key)
+    if spec is not None and spec["fmt"] != fmt:
+        return JSONResponse({"error": "Thumbnail not found"}, status_code=404)
+    # Content-addressed: the bytes behind a name never change
+    return await _thumbnail_response(request, key, fmt, "public, max-age=31536000, immutable")
+
+
+@router.get("/slides/{slide_id}/thumbnail")
+async def get_slide_thumbnail(slide_id: str, request: Request, width: int = None, format: str = "png"):
+    try:
+        job_id, idx = parse_slide_id(slide_id)
+    except ValueError:
+        return JSONResponse({"error": "Malformed slide id"}, status_code=400)
+    job = job_manager.get(job_id)
+    if job is None or idx >= len(job.slides):
+        return JSONResponse({"error": "Slide not found"}, status_code=404)
+    options, error = _thumbnail_options(width, format)
+    if error is not None:
+        return error
+    key = await _register_thumbnail(job.slides[idx], job.theme, job.image_keys[idx], *options)
+    # The slide's image may still arrive: revalidate every time, the ETag changes with it
+    return await _thumbnail_response(request, key, options[1], "no-cache")
+
+
+# --- Conversation sessions ---
+# The server keeps the current deck per session, so follow-ups only send the new
+# instruction instead of the whole transcript.
+
+@router.post("/sessions")
+async def create_session(request: Request):
+    """New session; an optional `deck` seeds it, so follow-ups edit that deck."""
+    body = await request.body()
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        return JSONResponse({"error": "Body must be JSON"}, status_code=400)
+    deck = None
+    if isinstance(data, dict) and data.get("deck") is not None:
+        deck, error = _read_slides({"slides": data["deck"]})
+        if error is not None:
+            return error
+    try:
+        session = session_store.create(deck)
+    except SessionTooLarge as exc:
+        return JSONResponse({"error": str(exc)}, status_code=413)
+    return JSONResponse({"session_id": session.id}, status_code=201)
+
+
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    session = session_store.get(session_id)
+    if session is None:
+        return JSONResponse({"error": "Session not found"}, status_code=404)
+    return JSONResponse(session.to_dict())
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    image_prefetcher.cancel(session_id)
+    if not session_store.delete(session_id):
+        return JSONResponse({"error": "Session not found"}, status_code=404)
+    return Response(status_code=204)
+
+
+@router.post("/sessions/{session_id}/turns")
+async def session_turn(session_id: str, request: Request):
+    """
+    Next instruction of a session. The model gets the current deck plus the recent
+    instructions that fit the token budget; the response is the updated deck.
+    """
+    session = session_store.get(session_id)
+    if session is None:
+        return JSONResponse({"error": "Session not found"}, status_code=404)
+    data = await request.json()
+    prompt = data.get("prompt")
+    fresh = bool(data.get("fresh", False))
+    mode = data.get("generation_mode")
+    if mode is not None and mode not in GENERATION_MODES:
+        return JSONResponse({"error": f"generation_mode must be one of {list(GENERATION_MODES)}"}, status_code=400)
+
+    def generate(prompt, history):
+        return structured_content_generation(prompt, history, fresh=fresh, mode=mode)
+
+    try:
+        response, prompt_tokens = await _cancel_on_disconnect(
+            request, session_store.run_turn(session, prompt, generate)
+        )
+    except asyncio.TimeoutError:
+        return JSONResponse({"error": "Content generation timed out"}, status_code=504)
+    except ClientDisconnected:
+        log("client_disconnected", endpoint="session_turn")
+        return Response(status_code=499)
+    except SessionTooLarge as exc:
+        return JSONResponse({"error": str(exc)}, status_code=413)
+    log("session_turn", session=session_id, prompt_tokens_before=prompt_tokens["before"],
+        prompt_tokens_after=prompt_tokens["after"])
+    _prefetch_images(request, data, response, session_id=session_id)
+    return JSONResponse({"content": response, "prompt_tokens": prompt_tokens})
+
+
+@router.get("/session_stats")
+async def session_stats():
+    return JSONResponse(session_store.stats())
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Tests run against benchmarks.fake_gemini.FakeGemini: no API key, network or quota needed.
+# Modules import as `ai_core.x` from the Backend directory, as in the app.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STARTUP_WARMUP", "0")
+
+try:
+    import settings  # noqa: F401
+except ImportError:  # the fake needs no API key
+    sys.modules["settings"] = type(sys)("settings")
+    sys.modules["settings"].GENAI_API_KEY = ""
@@ -0,0 +1,80 @@
+import os
+import time
+
+from ai_core.artifacts import ArtifactStore
+
+
+def _store(directory, max_bytes: int = 1 << 20) -> ArtifactStore:
+    return ArtifactStore(str(directory), max_bytes=max_bytes, max_age=3600, extensions=(".bin",))
+
+
+def test_written_artifacts_are_readable_and_counted(tmp_path):
+    store = _store(tmp_path)
+    assert store.write("a", b"x" * 100, ".bin")
+    assert store.read("a") == b"x" * 100  # queued or on disk
+    store.flush()
+    assert store.path_for("a") == os.path.join(str(tmp_path), "a.bin")
+    assert store.stats()["disk_bytes"] == 100
+
+
+def test_failed_writes_are_not_counted_as_disk_bytes(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    store.write("a", b"x" * 100, ".bin")
+    store.flush()
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    for idx in range(5):
+        store.write(f"b{idx}", b"y" * 1000, ".bin")
+    store.flush()
+
+    stats = store.stats()
+    assert stats["write_errors"] == 5
+    assert stats["disk_bytes"] == 100
+    assert stats["pending_writes"] == 0
+    assert sorted(os.listdir(tmp_path)) == ["a.bin"]  # no temp files left behind
+
+
+def test_quota_evicts_least_recently_used(tmp_path):
+    store = _store(tmp_path, max_bytes=250)
+    for idx in range(3):
+        store.write(f"k{idx}", b"z" * 100, ".bin")
+        store.flush()
+        used = time.time() - 100 + idx  # k0 least recently used
+        os.utime(os.path.join(str(tmp_path), f"k{idx}.bin"), (used, used))
+    store.write("k3", b"z" * 100, ".bin")
+    store.flush()
+
+    assert store.path_for("k0") is None and store.path_for("k1") is None
+    assert store.path_for("k3") is not None
+    assert store.stats()["disk_bytes"] <= 250
+
+
+def test_image_etag_follows_the_stored_bytes(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+    from ai_core.image_cache import ImageCache
+    from benchmarks.fake_gemini import FakeGemini
+
+    cache = ImageCache(cache_dir=str(tmp_path))
+    monkeypatch.setattr("routers.image_cache", cache)
+    first = FakeGemini(image_size=(64, 48)).image_bytes("picture")
+    regenerated = first[:-1] + bytes([first[-1] ^ 0xFF])  # same length, other bytes
+
+    with TestClient(main.app) as client:
+        cache.put("a" * 64, first)
+        cache.disk.flush()
+        url = "/images/" + cache.name_for("a" * 64)
+        response = client.get(url)
+        assert response.status_code == 200 and "no-cache" in response.headers["cache-control"]
+        etag = response.headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        cache.put("a" * 64, regenerated)
+        cache.disk.flush()
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.content == regenerated
+        assert response.headers["etag"] != etag
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import os
+
+from batch_render import read_decks
+from benchmarks.fake_gemini import fake_slides
+
+
+def test_malformed_decks_are_reported_per_deck(tmp_path):
+    source = tmp_path / "decks.jsonl"
+    records = [
+        {"name": "good", "slides": fake_slides(3, "good")},
+        {"name": "bad-json", "slides": "[{not json"},
+        {"name": "bad-slides", "slides": [{"slide_no": 1, "slide_category": "Title Slide", "slide_content": {}}]},
+        {"name": "as-string", "slides": json.dumps(fake_slides(2, "string"))},
+    ]
+    source.write_text("\n".join(json.dumps(record) for record in records) + "\n{broken\n")
+
+    decks = {deck.name: deck for deck in read_decks(str(source))}
+
+    assert decks["good"].error is None and len(decks["good"].slides) == 3
+    assert decks["as-string"].error is None and len(decks["as-string"].slides) == 2
+    assert decks["bad-json"].error.startswith("invalid slides JSON")
+    assert decks["bad-slides"].error.startswith("invalid slides")
+    assert decks["deck-000005"].error.startswith("invalid JSON")
+
+
+def test_decks_missing_gemini_images_are_retried_on_the_next_run(tmp_path, monkeypatch):
+    from argparse import Namespace
+
+    from ai_core.agents import image_agent
+    from batch_render import run_batch, FAILED_FILE
+    from benchmarks.fake_gemini import FakeGemini
+
+    fake = FakeGemini(image_size=(64, 48))
+    decks = tmp_path / "decks"
+    decks.mkdir()
+    for name in ("a", "b"):
+        (decks / f"{name}.json").write_text(json.dumps(fake_slides(3, name)))
+    out = tmp_path / "out"
+    args = Namespace(images="gemini", workers=1, chunk_size=8, image_concurrency=4)
+
+    async def flaky(prompts, max_concurrency=4, on_result=None):
+        return [None if prompt.startswith("b ") else fake.image_bytes(prompt) for prompt in prompts]
+
+    monkeypatch.setattr(image_agent, "generate_images", flaky)
+    progress = asyncio.run(run_batch(read_decks(str(decks)), str(out), args))
+    assert progress.failed == 1
+    assert sorted(os.listdir(out)) == [FAILED_FILE, "a.pptx", "b.incomplete.pptx"]
+    assert json.loads((out / FAILED_FILE).read_text())["name"] == "b"
+
+    async def working(prompts, max_concurrency=4, on_result=None):
+        return [fake.image_bytes(prompt) for prompt in prompts]
+
+    monkeypatch.setattr(image_agent, "generate_images", working)
+    progress = asyncio.run(run_batch(read_decks(str(decks)), str(out), args))
+    assert progress.failed == 0 and progress.skipped == 1
+    assert sorted(os.listdir(out)) == [FAILED_FILE, "a.pptx", "b.pptx"]
@@ -0,0 +1,45 @@
+import io
+
+from fastapi.testclient import TestClient
+from pptx import Presentation
+
+from ai_core.decks import plan_reuse
+from benchmarks.fake_gemini import FakeGemini, fake_slides
+
+
+def test_slides_without_their_image_are_not_reused():
+    old = fake_slides(4, "reuse")
+    assert plan_reuse(old, old) == [0, 1, 2, 3]
+    assert plan_reuse(old, old, missing_images={1, 3}) == [0, None, 2, None]
+
+
+def _pictures(content: bytes) -> list:
+    prs = Presentation(io.BytesIO(content))
+    return [sum(shape.shape_type == 13 for shape in slide.shapes) for slide in prs.slides]
+
+
+def test_failed_images_are_retried_by_the_next_edit(monkeypatch):
+    import main
+    from ai_core.agents import image_agent
+
+    fake = FakeGemini(image_size=(64, 48))
+    slides = fake_slides(4, "retry images")
+
+    async def failing(prompt, priority=None):
+        raise RuntimeError("image generation down")
+
+    async def working(prompt, priority=None):
+        return fake.image_bytes(prompt)
+
+    with TestClient(main.app) as client:
+        monkeypatch.setattr(image_agent, "agenerate_image_bytes", failing)
+        first = client.post("/generate_ppt", json={"slides": slides})
+        assert first.status_code == 200 and _pictures(first.content) == [0, 0, 0, 0]
+
+        monkeypatch.setattr(image_agent, "agenerate_image_bytes", working)
+        second = client.post("/generate_ppt", json={"slides": slides, "base_deck_id": first.headers["X-Deck-Id"]})
+        assert second.headers["X-Reused-Slides"] == "0"
+        assert all(count == 1 for count in _pictures(second.content))
+
+        third = client.post("/generate_ppt", json={"slides": slides, "base_deck_id": second.headers["X-Deck-Id"]})
+        assert third.headers["X-Reused-Slides"] == "4"
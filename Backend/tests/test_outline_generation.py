@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from ai_core import agents
+from ai_core.clients import ClientPool
+from ai_core.gemini_client import GeminiAgent
+from ai_core.scheduler import GeminiScheduler
+from ai_core.schemas import validate_slides
+from benchmarks.fake_gemini import FakeGemini
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeGemini(llm_latency=0.01, sigma=0.0, image_size=(64, 48))
+    clients = ClientPool()
+    clients._build = lambda api_version: fake
+    scheduler = GeminiScheduler(model_limits={"gemini-2.5-flash": (100_000, 64)})
+    monkeypatch.setattr(agents, "gemini_agent", GeminiAgent(scheduler=scheduler, clients=clients))
+    return fake
+
+
+def test_outlined_deck_is_complete_and_valid(fake):
+    prompt = "Create a 20-slide deck about outlined bees"
+    deck = asyncio.run(agents.structured_content_generation(prompt, [], mode="outline", fresh=True))
+
+    assert fake.calls == 21  # the outline, then one call per slide
+    assert validate_slides(deck) == validate_slides(fake_deck(fake, prompt))
+
+
+def test_cached_previews_are_kept_apart_by_mode(fake):
+    prompt = "Create a 16-slide deck about cached wasps"
+
+    async def run():
+        for mode in ("outline", "single", "auto", "single"):
+            await agents.structured_content_generation(prompt, [], mode=mode)
+
+    asyncio.run(run())
+    # outline: 17 calls, single: 1; "auto" resolves to outline and the last single call are cache hits
+    assert fake.calls == 18
+
+
+def fake_deck(fake: FakeGemini, prompt: str) -> list:
+    return json.loads(fake.structured_text(prompt))
+
+
+def test_stuck_slides_do_not_hold_the_deck(fake, monkeypatch):
+    monkeypatch.setattr(agents, "EXPAND_TIMEOUT", 0.3)
+    expand_slide = agents.gemini_agent.expand_slide
+
+    async def stuck_on_slide_3(question, history, outline, idx):
+        if idx == 2:
+            await asyncio.sleep(3600)
+        return await expand_slide(question, history, outline, idx)
+
+    monkeypatch.setattr(agents.gemini_agent, "expand_slide", stuck_on_slide_3)
+    prompt = "Create a 16-slide deck about stuck ants"
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        deck = await agents.outlined_structured_output(prompt, [])
+        return deck, asyncio.get_running_loop().time() - started
+
+    deck, elapsed = asyncio.run(run())
+    assert elapsed < 1
+    assert len(validate_slides(deck)) == 16
+    assert deck[2]["slide_content"]["title"] == fake_deck(fake, prompt)[2]["slide_content"]["title"]
+    assert deck[3] == fake_deck(fake, prompt)[3]
+
+
+def test_timed_out_slides_are_not_retried(fake, monkeypatch):
+    attempts = []
+
+    async def timing_out(question, history, outline, idx):
+        attempts.append(idx)
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(agents.gemini_agent, "expand_slide", timing_out)
+    deck = asyncio.run(agents.outlined_structured_output("Create a 16-slide deck about slow moths", []))
+
+    assert sorted(attempts) == list(range(16))
+    assert len(validate_slides(deck)) == 16
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from ai_core.clients import ClientPool
+from ai_core.gemini_client import ImageGenAgent
+from ai_core.image_cache import ImageCache
+from ai_core.prefetch import ImagePrefetcher, image_descriptions
+from ai_core.scheduler import GeminiScheduler, INTERACTIVE, BULK
+from benchmarks.fake_gemini import FakeGemini, FakeServerError, fake_slides
+
+MODEL = "gemini-2.0-flash-exp"
+
+
+def _scheduler(concurrency: int = 4, max_attempts: int = 6) -> GeminiScheduler:
+    return GeminiScheduler(
+        model_limits={MODEL: (100_000, concurrency)}, max_attempts=max_attempts, base_backoff=0.01, max_backoff=0.05
+    )
+
+
+class _Flaky:
+    """Fails the first `failures` calls with `error`, then returns "ok"."""
+
+    def __init__(self, failures: int, error=FakeServerError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.calls <= self.failures:
+            raise self.error("injected")
+        return "ok"
+
+
+def test_overload_errors_are_retried_and_shrink_the_limit():
+    scheduler = _scheduler(concurrency=4)
+    flaky = _Flaky(failures=2)
+
+    assert asyncio.run(scheduler.call(MODEL, flaky)) == "ok"
+    assert flaky.calls == 3
+    stats = scheduler.stats()[MODEL]
+    assert stats["overloads"] == 2 and stats["retries"] == 2
+    assert stats["concurrency_limit"] < 4
+
+
+def test_retries_stop_after_max_attempts():
+    scheduler = _scheduler(max_attempts=3)
+    flaky = _Flaky(failures=10)
+
+    with pytest.raises(FakeServerError):
+        asyncio.run(scheduler.call(MODEL, flaky))
+    assert flaky.calls == 3
+
+
+def test_other_errors_are_not_retried():
+    scheduler = _scheduler()
+    flaky = _Flaky(failures=1, error=ValueError)
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.call(MODEL, flaky))
+    assert flaky.calls == 1
+
+
+def test_interactive_calls_go_ahead_of_queued_bulk_calls():
+    scheduler = _scheduler(concurrency=1)
+    order = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        async def record(name):
+            order.append(name)
+
+        holding = asyncio.create_task(scheduler.call(MODEL, blocker, priority=BULK))
+        await asyncio.sleep(0)
+        queued = [asyncio.create_task(scheduler.call(MODEL, lambda: record("bulk"), priority=BULK))]
+        await asyncio.sleep(0)
+        queued.append(asyncio.create_task(scheduler.call(MODEL, lambda: record("interactive"), priority=INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert scheduler.stats()[MODEL]["queued"] == {"interactive": 1, "bulk": 1, "speculative": 0}
+        release.set()
+        await asyncio.gather(holding, *queued)
+
+    asyncio.run(run())
+    assert order == ["interactive", "bulk"]
+
+
+def test_image_generation_survives_injected_503s(tmp_path):
+    fake = FakeGemini(image_latency=0.01, sigma=0.0, error_rate=0.3, image_size=(64, 48), seed=1)
+    clients = ClientPool()
+    clients._build = lambda api_version: fake
+    agent = ImageGenAgent(cache=ImageCache(cache_dir=str(tmp_path)), scheduler=_scheduler(max_attempts=20), clients=clients)
+
+    prompts = [f"picture {idx}" for idx in range(20)]
+    images = asyncio.run(agent.generate_images(prompts, max_concurrency=8))
+
+    assert images == [fake.image_bytes(prompt) for prompt in prompts]
+    assert fake.errors > 0
+    assert agent.scheduler.stats()[MODEL]["overloads"] == fake.errors
+
+
+def test_finished_prefetches_are_dropped_from_their_session(tmp_path):
+    fake = FakeGemini(image_latency=0.01, sigma=0.0, image_size=(64, 48))
+    clients = ClientPool()
+    clients._build = lambda api_version: fake
+    agent = ImageGenAgent(cache=ImageCache(cache_dir=str(tmp_path)), scheduler=_scheduler(), clients=clients)
+    prefetcher = ImagePrefetcher(agent=agent)
+    slides = fake_slides(3, "prefetch")
+
+    async def run():
+        prefetcher.prefetch("session", slides)
+        tasks = list(prefetcher._sessions["session"].values())
+        assert prefetcher.stats()["pending"] == len(tasks) > 0
+        await asyncio.gather(*tasks)
+        await asyncio.sleep(0)  # done callbacks
+        return tasks
+
+    tasks = asyncio.run(run())
+    assert prefetcher.stats()["sessions"] == prefetcher.stats()["pending"] == 0
+    for description, task in zip(image_descriptions(slides), tasks):
+        assert agent.cache.peek(agent.cache_key(description)) == task.result()  # still served from the cache
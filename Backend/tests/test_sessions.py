@@ -0,0 +1,58 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from ai_core.sessions import SessionStore, deck_markdown, estimate_tokens, _history_tokens
+from benchmarks.fake_gemini import fake_slides
+
+
+def _turns(store: SessionStore, session, prompts: list) -> list:
+    async def generate(prompt, history):
+        return fake_slides(8, prompt)
+
+    async def run():
+        return [(await store.run_turn(session, prompt, generate))[1] for prompt in prompts]
+
+    return asyncio.run(run())
+
+
+def test_before_counts_the_transcript_a_sessionless_client_resends():
+    store = SessionStore()
+    prompts = ["Create an 8-slide deck about owls"] + [f"Make slide {n} shorter" for n in range(2, 7)]
+    prompt_tokens = _turns(store, store.create(), prompts)
+
+    # Every earlier prompt and deck (as the chat's markdown), then the new prompt twice
+    transcript = [
+        {"role": "user", "content": prompts[0]},
+        {"role": "assistant", "content": deck_markdown(fake_slides(8, prompts[0]))},
+    ]
+    new_prompt = [{"role": "user", "content": prompts[1]}]
+    assert prompt_tokens[1]["before"] == _history_tokens(transcript + new_prompt) + estimate_tokens(prompts[1])
+    # The compact prompt carries the deck as JSON once; the transcript grows by a deck per turn
+    assert all(turn["before"] > turn["after"] for turn in prompt_tokens[2:])
+
+
+def test_seeded_session_edits_the_given_deck():
+    store = SessionStore()
+    deck = fake_slides(4, "seed")
+    session = store.create(deck)
+    histories = []
+
+    async def generate(prompt, history):
+        histories.append(history)
+        return deck
+
+    asyncio.run(store.run_turn(session, "Make slide 3 shorter", generate))
+    assert '"seed part 3"' in histories[0][-1]["content"]
+
+
+def test_sessions_endpoint_accepts_a_seed_deck():
+    import main
+
+    with TestClient(main.app) as client:
+        deck = fake_slides(3, "restored")
+        created = client.post("/sessions", json={"deck": deck})
+        assert created.status_code == 201
+        assert client.get(f"/sessions/{created.json()['session_id']}").json()["deck"] == deck
+        assert client.post("/sessions", json={"deck": [{"slide_no": 1}]}).status_code == 422
+        assert client.post("/sessions").status_code == 201
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import time
+
+from ai_core.clients import ClientPool
+from ai_core.gemini_client import GeminiAgent
+from ai_core.scheduler import GeminiScheduler
+from benchmarks.fake_gemini import FakeGemini
+
+
+def _agent(fake: FakeGemini) -> GeminiAgent:
+    clients = ClientPool()
+    clients._build = lambda api_version: fake
+    scheduler = GeminiScheduler(model_limits={"gemini-2.5-flash": (100_000, 64)})
+    return GeminiAgent(scheduler=scheduler, clients=clients)
+
+
+def test_overlapping_previews_take_about_as_long_as_one():
+    agent = _agent(FakeGemini(llm_latency=0.3, sigma=0.0, image_size=(64, 48)))
+
+    async def timed(count):
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            agent.generate_structured_output(f"Create a 5-slide deck about topic {idx}", []) for idx in range(count)
+        ))
+        return time.perf_counter() - started, results
+
+    async def run():
+        single, _ = await timed(1)
+        overlapping, results = await timed(16)
+        return single, overlapping, results
+
+    single, overlapping, results = asyncio.run(run())
+    assert all(isinstance(slides, list) and len(slides) == 5 for slides in results)
+    # Sixteen blocking calls would take sixteen times as long
+    assert overlapping < single * 2
+
+
+def test_streamed_preview_yields_the_whole_deck():
+    fake = FakeGemini(llm_latency=0.05, sigma=0.0, image_size=(64, 48))
+    agent = _agent(fake)
+
+    async def run():
+        return "".join([chunk async for chunk in agent.stream_structured_output("Create a 6-slide deck about bees", [])])
+
+    assert json.loads(asyncio.run(run())) == json.loads(fake.structured_text("Create a 6-slide deck about bees"))
+
+
+def test_streamed_previews_with_invalid_slides_are_not_cached(monkeypatch):
+    from ai_core import agents
+
+    fake = FakeGemini(llm_latency=0.01, sigma=0.0, image_size=(64, 48))
+    monkeypatch.setattr(agents, "gemini_agent", _agent(fake))
+    good = json.loads(fake.structured_text("anything"))
+    responses = iter([json.dumps(good[:1] + [{"slide_no": 2, "slide_category": "Bullet Slide"}]), json.dumps(good)])
+    monkeypatch.setattr(fake, "structured_text", lambda prompt, schema=None, contents="": next(responses))
+
+    async def events():
+        return [event async for event, _ in agents.stream_structured_content("Stream a deck about invalid slides", [])]
+
+    assert asyncio.run(events()) == ["slide", "invalid_slide"]
+    assert asyncio.run(events()) == ["slide"] * len(good)  # generated again, not replayed
+    assert fake.calls == 2
+    assert asyncio.run(events()) == ["slide"] * len(good)  # the clean response is cached
+    assert fake.calls == 2
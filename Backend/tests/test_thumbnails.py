@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+from benchmarks.fake_gemini import FakeGemini, fake_slides
+
+
+def test_thumbnails_follow_the_image_bytes_without_skewing_cache_stats(tmp_path, monkeypatch):
+    import main
+    from ai_core.agents import image_agent
+    from ai_core.image_cache import ImageCache
+
+    cache = ImageCache(cache_dir=str(tmp_path))
+    monkeypatch.setattr(image_agent, "cache", cache)
+    monkeypatch.setattr("routers.image_cache", cache)
+    fake = FakeGemini(image_size=(64, 48))
+    slides = fake_slides(2, "thumbnails")
+    key = image_agent.cache_key(slides[1]["slide_content"]["image_description"])
+
+    def url(client):
+        return client.post("/thumbnails", json={"slides": slides}).json()["thumbnails"][1]["url"]
+
+    with TestClient(main.app) as client:
+        placeholder = url(client)
+        cache.put(key, fake.image_bytes("first"))
+        first = url(client)
+        response = client.get(first)
+        assert response.status_code == 200 and "immutable" in response.headers["cache-control"]
+        assert client.get(first, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+        cache.put(key, fake.image_bytes("regenerated"))
+        assert len({placeholder, first, url(client)}) == 3
+        stats = cache.stats()
+        assert stats["memory_hits"] == stats["disk_hits"] == 0
@@ -1,10 +1,145 @@
 import streamlit as st
 import requests
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
 BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://localhost:8000")
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+PPTX_CACHE_SIZE = 5  # decks kept per browser session for instant re-download
+# Opt in (PREFETCH_IMAGES=1) to let the backend generate the images while the preview is being read
+PREFETCH_IMAGES = os.getenv("PREFETCH_IMAGES", "0") == "1"
+
+# st.fragment (Streamlit >= 1.37) re-runs only the progress display while the backend
+# works; older versions show a snapshot that refreshes on the next interaction
+fragment = getattr(st, "fragment", None) or (lambda run_every=None: (lambda fn: fn))
+
+@st.cache_resource
+def http():
+    """One pooled HTTP session for the app, so connections to the backend are reused across reruns."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def background():
+    """Threads for backend calls that take too long to block the script on."""
+    return ThreadPoolExecutor(max_workers=4)
+
+def deck_hash(slides, draft=False):
+    payload = json.dumps({"slides": slides, "draft": draft}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cache_pptx(key, data):
+    """Keep the PPTX bytes of a deck by its hash, dropping the oldest beyond PPTX_CACHE_SIZE."""
+    cache = st.session_state.setdefault("pptx_cache", {})
+    cache.pop(key, None)
+    cache[key] = data
+    while len(cache) > PPTX_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+
+def create_session():
+    """
+    New backend session, seeded with the deck shown last (if any) so that a follow-up
+    after the old session expired still edits that deck.
+    """
+    deck = st.session_state.get("assistant_slides_json")
+    if isinstance(deck, list) and deck:
+        created = http().post(f"{BACKEND_API_URL}/sessions", json={"deck": deck})
+        if created.status_code == 201:
+            return created.json()["session_id"]
+        st.warning("The previous conversation could not be restored; this request starts a new deck.")
+    return http().post(f"{BACKEND_API_URL}/sessions").json()["session_id"]
+
+def send_session_turn(prompt):
+    """Post `prompt` to the backend session, starting a new one if there is none or it expired."""
+    for _ in range(2):
+        if "session_id" not in st.session_state:
+            st.session_state["session_id"] = create_session()
+        response = http().post(
+            f"{BACKEND_API_URL}/sessions/{st.session_state['session_id']}/turns",
+            json={"prompt": prompt, "prefetch_images": PREFETCH_IMAGES}
+        )
+        if response.status_code != 404:
+            return response
+        del st.session_state["session_id"]
+    return response
+
+# Both raise on failure rather than return an empty result: st.cache_data does not
+# keep exceptions, so a failed request is retried on the next rerun
+
+@st.cache_data(max_entries=32, ttl=60, show_spinner=False)
+def thumbnail_urls(slides_json):
+    response = http().post(f"{BACKEND_API_URL}/thumbnails", json={"slides": json.loads(slides_json), "width": 320})
+    response.raise_for_status()
+    return [(t["slide_no"], t["url"]) for t in response.json()["thumbnails"]]
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def fetch_thumbnail(url):
+    """Thumbnail URLs are content-addressed, so the bytes can be kept for good."""
+    response = http().get(f"{BACKEND_API_URL}{url}")
+    response.raise_for_status()
+    return response.content
+
+def show_thumbnails(slides):
+    """Layout preview of `slides`, rendered by the backend without building the deck."""
+    try:
+        thumbnails = thumbnail_urls(json.dumps(slides, sort_keys=True))
+    except requests.RequestException:
+        return
+    columns = st.columns(2)
+    for idx, (slide_no, url) in enumerate(thumbnails):
+        try:
+            image = fetch_thumbnail(url)
+        except requests.RequestException:
+            continue
+        columns[idx % 2].image(image, caption=f"Slide {slide_no}")
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def slides_markdown(slides_json):
+    """Markdown dump of the slides, built once per distinct deck."""
+    slides = json.loads(slides_json)
+    slide_content = ""
+    for slide in slides:
+        slide_content += "---\n"
+        slide_content += f"### Slide {slide['slide_no']}"
+        slide_content += f"\n**Category:** {slide['slide_category']}\n"
+        if slide['slide_category'] == 'Title Slide':
+            slide_c = slide['slide_content']
+            slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}\n\n**Subtitle:** {slide_c.get('subtitle', 'N/A')}"
+            slide_content += f"\n\n**content:** {slide_c.get('content', 'N/A')}"
+            slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"
+            
+        if slide['slide_category'] == 'Bullet Slide':
+            slide_c = slide['slide_content']
+            slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}"
+            if slide_c.get('bullets'):
+                slide_content += "\n\n**Bullets:**\n" + "\n".join([f"- {point}" for point in slide_c.get('bullets', [])])
+            slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"
+        
+        if slide['slide_category'] ==  'Two Column Slide':
+            slide_c = slide['slide_content']
+            slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}"
+            if slide_c.get('left_column'):
+                slide_content += "\n\n**Left Column:**\n" + "\n".join([f"- {item}" for item in slide_c.get('left_column', [])])
+            if slide_c.get('right_column'):
+                slide_content += "\n\n**Right Column:**\n" + "\n".join([f"- {item}" for item in slide_c.get('right_column', [])])
+            slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"
+        if slide['slide_category'] == 'Content with Image Slide':
+            slide_c = slide['slide_content']
+            slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}"
+            if slide_c.get('content'):
+                slide_content += f"\n\n**Content:**\n{slide_c.get('content'):}"
+            slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"    
+                                    
+    return slide_content
 
 def run_slide_generator():
     st.set_page_config(page_title="Text-to-PPT Slide Generator", layout="centered")
@@ -62,71 +197,103 @@ def run_slide_generator():
             
             st.session_state["slides"].append({"role": "user", "content": prompt})
 
-            # history should include both user and assistant messages
-            history = [slide for slide in st.session_state["slides"] if slide["role"] in ["user", "assistant"]]
-            response = requests.post(
-                f"{BACKEND_API_URL}/content_generation_api",
-                json={"prompt": prompt, "history": history}
-            )
+            # The backend session keeps the current deck, so only the new prompt is sent
+            response = send_session_turn(prompt)
             assistant_content = response.json().get("content", "")
             st.session_state["assistant_slides_json"] = assistant_content
          
             with st.chat_message("assistant"):
-                slide_content = ""
-                for slide in assistant_content:
-                    slide_content += "---\n"
-                    slide_content += f"### Slide {slide['slide_no']}"
-                    slide_content += f"\n**Category:** {slide['slide_category']}\n"
-                    if slide['slide_category'] == 'Title Slide':
-                        slide_c = slide['slide_content']
-                        slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}\n\n**Subtitle:** {slide_c.get('subtitle', 'N/A')}"
-                        slide_content += f"\n\n**content:** {slide_c.get('content', 'N/A')}"
-                        slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"
-                        
-                    if slide['slide_category'] == 'Bullet Slide':
-                        slide_c = slide['slide_content']
-                        slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}"
-                        if slide_c.get('bullets'):
-                            slide_content += "\n\n**Bullets:**\n" + "\n".join([f"- {point}" for point in slide_c.get('bullets', [])])
-                        slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"
-                    
-                    if slide['slide_category'] ==  'Two Column Slide':
-                        slide_c = slide['slide_content']
-                        slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}"
-                        if slide_c.get('left_column'):
-                            slide_content += "\n\n**Left Column:**\n" + "\n".join([f"- {item}" for item in slide_c.get('left_column', [])])
-                        if slide_c.get('right_column'):
-                            slide_content += "\n\n**Right Column:**\n" + "\n".join([f"- {item}" for item in slide_c.get('right_column', [])])
-                        slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"
-                    if slide['slide_category'] == 'Content with Image Slide':
-                        slide_c = slide['slide_content']
-                        slide_content += f"\n\n**Title:** {slide_c.get('title', 'N/A')}"
-                        if slide_c.get('content'):
-                            slide_content += f"\n\n**Content:**\n{slide_c.get('content'):}"
-                        slide_content += f"\n\n**Image Description:** {slide_c.get('image_description', 'N/A')}"    
-                                                
+                slide_content = slides_markdown(json.dumps(assistant_content))
                 st.markdown(slide_content)
+                show_thumbnails(assistant_content)
               #  st.write(st.session_state["assistant_slides_json"])
                 
             st.session_state["slides"].append({"role": "assistant", "content": slide_content})
 
             # Add Create Slide button after showing slide_content
+    # Drafts use placeholder images and come back in about a second; the real deck is built in the background
+    draft = st.checkbox("Quick draft (placeholder images)")
     if st.button("Create Slide"):
              #   st.write(st.session_state["assistant_slides_json"])
-                with st.spinner("Generating PowerPoint file..."):
-                    ppt_response = requests.post(
-                        f"{BACKEND_API_URL}/generate_ppt",
-                        json={"slides": st.session_state["assistant_slides_json"]}
-                    )
-                    if ppt_response.status_code == 200:                        
-                        st.download_button(
-                            label="Download Presentation",
-                            data=ppt_response.content,
-                            file_name="generated_presentation.pptx",
-                            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+                slides = st.session_state["assistant_slides_json"]
+                key = deck_hash(slides, draft)
+                if key in st.session_state.get("pptx_cache", {}):
+                    pass  # same deck as before: the download below is served from the cache
+                elif draft:
+                    with st.spinner("Generating draft PowerPoint file..."):
+                        ppt_response = http().post(
+                            f"{BACKEND_API_URL}/generate_ppt", json={"slides": slides, "draft": True}
                         )
+                    if ppt_response.status_code == 200:
+                        cache_pptx(key, ppt_response.content)
+                        job_id = ppt_response.headers.get("X-Upgrade-Job-Id")
+                        if job_id:
+                            st.session_state["upgrade_job"] = {"id": job_id, "draft_key": key, "key": deck_hash(slides)}
                     else:
                         st.error("Failed to generate PowerPoint file.")
+                else:
+                    # Passing the previous deck id lets the backend rebuild only the changed slides
+                    future = background().submit(
+                        http().post,
+                        f"{BACKEND_API_URL}/generate_ppt",
+                        json={"slides": slides, "base_deck_id": st.session_state.get("deck_id")},
+                    )
+                    st.session_state["pending_deck"] = {"key": key, "future": future, "started": time.time()}
+                st.session_state["deck_key"] = key
+
+    deck_progress()
+
+    cache = st.session_state.get("pptx_cache", {})
+    deck_key = st.session_state.get("deck_key")
+    if deck_key in cache:
+        job = st.session_state.get("upgrade_job")
+        # The upgraded deck replaces the draft it was started from
+        final = job["key"] if job and job["draft_key"] == deck_key else None
+        data = cache.get(final) or cache[deck_key]
+        st.download_button(
+            label="Download Final Presentation" if final in cache else "Download Presentation",
+            data=data,
+            file_name="generated_presentation.pptx",
+            mime=PPTX_MIME,
+        )
+
+@fragment(run_every=1)
+def deck_progress():
+    """Progress of the deck being built and of the draft's upgrade, re-drawn every second."""
+    pending = st.session_state.get("pending_deck")
+    if pending:
+        future = pending["future"]
+        if not future.done():
+            st.info(f"Generating PowerPoint file... {time.time() - pending['started']:.0f}s")
+            return
+        del st.session_state["pending_deck"]
+        try:
+            response = future.result()
+        except requests.RequestException:
+            response = None
+        if response is None or response.status_code != 200:
+            st.error("Failed to generate PowerPoint file.")
+            return
+        st.session_state["deck_id"] = response.headers.get("X-Deck-Id")
+        cache_pptx(pending["key"], response.content)
+        st.rerun()
+
+    job = st.session_state.get("upgrade_job")
+    if (
+        job and job["draft_key"] == st.session_state.get("deck_key")
+        and job["key"] not in st.session_state.get("pptx_cache", {})
+    ):
+        status = http().get(f"{BACKEND_API_URL}/jobs/{job['id']}").json()
+        if status.get("status") == "done":
+            result = http().get(f"{BACKEND_API_URL}/jobs/{job['id']}/result")
+            if result.status_code == 200:
+                cache_pptx(job["key"], result.content)
+                st.rerun()
+        elif status.get("status") in ("queued", "running"):
+            st.progress(status.get("progress", 0.0), text="Generating images for the final deck...")
+        else:
+            st.session_state.pop("upgrade_job")
+            st.error(f"Final deck is not available ({status.get('status', status.get('error'))}).")
 
 if __name__ == "__main__":
     run_slide_generator()